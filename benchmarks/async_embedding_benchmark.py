@@ -0,0 +1,67 @@
+"""
+Compares the wall time of embedding a list of chunks sequentially, with the embed_list
+thread pool and with aembed_list, against a local fake Bedrock endpoint.
+
+Usage:
+    python -m benchmarks.async_embedding_benchmark [--chunks 1000] [--latency-ms 50] [--concurrency 200]
+"""
+import argparse
+import asyncio
+import os
+import resource
+import time
+
+import boto3
+from botocore.config import Config
+
+from benchmarks.fake_endpoint import FakeBedrockEndpoint
+from chunking.chunking import Chunk
+from embedding.titanv2_embedding import TitanV2Embedding
+
+
+def create_embedder(endpoint: FakeBedrockEndpoint, concurrency: int) -> TitanV2Embedding:
+    embedder = TitanV2Embedding("amazon.titan-embed-text-v2:0", "us-east-1")
+    embedder.client = boto3.client("bedrock-runtime", region_name="us-east-1", endpoint_url=endpoint.url,
+                                   config=Config(max_pool_connections=concurrency))
+    return embedder
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--sequential-chunks", type=int, default=100,
+                        help="Chunks embedded in the sequential run, which is slow")
+    args = parser.parse_args()
+
+    # The fake endpoint does not check signatures, but botocore needs credentials to sign
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+    chunks = [Chunk(f"chunk number {i} of the benchmark corpus") for i in range(args.chunks)]
+    with FakeBedrockEndpoint(args.latency_ms / 1000) as endpoint:
+        embedder = create_embedder(endpoint, args.concurrency)
+
+        start = time.perf_counter()
+        embedder.embed_list(chunks[:args.sequential_chunks])
+        elapsed = time.perf_counter() - start
+        print(f"sequential   {args.sequential_chunks / elapsed:10.1f} chunks/s")
+
+        embedder.max_workers = args.concurrency
+        start = time.perf_counter()
+        embedder.embed_list(chunks)
+        elapsed = time.perf_counter() - start
+        print(f"thread pool  {args.chunks / elapsed:10.1f} chunks/s  (max_workers={args.concurrency})")
+
+        embedder.max_concurrency = args.concurrency
+        endpoint.max_in_flight = 0
+        start = time.perf_counter()
+        embedding_list = asyncio.run(embedder.aembed_list(chunks))
+        elapsed = time.perf_counter() - start
+        print(f"aembed_list  {args.chunks / elapsed:10.1f} chunks/s  (max_concurrency={args.concurrency}, "
+              f"{endpoint.max_in_flight} in flight at most, {len(embedding_list.embeddings)} embeddings)")
+    print(f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
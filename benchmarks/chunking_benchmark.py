@@ -0,0 +1,64 @@
+"""
+Compares the throughput of the native FixedSizeTextSplitter with the LangChain
+CharacterTextSplitter path that FixedSizeChunker used previously.
+
+Usage:
+    python -m benchmarks.chunking_benchmark [--size-mb 8] [--chunk-size 128] [--chunk-overlap 10]
+"""
+import argparse
+import time
+
+from benchmarks.corpus import generate_text
+from chunking.fixedsize_chunking import FixedSizeChunker
+
+
+def langchain_chunk(chunker: FixedSizeChunker, text: str):
+    from langchain.text_splitter import CharacterTextSplitter
+
+    splitter = CharacterTextSplitter(
+        separator=chunker.space,
+        chunk_size=chunker.chunk_size,
+        chunk_overlap=chunker.chunk_overlap,
+        length_function=len,
+        is_separator_regex=False
+    )
+    return splitter.split_text(chunker._clean_data(text))
+
+
+def native_chunk(chunker: FixedSizeChunker, text: str):
+    return chunker.text_splitter.split_text(text)
+
+
+def measure(func, chunker, text, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(chunker, text)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=8)
+    parser.add_argument("--chunk-size", type=int, default=128)
+    parser.add_argument("--chunk-overlap", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = generate_text(args.size_mb)
+    size_mb = len(text.encode("utf-8")) / (1024 * 1024)
+    chunker = FixedSizeChunker(args.chunk_size, args.chunk_overlap)
+
+    native_time, native_chunks = measure(native_chunk, chunker, text, args.repeat)
+    langchain_time, langchain_chunks = measure(langchain_chunk, chunker, text, args.repeat)
+
+    print(f"corpus: {size_mb:.2f} MB, {len(native_chunks)} chunks")
+    print(f"langchain: {size_mb / langchain_time:8.2f} MB/s")
+    print(f"native:    {size_mb / native_time:8.2f} MB/s ({langchain_time / native_time:.1f}x)")
+    print(f"identical output: {native_chunks == langchain_chunks}")
+
+
+if __name__ == "__main__":
+    main()
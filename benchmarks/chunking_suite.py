@@ -0,0 +1,150 @@
+"""
+Measures the throughput and memory use of the chunking strategies on deterministic
+synthetic corpora, and writes the results as JSON for benchmarks.compare.
+
+Each (strategy, corpus profile, document size) case runs in a fresh process, so that
+its peak RSS is not inflated by earlier cases. For every case the suite reports:
+    docs_per_s, mb_per_s   best of --repeat timed runs, without tracing
+    peak_rss_mb            peak resident set size of the case process
+    rss_growth_mb          peak RSS growth while chunking, excluding corpus generation
+    alloc_peak_mb          peak traced Python allocations during one chunking run
+    alloc_blocks           Python memory blocks still allocated after that run (the chunks)
+
+The semantic strategy needs an embedding model and is not part of the suite.
+
+Usage:
+    python -m benchmarks.chunking_suite [--output results.json] [--total-mb 4]
+        [--strategies fixed hierarchical token content_defined]
+        [--profiles ascii whitespace unicode] [--sizes small medium large]
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+from benchmarks.corpus import PROFILES, SIZES, generate_corpus
+from chunking.chunking import BaseChunker
+from chunking.chunking_provider_factory import ChunkingFactory
+from tokenizer.tokenizer import CharacterRatioTokenizer
+
+STRATEGIES = ["fixed", "hierarchical", "token", "content_defined"]
+
+
+def create_chunker(strategy: str, chunk_size: int, chunk_overlap: int, parent_chunk_size: int) -> BaseChunker:
+    tokenizer = CharacterRatioTokenizer() if strategy == "token" else None
+    return ChunkingFactory.create_chunker(strategy, chunk_size, chunk_overlap, parent_chunk_size, tokenizer=tokenizer)
+
+
+def max_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def chunk_all(chunker: BaseChunker, docs: List[str]) -> List:
+    chunks = []
+    for doc in docs:
+        chunks.extend(chunker.chunk(doc))
+    return chunks
+
+
+def run_case(case: Dict) -> Dict:
+    docs = generate_corpus(case["profile"], SIZES[case["size"]], case["total_mb"], case["seed"])
+    size_mb = sum(len(doc.encode("utf-8")) for doc in docs) / (1024 * 1024)
+    chunker = create_chunker(case["strategy"], case["chunk_size"], case["chunk_overlap"], case["parent_chunk_size"])
+
+    rss_before = max_rss_mb()
+    best = float("inf")
+    chunks = 0
+    for _ in range(case["repeat"]):
+        start = time.perf_counter()
+        chunks = len(chunk_all(chunker, docs))
+        best = min(best, time.perf_counter() - start)
+    rss_after = max_rss_mb()
+
+    tracemalloc.start()
+    result = chunk_all(chunker, docs)
+    _, alloc_peak = tracemalloc.get_traced_memory()
+    alloc_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+    del result
+
+    return {
+        "strategy": case["strategy"],
+        "profile": case["profile"],
+        "size": case["size"],
+        "docs": len(docs),
+        "mb": round(size_mb, 3),
+        "chunks": chunks,
+        "docs_per_s": round(len(docs) / best, 2),
+        "mb_per_s": round(size_mb / best, 3),
+        "peak_rss_mb": round(rss_after, 2),
+        "rss_growth_mb": round(rss_after - rss_before, 2),
+        "alloc_peak_mb": round(alloc_peak / (1024 * 1024), 3),
+        "alloc_blocks": alloc_blocks,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=None, help="Write the JSON results to this file instead of stdout")
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=STRATEGIES)
+    parser.add_argument("--profiles", nargs="+", choices=sorted(PROFILES), default=sorted(PROFILES))
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--total-mb", type=float, default=4, help="Corpus size of every case")
+    parser.add_argument("--chunk-size", type=int, default=128)
+    parser.add_argument("--chunk-overlap", type=int, default=10)
+    parser.add_argument("--parent-chunk-size", type=int, default=512)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    cases = [{"strategy": strategy, "profile": profile, "size": size, "total_mb": args.total_mb,
+              "chunk_size": args.chunk_size, "chunk_overlap": args.chunk_overlap,
+              "parent_chunk_size": args.parent_chunk_size, "repeat": args.repeat, "seed": args.seed}
+             for strategy in args.strategies for profile in args.profiles for size in args.sizes]
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for case in cases:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result = executor.submit(run_case, case).result()
+        results.append(result)
+        print(f"{result['strategy']:16s} {result['profile']:10s} {result['size']:6s} "
+              f"{result['docs_per_s']:10.1f} docs/s {result['mb_per_s']:7.2f} MB/s "
+              f"rss +{result['rss_growth_mb']:.1f} MB  alloc peak {result['alloc_peak_mb']:.1f} MB",
+              file=sys.stderr)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "config": {key: value for key, value in vars(args).items() if key != "output"},
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
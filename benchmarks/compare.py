@@ -0,0 +1,85 @@
+"""
+Compares two JSON benchmark reports, e.g. from benchmarks.chunking_suite run on two
+commits, and exits with status 1 if any case regressed by more than the threshold.
+
+Throughput metrics regress when they drop, memory metrics when they grow. Memory
+metrics below --min-mb in both reports are ignored, since they are dominated by noise.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 0.1]
+        [--metrics mb_per_s docs_per_s alloc_peak_mb rss_growth_mb]
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List, Tuple
+
+HIGHER_IS_BETTER = {"mb_per_s", "docs_per_s"}
+LOWER_IS_BETTER = {"peak_rss_mb", "rss_growth_mb", "alloc_peak_mb", "alloc_blocks"}
+CASE_KEYS = ("strategy", "profile", "size")
+
+
+def load_results(path: str) -> Dict[Tuple, Dict]:
+    with open(path, encoding="utf-8") as file:
+        report = json.load(file)
+    return {tuple(result.get(key) for key in CASE_KEYS): result for result in report["results"]}
+
+
+def compare(baseline: Dict[Tuple, Dict], candidate: Dict[Tuple, Dict], metrics: List[str],
+            threshold: float, min_mb: float) -> List[Dict]:
+    """
+    Compares the metrics of the cases present in both reports.
+    :param baseline: The baseline results keyed by case.
+    :param candidate: The candidate results keyed by case.
+    :param metrics: The metrics to compare.
+    :param threshold: The allowed relative change in the worse direction, e.g. 0.1 for 10%.
+    :param min_mb: Memory metrics in MB below this value in both reports are ignored.
+    :return: One row per case and metric, with the relative change and whether it regressed.
+    """
+    rows = []
+    for case in sorted(baseline.keys() & candidate.keys(), key=str):
+        for metric in metrics:
+            before = baseline[case].get(metric)
+            after = candidate[case].get(metric)
+            if before is None or after is None or before == 0:
+                continue
+            change = (after - before) / before
+            if metric in HIGHER_IS_BETTER:
+                regressed = change < -threshold
+            else:
+                small = metric.endswith("_mb") and max(before, after) < min_mb
+                regressed = change > threshold and not small
+            rows.append({"case": case, "metric": metric, "before": before, "after": after,
+                         "change": change, "regressed": regressed})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Allowed relative change in the worse direction (default 0.1)")
+    parser.add_argument("--metrics", nargs="+", choices=sorted(HIGHER_IS_BETTER | LOWER_IS_BETTER),
+                        default=["mb_per_s", "docs_per_s", "alloc_peak_mb", "rss_growth_mb"])
+    parser.add_argument("--min-mb", type=float, default=1.0)
+    args = parser.parse_args()
+
+    baseline = load_results(args.baseline)
+    candidate = load_results(args.candidate)
+    missing = baseline.keys() - candidate.keys()
+    for case in sorted(missing, key=str):
+        print(f"missing in candidate: {'/'.join(map(str, case))}")
+
+    rows = compare(baseline, candidate, args.metrics, args.threshold, args.min_mb)
+    for row in rows:
+        flag = "REGRESSION" if row["regressed"] else ""
+        print(f"{'/'.join(map(str, row['case'])):40s} {row['metric']:14s} "
+              f"{row['before']:12.2f} -> {row['after']:12.2f} {row['change']:+7.1%} {flag}")
+    regressions = sum(row["regressed"] for row in rows)
+    print(f"{regressions} regressions in {len(rows)} comparisons (threshold {args.threshold:.0%})")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Deterministic synthetic corpora for the benchmarks.
+
+Every corpus is generated from a seeded random.Random, so the same profile, size
+and seed produce the same text on every machine and Python version.
+"""
+import random
+from typing import Dict, List, Sequence
+
+WORDS = ["lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit",
+         "retrieval", "augmented", "generation", "überprüfung", "naïve", "数据"]
+
+PROFILES: Dict[str, Dict[str, Sequence[str]]] = {
+    # Plain ASCII prose with single spaces and sentence ends
+    "ascii": {
+        "words": ["the", "model", "retrieval", "augmented", "generation", "vector", "index", "query",
+                  "document", "chunk", "embedding", "latency", "throughput", "context", "answer"],
+        "separators": [" "] * 12 + [". ", ".\n"],
+    },
+    # Mixed whitespace runs: tabs, CRLF line ends, blank lines and indentation
+    "whitespace": {
+        "words": WORDS[:11],
+        "separators": [" ", " ", "  ", "\t", "\r\n", "\n\n", "    ", " \t ", "\n\t\t", "\f", "\v"],
+    },
+    # Multilingual text with accented, CJK and emoji words and non-separator whitespace
+    "unicode": {
+        "words": ["überprüfung", "naïve", "façade", "数据", "检索增强生成", "東京", "Привет", "μετρική",
+                  "مرحبا", "🚀", "emoji🙂", "crème", "lorem", "ipsum"],
+        "separators": [" ", " ", " ", "\n", " ", "　", "   ", " "],
+    },
+}
+
+# Document sizes in KB
+SIZES = {"small": 2, "medium": 64, "large": 4096}
+
+
+def generate_text(size_mb: float, seed: int = 42, profile: str = None) -> str:
+    """
+    Generates a text of about size_mb megabytes of characters.
+    :param size_mb: The size of the text in megabytes of characters.
+    :param seed: The random seed.
+    :param profile: The corpus profile, see PROFILES. Defaults to a mix of ASCII and
+        non-ASCII words with mixed whitespace.
+    :return: The generated text.
+    """
+    rng = random.Random(seed)
+    if profile is None:
+        words = WORDS
+        separators = [" ", " ", " ", " ", "  ", "\n", "\t", "\r\n", "\n\n"]
+    elif profile in PROFILES:
+        words = PROFILES[profile]["words"]
+        separators = PROFILES[profile]["separators"]
+    else:
+        raise ValueError(f"Unsupported corpus profile: {profile}")
+    target = int(size_mb * 1024 * 1024)
+    parts = []
+    length = 0
+    while length < target:
+        part = rng.choice(words) + rng.choice(separators)
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)
+
+
+def generate_corpus(profile: str, doc_kb: float, total_mb: float, seed: int = 0) -> List[str]:
+    """
+    Generates a list of documents of doc_kb kilobytes each, about total_mb megabytes
+    in total and at least one document.
+    :param profile: The corpus profile, see PROFILES.
+    :param doc_kb: The size of a document in kilobytes of characters.
+    :param total_mb: The total size of the corpus in megabytes of characters.
+    :param seed: The random seed of the first document, the others use the next seeds.
+    :return: The generated documents.
+    """
+    docs = max(1, round(total_mb * 1024 / doc_kb))
+    return [generate_text(doc_kb / 1024, seed + i, profile) for i in range(docs)]
@@ -0,0 +1,55 @@
+"""
+Measures the memory held by an EmbeddingList of Python float lists and by an
+ArrayEmbeddingList for the same vectors, and extrapolates it to one million vectors.
+
+Usage:
+    python -m benchmarks.embedding_memory_benchmark [--vectors 20000] [--dimension 1024]
+"""
+import argparse
+import gc
+import tracemalloc
+
+import numpy as np
+
+from embedding.embedding import ArrayEmbeddingList, EmbeddingList, EmbeddingMetadata, Embeddings
+
+
+def build(list_class, vectors: np.ndarray, as_lists: bool):
+    embedding_list = list_class()
+    for i, vector in enumerate(vectors):
+        embedding = Embeddings(embeddings=vector.tolist() if as_lists else vector,
+                               metadata=EmbeddingMetadata(8, 20), text=f"chunk {i}")
+        embedding.id = str(i)
+        embedding_list.append(embedding)
+    return embedding_list
+
+
+def measure(list_class, vectors: np.ndarray, as_lists: bool) -> int:
+    gc.collect()
+    tracemalloc.start()
+    embedding_list = build(list_class, vectors, as_lists)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del embedding_list
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dimension", type=int, default=1024)
+    args = parser.parse_args()
+
+    vectors = np.random.default_rng(0).standard_normal((args.vectors, args.dimension)).astype(np.float32)
+    scale = 1_000_000 / args.vectors
+    raw = args.dimension * 4
+    print(f"{args.vectors} vectors of dimension {args.dimension}, float32 payload {raw} bytes per vector")
+    for name, list_class, as_lists in (("EmbeddingList of lists", EmbeddingList, True),
+                                       ("ArrayEmbeddingList", ArrayEmbeddingList, False)):
+        held = measure(list_class, vectors, as_lists)
+        print(f"{name:24s} {held / args.vectors:10.0f} bytes/vector  "
+              f"{held * scale / 1024 ** 3:7.2f} GB per million vectors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+A local stand-in for the Bedrock runtime InvokeModel API, for tests and benchmarks
+of the embedders without AWS access.
+
+Point a boto3 bedrock-runtime client at FakeBedrockEndpoint.url. Every request waits
+latency_s seconds and returns deterministic vectors: {"embedding": [...]} for Titan
+style payloads ({"inputText": ...}) and {"embeddings": [[...], ...]} for Cohere style
+payloads ({"texts": [...]}), with the token count and latency headers Bedrock sends.
+"""
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+
+def fake_vector(text: str, dimensions: int = 8) -> List[float]:
+    seed = zlib.crc32(text.encode("utf-8"))
+    return [((seed >> i) & 0xFF) / 255 for i in range(dimensions)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        endpoint = self.server.endpoint
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        with endpoint.lock:
+            endpoint.requests += 1
+            endpoint.in_flight += 1
+            endpoint.max_in_flight = max(endpoint.max_in_flight, endpoint.in_flight)
+        try:
+            time.sleep(endpoint.latency_s)
+            if "texts" in payload:
+                texts = payload["texts"]
+                body = {"embeddings": [fake_vector(text) for text in texts]}
+            else:
+                texts = [payload.get("inputText", "")]
+                body = {"embedding": fake_vector(texts[0])}
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("x-amzn-bedrock-input-token-count", str(sum(len(text) // 4 for text in texts)))
+            self.send_header("x-amzn-bedrock-invocation-latency", str(int(endpoint.latency_s * 1000)))
+            self.end_headers()
+            self.wfile.write(data)
+        finally:
+            with endpoint.lock:
+                endpoint.in_flight -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeBedrockEndpoint:
+    """
+    Serves the fake InvokeModel API on a local port while used as a context manager.
+    :param latency_s: The time each request takes, in seconds.
+    """
+    def __init__(self, latency_s: float = 0.05):
+        self.latency_s = latency_s
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FakeBedrockEndpoint":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.request_queue_size = 1024
+        self._server.endpoint = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,74 @@
+"""
+Measures the cold-start import time of getting an embedding model from the registry,
+in fresh interpreters, and checks that the SDKs of unused providers are not imported.
+
+Each scenario runs in a new interpreter with -X importtime, and the best of --repeat
+runs is reported. The script exits with status 1 if a scenario imports the SageMaker
+or Ollama SDK, or takes longer than --budget-ms.
+
+Usage:
+    python -m benchmarks.import_time_benchmark [--repeat 5] [--budget-ms 1500]
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+# Modules that none of the scenarios may import
+FORBIDDEN = ("sagemaker", "ollama")
+
+SCENARIOS = {
+    "registry": "",
+    "titan v2": "embedding_registry.get_model('amazon.titan-embed-text-v2:0')",
+    "cohere": "embedding_registry.get_model('cohere.embed-english-v3')",
+    "local": "embedding_registry.get_model('local-hash-ngram')",
+}
+
+
+def run(statement: str):
+    """
+    Returns the import time in milliseconds and the forbidden modules imported by a fresh
+    interpreter that gets the model.
+    """
+    code = "\n".join([
+        "import sys, json",
+        "from embedding.embedding_registry import embedding_registry",
+        statement,
+        f"print(json.dumps([name for name in {FORBIDDEN!r} if name in sys.modules]))",
+    ])
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                             capture_output=True, text=True, check=True)
+    total_us = 0
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Only top-level imports, whose cumulative times include their dependencies
+        if not name[1:].startswith(" "):
+            total_us += int(cumulative)
+    return total_us / 1000, json.loads(process.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    args = parser.parse_args()
+
+    failed = False
+    for name, statement in SCENARIOS.items():
+        results = [run(statement) for _ in range(args.repeat)]
+        best = min(milliseconds for milliseconds, _ in results)
+        forbidden = results[0][1]
+        status = "ok"
+        if forbidden:
+            status = f"imports {', '.join(forbidden)}"
+        elif best > args.budget_ms:
+            status = f"over the {args.budget_ms:.0f} ms budget"
+        failed = failed or status != "ok"
+        print(f"{name:10s} {best:8.1f} ms  {status}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
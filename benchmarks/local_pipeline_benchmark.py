@@ -0,0 +1,43 @@
+"""
+Measures the end-to-end throughput of chunking a synthetic corpus and embedding the
+chunks with the offline LocalHashEmbedding, as a baseline that needs no model service.
+
+Usage:
+    python -m benchmarks.local_pipeline_benchmark [--size-mb 8] [--chunk-size 256] [--dimensions 256]
+"""
+import argparse
+import time
+
+from benchmarks.corpus import generate_text
+from chunking.fixedsize_chunking import FixedSizeChunker
+from embedding.local_embedding import LocalHashEmbedding
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=8)
+    parser.add_argument("--chunk-size", type=int, default=256, help="In tokens")
+    parser.add_argument("--chunk-overlap", type=int, default=10, help="In percent of the chunk size")
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--as-array", action="store_true", help="Collect the vectors in an ArrayEmbeddingList")
+    args = parser.parse_args()
+
+    text = generate_text(args.size_mb, seed=0)
+    chunker = FixedSizeChunker(args.chunk_size, args.chunk_overlap)
+    embedder = LocalHashEmbedding(dimensions=args.dimensions)
+
+    start = time.perf_counter()
+    chunks = chunker.chunk(text)
+    chunked = time.perf_counter()
+    embedding_list = embedder.embed_list(chunks, as_array=args.as_array)
+    embedded = time.perf_counter()
+
+    print(f"{args.size_mb} MB, {len(chunks)} chunks, dimension {args.dimensions}")
+    print(f"chunking   {args.size_mb / (chunked - start):8.2f} MB/s")
+    print(f"embedding  {args.size_mb / (embedded - chunked):8.2f} MB/s  {len(chunks) / (embedded - chunked):10.0f} chunks/s")
+    print(f"total      {args.size_mb / (embedded - start):8.2f} MB/s  "
+          f"{embedding_list.metadata.input_tokens / (embedded - start):10.0f} tokens/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Measures how chunk_list scales with the number of worker processes.
+
+Usage:
+    python -m benchmarks.parallel_chunking_benchmark [--docs 2000] [--doc-kb 64] [--workers 1 2 4 8]
+"""
+import argparse
+import os
+import time
+
+from benchmarks.corpus import generate_text
+from chunking.fixedsize_chunking import FixedSizeChunker
+from chunking.hierarical_chunking import HieraricalChunker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--doc-kb", type=float, default=64)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    docs = [generate_text(args.doc_kb / 1024, seed=i) for i in range(args.docs)]
+    size_mb = sum(len(doc) for doc in docs) / (1024 * 1024)
+    print(f"corpus: {args.docs} docs, {size_mb:.1f} MB, {os.cpu_count()} CPUs")
+
+    chunkers = {
+        "fixed": FixedSizeChunker(128, 10),
+        "hierarchical": HieraricalChunker(128, 10, 512),
+    }
+    for name, chunker in chunkers.items():
+        baseline = None
+        for workers in args.workers:
+            start = time.perf_counter()
+            chunks = chunker.chunk_list(docs, workers=workers, batch_size=args.batch_size)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{name:12s} workers={workers:<3d} {args.docs / elapsed:10.1f} docs/s "
+                  f"{size_mb / elapsed:8.1f} MB/s  speedup {baseline / elapsed:4.1f}x  ({len(chunks)} chunks)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compares nearest neighbour recall and brute-force search time of full vectors with
+vectors reduced by a PCA projection and by truncation, on synthetic unit vectors
+whose variance decays over randomly rotated directions, as in trained embedding models.
+
+Usage:
+    python -m benchmarks.projection_benchmark [--vectors 20000] [--dimension 1024] [--dimensions 256] [--k 10]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from embedding.projected_embedding import Projection
+
+
+def generate_vectors(count: int, dimension: int, rotation: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    scales = 1 / np.sqrt(np.arange(1, dimension + 1))
+    vectors = (rng.standard_normal((count, dimension)) * scales) @ rotation
+    vectors = vectors.astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def search(documents: np.ndarray, queries: np.ndarray, k: int):
+    start = time.perf_counter()
+    found = np.argpartition(-(queries @ documents.T), k, axis=1)[:, :k]
+    return found, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dimension", type=int, default=1024)
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--sample", type=int, default=5000, help="Vectors the PCA is fitted on")
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    rotation, _ = np.linalg.qr(rng.standard_normal((args.dimension, args.dimension)))
+    documents = generate_vectors(args.vectors, args.dimension, rotation, rng)
+    queries = generate_vectors(args.queries, args.dimension, rotation, rng)
+    expected, full_time = search(documents, queries, args.k)
+
+    start = time.perf_counter()
+    pca = Projection.fit_pca(documents[:args.sample], args.dimensions)
+    fit_time = time.perf_counter() - start
+    print(f"{args.vectors} vectors of dimension {args.dimension}, {args.queries} queries, recall@{args.k}; "
+          f"PCA fitted on {args.sample} vectors in {fit_time:.2f} s, keeping "
+          f"{pca.explained_variance_ratio.sum():.1%} of the variance")
+    print(f"{'vectors':12s} {'recall':>7s} {'MB':>8s} {'search ms':>10s}")
+    print(f"{'full':12s} {1.0:7.3f} {documents.nbytes / 2 ** 20:8.1f} {full_time * 1000:10.1f}")
+    for name, projection in (("pca", pca), ("truncation", Projection.truncation(args.dimension, args.dimensions))):
+        projected = projection.apply(documents)
+        found, elapsed = search(projected, projection.apply(queries), args.k)
+        recall = np.mean([len(set(f) & set(e)) / args.k for f, e in zip(found, expected)])
+        print(f"{name:12s} {recall:7.3f} {projected.nbytes / 2 ** 20:8.1f} {elapsed * 1000:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
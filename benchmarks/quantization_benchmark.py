@@ -0,0 +1,84 @@
+"""
+Compares the recall@k of nearest neighbour search on quantized vectors with the bytes
+they take in the index and in bulk request JSON, for clustered synthetic unit vectors.
+
+Codes are compared the way the index compares them: float16 and int8 codes by inner
+product, binary codes by Hamming distance. The exact neighbours come from the float32
+vectors.
+
+Usage:
+    python -m benchmarks.quantization_benchmark [--vectors 20000] [--queries 200] [--dimension 1024] [--k 10]
+"""
+import argparse
+import json
+
+import numpy as np
+
+from embedding.quantization import BinaryQuantizer, Float16Quantizer, Int8Quantizer
+
+
+def generate_vectors(count: int, dimension: int, rng: np.random.Generator, clusters: int = 64) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dimension))
+    vectors = centers[rng.integers(0, clusters, count)] + 0.8 * rng.standard_normal((count, dimension))
+    vectors = vectors.astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    return np.argpartition(-scores, k, axis=1)[:, :k]
+
+
+def recall(found: np.ndarray, expected: np.ndarray) -> float:
+    return float(np.mean([len(set(f) & set(e)) / len(e) for f, e in zip(found, expected)]))
+
+
+def scores(quantizer, documents: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    if quantizer is None:
+        return queries @ documents.T
+    document_codes = quantizer.quantize(documents)
+    query_codes = quantizer.quantize(queries)
+    if isinstance(quantizer, BinaryQuantizer):
+        bits = np.unpackbits(document_codes.view(np.uint8), axis=1).astype(np.int32)
+        query_bits = np.unpackbits(query_codes.view(np.uint8), axis=1).astype(np.int32)
+        # Negated Hamming distance, so that higher scores are closer
+        return -(query_bits @ (1 - bits).T + (1 - query_bits) @ bits.T)
+    return query_codes.astype(np.float32) @ document_codes.astype(np.float32).T
+
+
+def json_bytes(quantizer, documents: np.ndarray) -> float:
+    sample = documents[:200]
+    encoded = sample.tolist() if quantizer is None else quantizer.encode(sample)
+    return sum(len(json.dumps(vector)) for vector in encoded) / len(sample)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dimension", type=int, default=1024)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    documents = generate_vectors(args.vectors, args.dimension, rng)
+    queries = generate_vectors(args.queries, args.dimension, rng)
+    expected = top_k(queries @ documents.T, args.k)
+
+    quantizers = [
+        ("float32", None),
+        ("float16", Float16Quantizer()),
+        ("int8 global", Int8Quantizer("global").fit(documents)),
+        ("int8 per-dimension", Int8Quantizer("per_dimension").fit(documents)),
+        ("int8 global p99.9", Int8Quantizer("global", percentile=99.9).fit(documents)),
+        ("binary", BinaryQuantizer()),
+    ]
+    print(f"{args.vectors} vectors, {args.queries} queries, dimension {args.dimension}, recall@{args.k}")
+    print(f"{'quantizer':20s} {'recall':>7s} {'index B/vector':>15s} {'JSON B/vector':>14s}")
+    for name, quantizer in quantizers:
+        found = top_k(scores(quantizer, documents, queries), args.k)
+        index_bytes = 4 * args.dimension if quantizer is None else quantizer.bytes_per_vector(args.dimension)
+        print(f"{name:20s} {recall(found, expected):7.3f} {index_bytes:15d} {json_bytes(quantizer, documents):14.0f}")
+
+
+if __name__ == "__main__":
+    main()
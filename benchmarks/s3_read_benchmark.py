@@ -0,0 +1,68 @@
+"""
+Measures reading an S3 directory with S3StorageProvider at several download
+concurrencies, against a moto bucket whose GetObject calls are delayed to model the
+per-object latency of S3.
+
+Usage:
+    python -m benchmarks.s3_read_benchmark [--objects 2000] [--size-kb 4] [--latency-ms 20] [--concurrency 1 8 32]
+"""
+import argparse
+import logging
+import time
+
+import boto3
+from moto import mock_aws
+
+from storage.s3_storage import S3StorageProvider
+
+
+class DelayedClient:
+    """
+    Delegates to an S3 client, sleeping before each GetObject call.
+    """
+
+    def __init__(self, client, latency_s: float):
+        self._client = client
+        self._latency_s = latency_s
+
+    def get_object(self, **kwargs):
+        time.sleep(self._latency_s)
+        return self._client.get_object(**kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objects", type=int, default=2000)
+    parser.add_argument("--size-kb", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+    logging.getLogger("storage.s3_storage").setLevel(logging.WARNING)
+
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="benchmark")
+        body = b"x" * (args.size_kb * 1024)
+        for i in range(args.objects):
+            client.put_object(Bucket="benchmark", Key=f"corpus/{i:06d}.txt", Body=body)
+        delayed = DelayedClient(client, args.latency_ms / 1000)
+
+        print(f"{args.objects} objects of {args.size_kb} KB, {args.latency_ms:g} ms per GetObject")
+        print(f"{'concurrency':>11s} {'order':>9s} {'s':>7s} {'objects/s':>10s}")
+        for concurrency in args.concurrency:
+            for ordered in (True, False):
+                provider = S3StorageProvider("benchmark", s3_client=delayed, max_concurrency=concurrency,
+                                             ordered=ordered)
+                start = time.perf_counter()
+                count = sum(1 for _ in provider.read("corpus"))
+                elapsed = time.perf_counter() - start
+                assert count == args.objects
+                print(f"{concurrency:11d} {'key' if ordered else 'completed':>9s} {elapsed:7.2f} "
+                      f"{count / elapsed:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Measures tokenizer throughput in tokens/s, with and without the token count cache,
+and the TokenChunker throughput on top of it.
+
+Without --vocab a WordPiece vocabulary is derived from the synthetic corpus, which
+is enough to compare runs but not representative of a real model vocabulary.
+
+Usage:
+    python -m benchmarks.tokenizer_benchmark [--size-mb 4] [--vocab path/to/vocab.txt]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.corpus import generate_text
+from chunking.token_chunking import TokenChunker
+from tokenizer.wordpiece_tokenizer import WordPieceTokenizer
+
+
+def write_synthetic_vocab(text: str, directory: str) -> str:
+    words = sorted(set(text.lower().split()))
+    characters = sorted(set("".join(words)))
+    tokens = ["[UNK]"] + characters + ["##" + c for c in characters] + \
+        [word[:3] for word in words] + ["##" + word[3:] for word in words if len(word) > 3]
+    path = os.path.join(directory, "vocab.txt")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("\n".join(dict.fromkeys(tokens)))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=4)
+    parser.add_argument("--vocab", default=None)
+    args = parser.parse_args()
+
+    text = generate_text(args.size_mb)
+    size_mb = len(text.encode("utf-8")) / (1024 * 1024)
+    with tempfile.TemporaryDirectory() as directory:
+        vocab_path = args.vocab or write_synthetic_vocab(text, directory)
+        tokenizer = WordPieceTokenizer(vocab_path)
+        uncached = WordPieceTokenizer(vocab_path, cache_size=0)
+
+    lines = text.splitlines()
+    for name, instance in (("uncached", uncached), ("cached", tokenizer)):
+        start = time.perf_counter()
+        tokens = sum(instance.count_tokens(line) for line in lines)
+        elapsed = time.perf_counter() - start
+        print(f"{name:9s} {tokens / elapsed:12.0f} tokens/s  {size_mb / elapsed:6.2f} MB/s  ({tokens} tokens)")
+
+    chunker = TokenChunker(256, 10, tokenizer)
+    start = time.perf_counter()
+    chunks = chunker.chunk(text)
+    elapsed = time.perf_counter() - start
+    print(f"TokenChunker {size_mb / elapsed:6.2f} MB/s  ({len(chunks)} chunks), "
+          f"cache {tokenizer.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,99 @@
+import hashlib
 import uuid
 from abc import ABC, abstractmethod
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional
+
+
+def content_id(text: str, source_id: Optional[str] = None, start: Optional[int] = None,
+               end: Optional[int] = None) -> str:
+    """
+    Derives a deterministic chunk id from the chunk content.
+    Args:
+        text (str): The text of the chunk.
+        source_id (str): The id of the source document, if any.
+        start (int): The start offset of the chunk in the source, if any.
+        end (int): The end offset of the chunk in the source, if any.
+    Returns:
+        str: A UUID formatted BLAKE2b digest, stable across runs.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{source_id or ''}\x00{'' if start is None else start}\x00{'' if end is None else end}\x00"
+                  .encode('utf-8'))
+    digest.update(text.encode('utf-8'))
+    return str(uuid.UUID(bytes=digest.digest()))
 
 
 class Chunk:
     """
     A class to represent a chunk of text.
+    The text is either held directly or referenced as the source[start:end] range of
+    a shared source string, in which case it is materialised on every access.
     """
 
-    def __init__(self, data):
+    __slots__ = ('id', '_data', '_source', 'start', 'end', 'child_data', 'parent_id')
+
+    def __init__(self, data: Optional[str] = None, source: Optional[str] = None, start: int = 0,
+                 end: Optional[int] = None, chunk_id: Optional[str] = None):
         """
         Constructs a new Chunk object.
         Args:
             data (str): The data of the chunk.
+            source (str): The shared source string, used when data is not given.
+            start (int): The start offset of the chunk in source.
+            end (int): The end offset of the chunk in source. Defaults to the end of source.
+            chunk_id (str): The id of the chunk. Defaults to a random UUID.
         """
-        self.id = str(uuid.uuid4())
-        self.data = data
+        self.id = chunk_id or str(uuid.uuid4())
+        self._data = data
+        self._source = source if data is None else None
+        self.start = start
+        self.end = len(source) if end is None and source is not None else end
         self.child_data = None
+        self.parent_id = None
+
+    @property
+    def data(self) -> Optional[str]:
+        """
+        Returns the text of the chunk.
+        """
+        if self._source is not None:
+            return self._source[self.start:self.end]
+        return self._data
+
+    @data.setter
+    def data(self, data: str):
+        self._data = data
+        self._source = None
+
+    @property
+    def content_hash(self) -> str:
+        """
+        Returns a BLAKE2b digest of the chunk text, independent of its id and position.
+        """
+        return hashlib.blake2b(self.data.encode('utf-8'), digest_size=16).hexdigest()
 
     def add_child(self, child_data):
         """
-        Adds a child to the chunk.
+        Adds a child to the chunk. Child chunks record the id of their parent.
         Args:
             child_data (str): The data of the child.
         """
+        if isinstance(child_data, Chunk):
+            child_data.parent_id = self.id
         if not self.child_data:
             self.child_data = []
         self.child_data.append(child_data)
 
+    def __reduce__(self):
+        """
+        Pickles the chunk by its constructor arguments, which is cheaper to load than
+        the generic slots state when chunks are returned from worker processes.
+        """
+        slots = {name: getattr(self, name) for name in ('child_data', 'parent_id') if getattr(self, name) is not None}
+        state = (None, slots) if slots else None
+        return Chunk, (self._data, self._source, self.start, self.end, self.id), state
+
     def __str__(self):
         """
         Returns a string representation of the Chunk object.
@@ -35,44 +101,125 @@ class Chunk:
         return f"Parent Chunk: {self.data}, Chunk: {self.child_data}"
 
 
+_worker_chunker = None
+
+
+def _init_worker(chunker: 'BaseChunker'):
+    """
+    Stores the chunker in a process pool worker, so that it is sent once per worker.
+    """
+    global _worker_chunker
+    _worker_chunker = chunker
+
+
+def _chunk_batch(batch: List[tuple]) -> List[Chunk]:
+    """
+    Chunks a batch of (text, source id) pairs in a process pool worker.
+    """
+    result = []
+    for d, source_id in batch:
+        result.extend(_worker_chunker.chunk(d, source_id))
+    return result
+
+
 class BaseChunker(ABC):
     """
     Abstract base class for chunking text.
     """
 
-    def __init__(self):
+    def __init__(self, deterministic_ids: bool = False):
         """
         Constructs a new BaseChunker object.
+        Args:
+            deterministic_ids (bool): Derive chunk ids from the source id, offsets and
+                text of each chunk instead of generating random ones.
         """
         super().__init__()
+        self.deterministic_ids = deterministic_ids
         self.space = ' '
         self.separators = [' ', '\t', '\n', '\r', '\f', '\v']
         self.tokens_per_charecter = 4
+        self._clean_table = str.maketrans({sep: self.space for sep in self.separators})
 
     @abstractmethod
-    def chunk(self, data: str) -> List[Chunk]:
+    def chunk(self, data: str, source_id: Optional[str] = None) -> List[Chunk]:
         """
         Chunks the input text.
         Args:
             data (str): The input text to chunk.
+            source_id (str): The id of the input document, used for deterministic chunk ids.
         Returns:
             List[Chunk]: A list of Chunk objects.  
         """
         pass
 
-    def chunk_list(self, data: List[str]) -> List[Chunk]:
+    def chunk_list(self, data: List[str], source_ids: Optional[List[str]] = None, workers: int = 1,
+                   batch_size: int = 8) -> List[Chunk]:
         """
         Chunks a list of input texts.
+        With more than one worker the texts are chunked in a process pool, in batches
+        of batch_size texts; the chunks are returned in input order either way.
         Args:
             data (List[str]): The list of input texts to chunk.
+            source_ids (List[str]): The ids of the input documents, used for deterministic chunk ids.
+            workers (int): The number of worker processes.
+            batch_size (int): The number of texts sent to a worker at a time.
         Returns:
             List[Chunk]: A list of Chunk objects.  
         """
+        if source_ids is None:
+            source_ids = [None] * len(data)
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
         result = []
-        for d in data:
-            result.extend(self.chunk(d))
+        if workers <= 1 or len(data) <= batch_size:
+            for d, source_id in zip(data, source_ids):
+                result.extend(self.chunk(d, source_id))
+            return result
+
+        items = list(zip(data, source_ids))
+        batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,)) as executor:
+            for chunks in executor.map(_chunk_batch, batches):
+                result.extend(chunks)
         return result
 
+    def chunk_stream(self, data: Iterable[str], source_id: Optional[str] = None) -> Iterator[Chunk]:
+        """
+        Chunks a text that arrives as a sequence of segments, e.g. the pieces
+        of a large document read from a storage provider. Segments are
+        concatenated as-is, so a word may span two segments.
+        The default implementation buffers the whole text; chunkers that can
+        emit chunks incrementally override this method.
+        Args:
+            data (Iterable[str]): The input text segments.
+            source_id (str): The id of the input document, used for deterministic chunk ids.
+        Returns:
+            Iterator[Chunk]: An iterator over Chunk objects.
+        """
+        text = ''.join(data)
+        if not text:
+            raise ValueError("Input text cannot be empty or None")
+        yield from self.chunk(text, source_id)
+
+    def _new_chunk(self, source: str, start: int, end: int, source_id: Optional[str] = None,
+                   offset: int = 0) -> Chunk:
+        """
+        Creates a chunk that references the source[start:end] range.
+        Args:
+            source (str): The shared source string.
+            start (int): The start offset of the chunk in source.
+            end (int): The end offset of the chunk in source.
+            source_id (str): The id of the input document.
+            offset (int): The offset of source within the normalized input document.
+        Returns:
+            Chunk: The new chunk.
+        """
+        chunk_id = None
+        if self.deterministic_ids:
+            chunk_id = content_id(source[start:end], source_id, offset + start, offset + end)
+        return Chunk(source=source, start=start, end=end, chunk_id=chunk_id)
+
     def _clean_data(self, data: str) -> str:
         """
         Cleans the input text.
@@ -81,6 +228,21 @@ class BaseChunker(ABC):
         Returns:
             str: The cleaned text.
         """
-        for sep in self.separators:
-            data = data.replace(sep, self.space)
-        return data
+        return data.translate(self._clean_table)
+
+    def _check_stream(self, data: Iterable[str]) -> Iterator[str]:
+        """
+        Passes the input text segments through, raising an error once the input
+        is exhausted if all segments were empty.
+        Args:
+            data (Iterable[str]): The input text segments.
+        Returns:
+            Iterator[str]: An iterator over the input text segments.
+        """
+        received = False
+        for segment in data:
+            if segment:
+                received = True
+                yield segment
+        if not received:
+            raise ValueError("Input text cannot be empty or None")
@@ -1,15 +1,33 @@
+from chunking.content_defined_chunking import ContentDefinedChunker
 from chunking.hierarical_chunking import HieraricalChunker
+from chunking.semantic_chunking import SemanticChunker
 from chunking.fixedsize_chunking import FixedSizeChunker
+from chunking.token_chunking import TokenChunker
+from embedding.embedding import BaseEmbedding
+from tokenizer.tokenizer import BaseTokenizer
 
 class ChunkingFactory:
     """
     Factory to create chunking strategies based on configuration.
     """
     @staticmethod
-    def create_chunker(chunking_strategy: str, chunk_size: int, chunk_overlap: int, parent_chunk_size: int = None):
+    def create_chunker(chunking_strategy: str, chunk_size: int, chunk_overlap: int, parent_chunk_size: int = None,
+                       deterministic_ids: bool = False, tokenizer: BaseTokenizer = None,
+                       embedder: BaseEmbedding = None):
         if chunking_strategy.lower() == "hierarchical":
-            return HieraricalChunker(chunk_size, chunk_overlap, parent_chunk_size)
+            return HieraricalChunker(chunk_size, chunk_overlap, parent_chunk_size, deterministic_ids)
         elif chunking_strategy.lower() == "fixed":
-            return FixedSizeChunker(chunk_size, chunk_overlap)
+            return FixedSizeChunker(chunk_size, chunk_overlap, deterministic_ids)
+        elif chunking_strategy.lower() == "token":
+            if tokenizer is None:
+                raise ValueError("A tokenizer must be provided for token chunking")
+            return TokenChunker(chunk_size, chunk_overlap, tokenizer, deterministic_ids)
+        elif chunking_strategy.lower() == "content_defined":
+            # Content-defined chunks do not overlap, chunk_size is the average size
+            return ContentDefinedChunker(chunk_size, tokenizer=tokenizer, deterministic_ids=deterministic_ids)
+        elif chunking_strategy.lower() == "semantic":
+            if embedder is None:
+                raise ValueError("An embedder must be provided for semantic chunking")
+            return SemanticChunker(embedder, chunk_size, deterministic_ids=deterministic_ids)
         else:
             raise ValueError(f"Unsupported chunking type: {chunking_strategy}")
@@ -0,0 +1,102 @@
+import zlib
+from typing import Iterable, List, Optional, Set
+
+from tokenizer.tokenizer import BaseTokenizer
+from .chunking import BaseChunker, Chunk
+from .text_splitter import FixedSizeTextSplitter
+
+_MASK_64 = (1 << 64) - 1
+_GOLDEN_RATIO_64 = 0x9E3779B97F4A7C15
+
+
+class ContentDefinedChunker(BaseChunker):
+    """
+    This class is responsible for chunking the text at boundaries chosen by its content.
+
+    A Gear style rolling hash runs over the words of the text, so its value only depends
+    on the last 64 words. A chunk ends after a word when the chunk holds at least
+    min_chunk_size tokens and the hash falls below a threshold proportional to the word's
+    token count, which gives chunks of chunk_size tokens on average. A chunk is cut
+    before it would exceed max_chunk_size tokens. Editing a document therefore only
+    changes the chunks around the edit, and unchanged chunks keep their content_hash.
+    :param chunk_size: The average number of tokens in a chunk.
+    :param min_chunk_size: The minimum number of tokens in a chunk. Defaults to chunk_size / 4.
+    :param max_chunk_size: The maximum number of tokens in a chunk. Defaults to 2 * chunk_size.
+    :param tokenizer: The tokenizer used to count tokens. Without one, sizes are measured in
+        characters at 4 characters per token, counting the space after each word.
+    :param deterministic_ids: Derive chunk ids from the chunk content instead of generating random ones.
+    """
+    def __init__(self, chunk_size: int, min_chunk_size: Optional[int] = None, max_chunk_size: Optional[int] = None,
+                 tokenizer: Optional[BaseTokenizer] = None, deterministic_ids: bool = False):
+        super().__init__(deterministic_ids)
+        self.chunk_size = chunk_size
+        self.min_chunk_size = chunk_size // 4 if min_chunk_size is None else min_chunk_size
+        self.max_chunk_size = 2 * chunk_size if max_chunk_size is None else max_chunk_size
+        if self.chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        if not 0 <= self.min_chunk_size < self.chunk_size <= self.max_chunk_size:
+            raise ValueError("chunk sizes must satisfy 0 <= min_chunk_size < chunk_size <= max_chunk_size")
+        self.tokenizer = tokenizer
+        # Only used to normalize whitespace, so the sizes do not matter
+        self._normalizer = FixedSizeTextSplitter(1, 0, self.separators, self.space)
+
+    """
+    Chunks the text at content-defined boundaries.
+    :param data: The input text.
+    :param source_id: The id of the input document, used for deterministic chunk ids.
+    :return: The list of chunks."""
+    def chunk(self, data: str, source_id: Optional[str] = None) -> List[Chunk]:
+        if not data:
+            raise ValueError("Input text cannot be empty or None")
+
+        data = self._normalizer.normalize(data)
+        if not data:
+            return []
+        if self.tokenizer is not None:
+            count_tokens = self.tokenizer.count_tokens
+            unit = 1
+        else:
+            count_tokens = self._count_characters
+            unit = self.tokens_per_charecter
+        min_size = unit * self.min_chunk_size
+        max_size = unit * self.max_chunk_size
+        # A boundary after a word of t tokens is taken with probability t / target
+        target = unit * (self.chunk_size - self.min_chunk_size)
+
+        chunks = []
+        start = 0
+        position = 0
+        size = 0
+        rolling = 0
+        for word in data.split(self.space):
+            tokens = count_tokens(word)
+            if size and size + tokens > max_size:
+                chunks.append(self._new_chunk(data, start, position - 1, source_id))
+                start = position
+                size = 0
+            size += tokens
+            position += len(word) + 1
+            word_hash = (zlib.crc32(word.encode('utf-8')) * _GOLDEN_RATIO_64) & _MASK_64
+            rolling = ((rolling << 1) + word_hash) & _MASK_64
+            if size >= min_size and (rolling >> 32) * target < tokens << 32:
+                chunks.append(self._new_chunk(data, start, position - 1, source_id))
+                start = position
+                size = 0
+        if start < len(data):
+            chunks.append(self._new_chunk(data, start, len(data), source_id))
+        return chunks
+
+    @staticmethod
+    def _count_characters(word: str) -> int:
+        return len(word) + 1
+
+    @staticmethod
+    def changed_chunks(chunks: Iterable[Chunk], known_hashes: Set[str]) -> List[Chunk]:
+        """
+        Returns the chunks whose content_hash is not in known_hashes, i.e. the chunks
+        that need to be embedded again after a document changed.
+        :param chunks: The chunks of the new version of the documents.
+        :param known_hashes: The content hashes of the chunks that are already embedded.
+        :return: The new or changed chunks.
+        """
+        return [chunk for chunk in chunks if chunk.content_hash not in known_hashes]
@@ -1,8 +1,7 @@
-from typing import List
-
-from langchain.text_splitter import CharacterTextSplitter
+from typing import Iterable, Iterator, List, Optional
 
 from .chunking import BaseChunker, Chunk
+from .text_splitter import FixedSizeTextSplitter
 
 
 class FixedSizeChunker(BaseChunker):
@@ -10,31 +9,40 @@ class FixedSizeChunker(BaseChunker):
     This class is responsible for chunking the text into fixed size chunks.
     :param chunk_size: The size of the chunk.
     :param chunk_overlap: The overlap between chunks.
+    :param deterministic_ids: Derive chunk ids from the chunk content instead of generating random ones.
     """
-    def __init__(self, chunk_size: int, chunk_overlap: int):
-        super().__init__()
+    def __init__(self, chunk_size: int, chunk_overlap: int, deterministic_ids: bool = False):
+        super().__init__(deterministic_ids)
         self.chunk_size = self.tokens_per_charecter * chunk_size
         self.chunk_overlap = int(chunk_overlap * self.chunk_size / 100)
         if self.chunk_size <= 0:
             raise ValueError("chunk_size must be positive")
         if self.chunk_overlap >= self.chunk_size:
             raise ValueError("chunk_overlap must be less than chunk_size")
+        self.text_splitter = FixedSizeTextSplitter(self.chunk_size, self.chunk_overlap,
+                                                   self.separators, self.space)
 
     """
     Chunks the text into fixed size chunks.
+    The chunks reference a single normalized copy of the input text.
     :param data: The input text.
+    :param source_id: The id of the input document, used for deterministic chunk ids.
     :return: The list of chunks."""
-    def chunk(self, data: str) -> List[Chunk]:
+    def chunk(self, data: str, source_id: Optional[str] = None) -> List[Chunk]:
         if not data:
             raise ValueError("Input text cannot be empty or None")
 
-        data = self._clean_data(data)
-        self.text_splitter = CharacterTextSplitter(
-            separator=self.space,
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap,
-            length_function=len,
-            is_separator_regex=False
-        )
-        chunks = self.text_splitter.split_text(data)
-        return [Chunk(chunk) for chunk in chunks]
+        data = self.text_splitter.normalize(data)
+        return [self._new_chunk(data, start, end, source_id)
+                for start, end in self.text_splitter.split_offsets(data)]
+
+    """
+    Chunks a text that arrives as a sequence of segments. Chunks are yielded as soon
+    as they are complete, so only the current chunk and its overlap are held in memory.
+    The chunks are identical to the ones produced by chunk on the concatenated text.
+    :param data: The input text segments.
+    :param source_id: The id of the input document, used for deterministic chunk ids.
+    :return: An iterator over the chunks."""
+    def chunk_stream(self, data: Iterable[str], source_id: Optional[str] = None) -> Iterator[Chunk]:
+        for start, end, chunk in self.text_splitter.split_stream(self._check_stream(data)):
+            yield self._new_chunk(chunk, 0, len(chunk), source_id, start)
@@ -1,47 +1,48 @@
-from typing import List
-
-from langchain.text_splitter import CharacterTextSplitter
+from typing import Iterable, Iterator, List, Optional
 
 from chunking.chunking import Chunk
 from chunking.fixedsize_chunking import FixedSizeChunker
+from chunking.text_splitter import FixedSizeTextSplitter
 
 
 class HieraricalChunker(FixedSizeChunker):
-    def __init__(self, chunk_size: int, chunk_overlap: int, parent_chunk_size: int):
-        super().__init__(chunk_size, chunk_overlap)
+    def __init__(self, chunk_size: int, chunk_overlap: int, parent_chunk_size: int,
+                 deterministic_ids: bool = False):
+        super().__init__(chunk_size, chunk_overlap, deterministic_ids)
         self.parent_chunk_size = self.tokens_per_charecter * parent_chunk_size
         if self.parent_chunk_size <= 0:
             raise ValueError("parent_chunk_size must be positive")
         if self.chunk_size > self.parent_chunk_size:
             raise ValueError("child_chunk_size must be less than parent chunking size")
+        self.parent_text_splitter = FixedSizeTextSplitter(
+            self.parent_chunk_size,
+            0,  # Can change this at a later point of time
+            self.separators,
+            self.space
+        )
+        self.child_text_splitter = self.text_splitter
 
-    def chunk(self, data: str) -> List[Chunk]:
+    def chunk(self, data: str, source_id: Optional[str] = None) -> List[Chunk]:
         if not data:
             raise ValueError("Input text cannot be empty or None")
 
-        data = self._clean_data(data)
-        self.parent_text_splitter = CharacterTextSplitter(
-            separator=self.space,
-            chunk_size=self.parent_chunk_size,
-            chunk_overlap=0,  # Can change this at a later point of time
-            length_function=len,
-            is_separator_regex=False
-        )
-        self.child_text_splitter = CharacterTextSplitter(
-            separator=self.space,
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap,
-            length_function=len,
-            is_separator_regex=False
-        )
-        parent_chunks = self.parent_text_splitter.split_text(data)
+        # Parents and children all reference the same normalized text
+        data = self.parent_text_splitter.normalize(data)
         overall_chunks = []
-        for parent_chunk in parent_chunks:
-            chunk_object = Chunk(parent_chunk)
-            child_chunks = self.child_text_splitter.split_text(parent_chunk)
-            for child_chunk in child_chunks:
-                child_chunk_object = Chunk(child_chunk)
-                chunk_object.add_child(child_chunk_object)
+        spans = self.parent_text_splitter.split_nested(data, self.child_text_splitter)
+        for (parent_start, parent_end), child_spans in spans:
+            chunk_object = self._new_chunk(data, parent_start, parent_end, source_id)
+            for child_start, child_end in child_spans:
+                chunk_object.add_child(self._new_chunk(data, child_start, child_end, source_id))
 
             overall_chunks.append(chunk_object)
         return overall_chunks
+
+    def chunk_stream(self, data: Iterable[str], source_id: Optional[str] = None) -> Iterator[Chunk]:
+        parent_chunks = self.parent_text_splitter.split_stream(self._check_stream(data))
+        for parent_start, _, parent_chunk in parent_chunks:
+            chunk_object = self._new_chunk(parent_chunk, 0, len(parent_chunk), source_id, parent_start)
+            for child_start, child_end in self.child_text_splitter.split_offsets(parent_chunk):
+                chunk_object.add_child(self._new_chunk(parent_chunk, child_start, child_end, source_id,
+                                                       parent_start))
+            yield chunk_object
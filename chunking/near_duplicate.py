@@ -0,0 +1,147 @@
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .chunking import Chunk
+
+# Odd 64-bit multiplier that combines the word hashes of a shingle
+_SHINGLE_PRIME = np.uint64(0x100000001B3)
+
+
+@dataclass
+class DeduplicationResult:
+    """
+    The outcome of a near-duplicate filter run.
+    :param chunks: The canonical chunks, in input order.
+    :param duplicates: The id of every dropped chunk, mapped to the id of its canonical chunk.
+    :param avoided_calls: The number of embedding calls the dropped chunks would have needed,
+        one per chunk or one per child of a hierarchical chunk.
+    """
+    chunks: List[Chunk] = field(default_factory=list)
+    duplicates: Dict[str, str] = field(default_factory=dict)
+    avoided_calls: int = 0
+
+
+class NearDuplicateFilter:
+    """
+    This class is responsible for dropping chunks that are near-duplicates of an earlier
+    chunk, e.g. the headers, footers and disclaimers repeated across documents, so that
+    they are neither embedded nor stored again.
+
+    Every chunk is reduced to a MinHash signature of its word shingles, whose agreement
+    with another signature estimates the Jaccard similarity of the two shingle sets.
+    The signatures are split into bands that are hashed into buckets (LSH), so a chunk
+    is only compared with the earlier canonical chunks that share a bucket with it. A
+    chunk is a duplicate of the first candidate whose estimated similarity reaches the
+    threshold. For hierarchical chunks the parents are compared, and a duplicate parent
+    is dropped with its children.
+    :param threshold: The Jaccard similarity at which two chunks are duplicates.
+    :param num_perm: The number of hash functions in a signature.
+    :param shingle_size: The number of words in a shingle.
+    :param lowercase: Compare the chunks case-insensitively.
+    :param seed: The seed of the hash functions.
+    """
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, shingle_size: int = 5,
+                 lowercase: bool = True, seed: int = 1):
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        if num_perm <= 0:
+            raise ValueError("num_perm must be positive")
+        if shingle_size <= 0:
+            raise ValueError("shingle_size must be positive")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.lowercase = lowercase
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hash functions h(x) = (a * x + b) >> 32 with odd a, computed mod 2^64
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self.bands, self.rows = self._optimal_bands(num_perm, threshold)
+
+    """
+    Drops the near-duplicate chunks.
+    :param chunks: The chunks to filter, e.g. the output of chunk_list.
+    :return: The canonical chunks, the duplicate to canonical id mapping and the number of avoided embedding calls.
+    """
+    def filter(self, chunks: List[Chunk]) -> DeduplicationResult:
+        result = DeduplicationResult()
+        buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        signatures: List[np.ndarray] = []
+        for chunk in chunks:
+            signature = self.signature(chunk.data)
+            keys = [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+            canonical = self._find_canonical(signature, keys, buckets, signatures)
+            if canonical is not None:
+                result.duplicates[chunk.id] = result.chunks[canonical].id
+                result.avoided_calls += len(chunk.child_data) if chunk.child_data else 1
+                continue
+            index = len(result.chunks)
+            result.chunks.append(chunk)
+            signatures.append(signature)
+            for band, key in enumerate(keys):
+                buckets[band].setdefault(key, []).append(index)
+        return result
+
+    """
+    Computes the MinHash signature of a text.
+    :param text: The text.
+    :return: The signature, num_perm unsigned 64-bit values.
+    """
+    def signature(self, text: str) -> np.ndarray:
+        shingles = self._shingles(text.lower() if self.lowercase else text)
+        hashes = (self._a[:, None] * shingles[None, :] + self._b[:, None]) >> np.uint64(32)
+        return hashes.min(axis=1)
+
+    """
+    Estimates the Jaccard similarity of two texts from their signatures.
+    :param first: The first text.
+    :param second: The second text.
+    :return: The estimated similarity between 0 and 1.
+    """
+    def similarity(self, first: str, second: str) -> float:
+        return float(np.mean(self.signature(first) == self.signature(second)))
+
+    def _find_canonical(self, signature: np.ndarray, keys: List[bytes], buckets: List[Dict[bytes, List[int]]],
+                        signatures: List[np.ndarray]):
+        checked = set()
+        for band, key in enumerate(keys):
+            for index in buckets[band].get(key, ()):
+                if index in checked:
+                    continue
+                checked.add(index)
+                if np.mean(signatures[index] == signature) >= self.threshold:
+                    return index
+        return None
+
+    def _shingles(self, text: str) -> np.ndarray:
+        words = np.array([zlib.crc32(word.encode('utf-8')) for word in text.split()] or [0], dtype=np.uint64)
+        size = min(self.shingle_size, len(words))
+        count = len(words) - size + 1
+        # Polynomial hash of each run of size consecutive word hashes, mod 2^64
+        shingles = words[:count].copy()
+        for offset in range(1, size):
+            shingles = shingles * _SHINGLE_PRIME + words[offset:offset + count]
+        return shingles
+
+    @staticmethod
+    def _optimal_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+        """
+        Chooses the number of bands and rows per band that minimise the sum of the
+        false positive and false negative probabilities around the threshold.
+        """
+        best = None
+        for bands in range(1, num_perm + 1):
+            if num_perm % bands:
+                continue
+            rows = num_perm // bands
+            below = np.linspace(0, threshold, 101)
+            above = np.linspace(threshold, 1, 101)
+            false_positive = np.trapz(1 - (1 - below ** rows) ** bands, below)
+            false_negative = np.trapz((1 - above ** rows) ** bands, above)
+            error = false_positive + false_negative
+            if best is None or error < best[0]:
+                best = (error, bands, rows)
+        return best[1], best[2]
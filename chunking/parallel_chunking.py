@@ -0,0 +1,32 @@
+import os
+from typing import Iterable, Iterator, List, Optional
+
+from chunking.chunking import BaseChunker, Chunk
+
+
+class ParallelChunker(BaseChunker):
+    """
+    Wraps a chunker so that chunk_list fans the documents out to a process pool.
+    Single documents are chunked in the calling process.
+    :param chunker: The chunker to run in the worker processes.
+    :param workers: The number of worker processes. Defaults to the number of CPUs.
+    :param batch_size: The number of documents sent to a worker at a time.
+    """
+    def __init__(self, chunker: BaseChunker, workers: Optional[int] = None, batch_size: int = 8):
+        super().__init__(chunker.deterministic_ids)
+        self.chunker = chunker
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        if self.batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+
+    def chunk(self, data: str, source_id: Optional[str] = None) -> List[Chunk]:
+        return self.chunker.chunk(data, source_id)
+
+    def chunk_stream(self, data: Iterable[str], source_id: Optional[str] = None) -> Iterator[Chunk]:
+        return self.chunker.chunk_stream(data, source_id)
+
+    def chunk_list(self, data: List[str], source_ids: Optional[List[str]] = None, workers: Optional[int] = None,
+                   batch_size: Optional[int] = None) -> List[Chunk]:
+        return self.chunker.chunk_list(data, source_ids, workers=workers or self.workers,
+                                       batch_size=batch_size or self.batch_size)
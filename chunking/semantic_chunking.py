@@ -0,0 +1,135 @@
+import hashlib
+import re
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from embedding.embedding import BaseEmbedding
+from utils.lru_cache import LRUCache
+from .chunking import BaseChunker, Chunk
+from .text_splitter import FixedSizeTextSplitter
+
+_SENTENCE_END = re.compile(r'(?<=[.!?]) ')
+
+
+class SemanticChunker(BaseChunker):
+    """
+    This class is responsible for chunking the text at changes of topic.
+
+    The text is split into sentences, the sentences are embedded in batches, and a chunk
+    boundary is placed between adjacent sentences whose cosine distance is above the
+    breakpoint_percentile of all adjacent distances in the document. Groups of sentences
+    longer than chunk_size are split further into fixed size chunks.
+
+    Sentence embeddings are cached by model settings and sentence text, so chunking the
+    same corpus again does not call the embedding model for known sentences. The default
+    cache holds default_cache_size sentences, about 16 MB at 1024 float32 dimensions.
+    Pass a shared cache, of the size the corpus warrants, to reuse it across chunker instances.
+    :param embedder: The embedding model used for the sentences.
+    :param chunk_size: The maximum size of a chunk in tokens.
+    :param breakpoint_percentile: The percentile of adjacent distances above which a chunk ends.
+    :param batch_size: The number of sentences embedded per request.
+    :param embedding_cache: The cache of sentence embeddings. Defaults to an LRUCache of
+        default_cache_size entries.
+    :param deterministic_ids: Derive chunk ids from the chunk content instead of generating random ones.
+    """
+    default_cache_size = 4096
+
+    def __init__(self, embedder: BaseEmbedding, chunk_size: int, breakpoint_percentile: float = 95,
+                 batch_size: int = 32, embedding_cache: Optional[LRUCache] = None, deterministic_ids: bool = False):
+        super().__init__(deterministic_ids)
+        self.embedder = embedder
+        self.chunk_size = self.tokens_per_charecter * chunk_size
+        if self.chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        if not 0 <= breakpoint_percentile <= 100:
+            raise ValueError("breakpoint_percentile must be between 0 and 100")
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        self.breakpoint_percentile = breakpoint_percentile
+        self.batch_size = batch_size
+        self.embedding_cache = embedding_cache if embedding_cache is not None else LRUCache(self.default_cache_size)
+        self.text_splitter = FixedSizeTextSplitter(self.chunk_size, 0, self.separators, self.space)
+
+    """
+    Chunks the text at semantic breakpoints.
+    :param data: The input text.
+    :param source_id: The id of the input document, used for deterministic chunk ids.
+    :return: The list of chunks."""
+    def chunk(self, data: str, source_id: Optional[str] = None) -> List[Chunk]:
+        if not data:
+            raise ValueError("Input text cannot be empty or None")
+
+        data = self.text_splitter.normalize(data)
+        sentences = self._split_sentences(data)
+        if not sentences:
+            return []
+
+        groups = []
+        group_start = sentences[0][0]
+        if len(sentences) > 1:
+            vectors = self._embed_sentences([data[start:end] for start, end in sentences])
+            for index in self._breakpoints(vectors):
+                groups.append((group_start, sentences[index][1]))
+                group_start = sentences[index + 1][0]
+        groups.append((group_start, sentences[-1][1]))
+
+        chunks = []
+        for group_start, group_end in groups:
+            for start, end in self.text_splitter.split_offsets(data, group_start, group_end):
+                chunks.append(self._new_chunk(data, start, end, source_id))
+        return chunks
+
+    @staticmethod
+    def _split_sentences(data: str) -> List[Tuple[int, int]]:
+        """
+        Returns the offsets of the sentences in the normalized text.
+        """
+        sentences = []
+        start = 0
+        for match in _SENTENCE_END.finditer(data):
+            sentences.append((start, match.start()))
+            start = match.end()
+        if start < len(data):
+            sentences.append((start, len(data)))
+        return sentences
+
+    def _breakpoints(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Returns the indices of the sentences after which a chunk ends.
+        """
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        distances = 1 - np.einsum('ij,ij->i', vectors[:-1], vectors[1:])
+        threshold = np.percentile(distances, self.breakpoint_percentile)
+        return np.flatnonzero(distances > threshold)
+
+    def _embed_sentences(self, sentences: List[str]) -> np.ndarray:
+        """
+        Embeds the sentences as a matrix, one row per sentence. Sentences found in the
+        cache are not embedded again, and each distinct sentence is embedded once.
+        """
+        keys = [self._cache_key(sentence) for sentence in sentences]
+        # The vectors of this call; the cache may evict them before they are stacked
+        vectors = {}
+        missing = {}
+        for key, sentence in zip(keys, sentences):
+            if key in vectors or key in missing:
+                continue
+            vector = self.embedding_cache.get(key)
+            if vector is None:
+                missing[key] = sentence
+            else:
+                vectors[key] = vector
+        missing_keys = list(missing)
+        for i in range(0, len(missing_keys), self.batch_size):
+            batch_keys = missing_keys[i:i + self.batch_size]
+            embedding_list = self.embedder.embed_batch([Chunk(missing[key]) for key in batch_keys])
+            for key, embedding in zip(batch_keys, embedding_list.embeddings):
+                vectors[key] = np.asarray(embedding.embeddings, dtype=np.float32)
+                self.embedding_cache.put(key, vectors[key])
+        return np.stack([vectors[key] for key in keys])
+
+    def _cache_key(self, sentence: str) -> Tuple:
+        digest = hashlib.blake2b(sentence.encode('utf-8'), digest_size=16).digest()
+        return self.embedder.model_id, self.embedder.dimension, self.embedder.normalize, digest
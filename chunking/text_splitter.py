@@ -0,0 +1,199 @@
+import re
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_SEPARATORS = (' ', '\t', '\n', '\r', '\f', '\v')
+
+# Characters that str.split() treats as whitespace but that are not separators.
+_OTHER_WHITESPACE = re.compile('[\x1c-\x1f\x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000]')
+
+
+class FixedSizeTextSplitter:
+    """
+    Splits text into chunks of at most chunk_size characters on space boundaries.
+
+    The text is first normalized by mapping every separator to a space and collapsing
+    runs of spaces, so that every chunk is a contiguous slice of the normalized text
+    and can be described by (start, end) offsets. Chunk boundaries are then found
+    with str.rfind/str.find scans instead of merging individual words.
+
+    The output is identical to LangChain's CharacterTextSplitter configured with a
+    single space separator, run on text cleaned by BaseChunker._clean_data.
+    """
+
+    def __init__(self, chunk_size: int, chunk_overlap: int,
+                 separators: Sequence[str] = DEFAULT_SEPARATORS, space: str = ' '):
+        """
+        Constructs a new FixedSizeTextSplitter object.
+        Args:
+            chunk_size (int): The maximum size of a chunk in characters.
+            chunk_overlap (int): The maximum overlap between consecutive chunks in characters.
+            separators (Sequence[str]): The characters that are treated as a space.
+            space (str): The single character used to join words.
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        if chunk_overlap < 0 or chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be non-negative and less than chunk_size")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.space = space
+        self._table = str.maketrans({sep: space for sep in separators})
+        self._default_whitespace = space == ' ' and set(separators) == set(DEFAULT_SEPARATORS)
+
+    def normalize(self, text: str) -> str:
+        """
+        Replaces all separators with a space and collapses runs of spaces.
+        Args:
+            text (str): The input text.
+        Returns:
+            str: The normalized text.
+        """
+        if self._default_whitespace and not _OTHER_WHITESPACE.search(text):
+            # str.split() splits on exactly the separators here, and is much faster
+            # than str.translate on non-ASCII text.
+            return self.space.join(text.split())
+        return self.space.join(filter(None, text.translate(self._table).split(self.space)))
+
+    def split_text(self, text: str) -> List[str]:
+        """
+        Normalizes and splits the input text.
+        Args:
+            text (str): The input text.
+        Returns:
+            List[str]: The chunk texts.
+        """
+        text = self.normalize(text)
+        return [text[start:end] for start, end in self.split_offsets(text)]
+
+    def split_offsets(self, text: str, start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        Splits a normalized text, or the text[start:end] range of it, into chunks.
+        Args:
+            text (str): The normalized text.
+            start (int): The offset at which splitting starts. Must be the start of a word.
+            end (int): The offset at which splitting stops. Defaults to the end of the text.
+        Returns:
+            List[Tuple[int, int]]: The (start, end) offsets of the chunks in text.
+        """
+        spans, _ = self._scan(text, start, len(text) if end is None else end, final=True)
+        return spans
+
+    def split_nested(self, text: str, child_splitter: 'FixedSizeTextSplitter', start: int = 0,
+                     end: Optional[int] = None) -> List[Tuple[Tuple[int, int], List[Tuple[int, int]]]]:
+        """
+        Splits a normalized text into chunks, and then the range of each chunk into
+        smaller chunks with child_splitter. Both levels are offsets into the same text,
+        so no substring is copied.
+        Args:
+            text (str): The normalized text.
+            child_splitter (FixedSizeTextSplitter): The splitter for the smaller chunks.
+            start (int): The offset at which splitting starts. Must be the start of a word.
+            end (int): The offset at which splitting stops. Defaults to the end of the text.
+        Returns:
+            List[Tuple[Tuple[int, int], List[Tuple[int, int]]]]: The (start, end) offsets of
+            each chunk in text, with the (start, end) offsets of its children in text.
+        """
+        return [((parent_start, parent_end), child_splitter.split_offsets(text, parent_start, parent_end))
+                for parent_start, parent_end in self.split_offsets(text, start, end)]
+
+    def split_stream(self, data: Iterable[str]) -> Iterator[Tuple[int, int, str]]:
+        """
+        Splits a text that arrives as a sequence of segments. Only the words that are
+        not yet part of an emitted chunk, plus the overlap, are buffered.
+        Args:
+            data (Iterable[str]): The input text segments, concatenated as-is.
+        Returns:
+            Iterator[Tuple[int, int, str]]: An iterator over the chunk offsets in the
+            normalized text and the chunk texts.
+        """
+        buffer = ''
+        pending = ''
+        offset = 0
+        for segment in data:
+            if not segment:
+                continue
+            words = (pending + segment.translate(self._table)).split(self.space)
+            pending = words.pop()
+            complete = self.space.join(filter(None, words))
+            if not complete:
+                continue
+            buffer = buffer + self.space + complete if buffer else complete
+            spans, resume = self._scan(buffer, 0, len(buffer), final=False)
+            yield from ((offset + start, offset + end, buffer[start:end]) for start, end in spans)
+            buffer = buffer[resume:]
+            offset += resume
+        if pending:
+            buffer = buffer + self.space + pending if buffer else pending
+        spans, _ = self._scan(buffer, 0, len(buffer), final=True)
+        yield from ((offset + start, offset + end, buffer[start:end]) for start, end in spans)
+
+    def _scan(self, text: str, start: int, end: int, final: bool) -> Tuple[List[Tuple[int, int]], int]:
+        """
+        Finds the chunk boundaries in text[start:end].
+
+        A chunk is the longest run of words starting at the current position that fits
+        in chunk_size (or a single word if that word alone is too long). The next chunk
+        starts at the earliest word of the previous chunk such that the carried words fit
+        in chunk_overlap and still leave room for the following word.
+        Args:
+            text (str): The normalized text.
+            start (int): The offset of the first word.
+            end (int): The offset at which scanning stops.
+            final (bool): Whether text[start:end] is the end of the input. If not, the
+                last word may be incomplete and scanning stops before chunks that depend on it.
+        Returns:
+            Tuple[List[Tuple[int, int]], int]: The chunk offsets and the offset of the
+            first word that is not yet part of a completed chunk.
+        """
+        space = self.space
+        chunk_size = self.chunk_size
+        chunk_overlap = self.chunk_overlap
+        spans = []
+        while start < end:
+            if end - start <= chunk_size:
+                if not final:
+                    break
+                chunk_end = end
+            else:
+                chunk_end = text.rfind(space, start, start + chunk_size + 1)
+                if chunk_end == -1:
+                    chunk_end = text.find(space, start, end)
+                    if chunk_end == -1:
+                        if not final:
+                            break
+                        chunk_end = end
+            if chunk_end == end:
+                self._append_span(text, start, chunk_end, spans)
+                start = end
+                break
+
+            next_start = chunk_end + 1
+            next_end = text.find(space, next_start, end)
+            if next_end == -1:
+                if not final:
+                    break
+                next_end = end
+            self._append_span(text, start, chunk_end, spans)
+
+            limit = min(chunk_overlap, chunk_size - 1 - (next_end - next_start))
+            if limit > 0:
+                boundary = text.find(space, chunk_end - limit - 1, chunk_end)
+                if boundary != -1:
+                    next_start = boundary + 1
+            start = next_start
+        return spans, start
+
+    @staticmethod
+    def _append_span(text: str, start: int, end: int, spans: List[Tuple[int, int]]) -> None:
+        """
+        Appends a chunk span, trimmed of whitespace that is not a separator, e.g. a
+        no-break space at the chunk edges. Empty chunks are dropped.
+        """
+        if text[start].isspace() or text[end - 1].isspace():
+            while start < end and text[start].isspace():
+                start += 1
+            while end > start and text[end - 1].isspace():
+                end -= 1
+            if start == end:
+                return
+        spans.append((start, end))
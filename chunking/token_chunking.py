@@ -0,0 +1,61 @@
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import List, Optional
+
+from tokenizer.tokenizer import BaseTokenizer
+from .chunking import BaseChunker, Chunk
+from .text_splitter import FixedSizeTextSplitter
+
+
+class TokenChunker(BaseChunker):
+    """
+    This class is responsible for chunking the text into chunks of a fixed number of tokens.
+    Words are kept whole; the size of a chunk is the sum of the token counts of its words,
+    which is exact for tokenizers that split on whitespace first (e.g. WordPiece).
+    :param chunk_size: The maximum number of tokens in a chunk.
+    :param chunk_overlap: The overlap between chunks, as a percentage of chunk_size.
+    :param tokenizer: The tokenizer used to count tokens.
+    :param deterministic_ids: Derive chunk ids from the chunk content instead of generating random ones.
+    """
+    def __init__(self, chunk_size: int, chunk_overlap: int, tokenizer: BaseTokenizer,
+                 deterministic_ids: bool = False):
+        super().__init__(deterministic_ids)
+        self.chunk_size = chunk_size
+        self.chunk_overlap = int(chunk_overlap * self.chunk_size / 100)
+        if self.chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        if self.chunk_overlap >= self.chunk_size:
+            raise ValueError("chunk_overlap must be less than chunk_size")
+        self.tokenizer = tokenizer
+        # Only used to normalize whitespace, so the sizes do not matter
+        self._normalizer = FixedSizeTextSplitter(1, 0, self.separators, self.space)
+
+    """
+    Chunks the text into chunks of at most chunk_size tokens. A single word with more
+    tokens than chunk_size becomes a chunk of its own.
+    :param data: The input text.
+    :param source_id: The id of the input document, used for deterministic chunk ids.
+    :return: The list of chunks."""
+    def chunk(self, data: str, source_id: Optional[str] = None) -> List[Chunk]:
+        if not data:
+            raise ValueError("Input text cannot be empty or None")
+
+        data = self._normalizer.normalize(data)
+        words = data.split(self.space) if data else []
+        count_tokens = self.tokenizer.count_tokens
+        # tokens[i] is the number of tokens in words[:i], starts[i] the offset of words[i]
+        tokens = [0, *accumulate(count_tokens(word) for word in words)]
+        starts = [0, *accumulate(len(word) + 1 for word in words)]
+
+        chunks = []
+        first = 0
+        while first < len(words):
+            last = max(bisect_right(tokens, tokens[first] + self.chunk_size) - 1, first + 1)
+            chunks.append(self._new_chunk(data, starts[first], starts[last] - 1, source_id))
+            if last == len(words):
+                break
+            next_tokens = tokens[last + 1] - tokens[last]
+            limit = min(self.chunk_overlap, self.chunk_size - next_tokens)
+            # Carry the trailing words of this chunk that fit in the overlap
+            first = last if limit < 0 else max(bisect_left(tokens, tokens[last] - limit), first + 1)
+        return chunks
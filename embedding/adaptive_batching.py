@@ -0,0 +1,131 @@
+import threading
+from typing import Dict, Optional
+
+
+class AdaptiveBatcher:
+    """
+    Tunes the number of chunks per embedding request from the token counts and latencies
+    the service reports, additive-increase / multiplicative-decrease style.
+
+    While a full batch is served at about the best throughput seen so far, in tokens
+    per second of invocation latency, the batch size grows by additive_increase. A batch
+    that is served markedly slower steps the size back by the same amount, and a
+    throttled request, or one slower than latency_target_ms, multiplies it by
+    multiplicative_decrease. Batches never exceed max_batch_size chunks or, by the
+    tokenizer estimate corrected with the counts reported by the service,
+    max_batch_tokens tokens. One batcher may be shared by the threads of an embedder.
+    """
+
+    def __init__(self, max_batch_size: int = 96, min_batch_size: int = 1, initial_batch_size: Optional[int] = None,
+                 max_batch_tokens: Optional[int] = None, additive_increase: float = 1.0,
+                 multiplicative_decrease: float = 0.5, latency_target_ms: Optional[float] = None,
+                 tolerance: float = 0.1, smoothing: float = 0.2):
+        """
+        Initializes the AdaptiveBatcher class.
+        Args:
+            max_batch_size (int): The most chunks per request.
+            min_batch_size (int): The fewest chunks per request the batcher backs off to.
+            initial_batch_size (int): The batch size to start from. Defaults to min_batch_size.
+            max_batch_tokens (int): The most tokens per request, or None for no limit.
+            additive_increase (float): The number of chunks a batch grows by after a good request.
+            multiplicative_decrease (float): The factor a batch shrinks by on throttling.
+            latency_target_ms (float): The invocation latency above which batches shrink,
+                or None to only shrink on throttling and throughput drops.
+            tolerance (float): The fraction of the best throughput a request may lose
+                before the batch size steps back.
+            smoothing (float): The weight of the latest request in the moving averages.
+        """
+        if not 1 <= min_batch_size <= max_batch_size:
+            raise ValueError("Expected 1 <= min_batch_size <= max_batch_size")
+        if max_batch_tokens is not None and max_batch_tokens <= 0:
+            raise ValueError("max_batch_tokens must be positive")
+        if additive_increase <= 0 or not 0 < multiplicative_decrease < 1:
+            raise ValueError("Expected additive_increase > 0 and 0 < multiplicative_decrease < 1")
+        if not 0 < smoothing <= 1 or not 0 <= tolerance < 1:
+            raise ValueError("Expected 0 < smoothing <= 1 and 0 <= tolerance < 1")
+        self.max_batch_size = max_batch_size
+        self.min_batch_size = min_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.additive_increase = additive_increase
+        self.multiplicative_decrease = multiplicative_decrease
+        self.latency_target_ms = latency_target_ms
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self._size = float(min(max(initial_batch_size or min_batch_size, min_batch_size), max_batch_size))
+        self._lock = threading.Lock()
+        # Reported tokens per estimated token, and the smoothed and best throughputs
+        self.token_ratio = 1.0
+        self.tokens_per_second = 0.0
+        self._best_rate = 0.0
+        self.requests = 0
+        self.throttles = 0
+
+    @property
+    def batch_size(self) -> int:
+        """
+        Returns the number of chunks the next request may carry.
+        """
+        return int(self._size)
+
+    @property
+    def batch_token_limit(self) -> Optional[float]:
+        """
+        Returns the number of estimated tokens the next request may carry, or None.
+        """
+        if self.max_batch_tokens is None:
+            return None
+        return self.max_batch_tokens / self.token_ratio
+
+    def record(self, items: int, estimated_tokens: int, tokens: int, latency_ms: float) -> None:
+        """
+        Adapts the batch size to the outcome of a successful request.
+        Args:
+            items (int): The number of chunks in the request.
+            estimated_tokens (int): The tokenizer estimate of the tokens in the request.
+            tokens (int): The number of input tokens the service reported.
+            latency_ms (float): The invocation latency of the request.
+        """
+        with self._lock:
+            self.requests += 1
+            if estimated_tokens > 0 and tokens > 0:
+                self.token_ratio += self.smoothing * (tokens / estimated_tokens - self.token_ratio)
+            if latency_ms <= 0 or tokens <= 0:
+                return
+            rate = tokens * 1000 / latency_ms
+            self.tokens_per_second += self.smoothing * (rate - self.tokens_per_second) \
+                if self.tokens_per_second else rate
+            if self.latency_target_ms is not None and latency_ms > self.latency_target_ms:
+                self._decrease()
+            elif rate >= (1 - self.tolerance) * self._best_rate:
+                self._best_rate = max(self._best_rate, rate)
+                # Only a batch that used the whole size shows whether a larger one is faster
+                if items >= self.batch_size:
+                    self._size = min(self._size + self.additive_increase, self.max_batch_size)
+            else:
+                # Let the best throughput decay, so that one fast outlier does not pin the size
+                self._best_rate += self.smoothing * (rate - self._best_rate)
+                self._size = max(self._size - self.additive_increase, self.min_batch_size)
+
+    def record_throttle(self) -> None:
+        """
+        Shrinks the batch size after the service throttled a request.
+        """
+        with self._lock:
+            self.throttles += 1
+            self._decrease()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the batch size, the smoothed throughput, the token ratio and the counters.
+        """
+        with self._lock:
+            return {
+                "batch_size": self.batch_size,
+                "tokens_per_second": self.tokens_per_second,
+                "token_ratio": self.token_ratio,
+                "requests": self.requests,
+                "throttles": self.throttles,
+            }
+
+    def _decrease(self) -> None:
+        self._size = max(self._size * self.multiplicative_decrease, self.min_batch_size)
@@ -1,7 +1,9 @@
+import io
 import json
 from typing import List, Dict, Any
 from abc import abstractmethod
 import boto3
+from botocore.config import Config
 
 from chunking.chunking import Chunk
 from utils.bedrock_retry_handler import BedRockRetryHander
@@ -12,7 +14,9 @@ class BedRockEmbedding(BaseEmbedding):
     def __init__(self, model_id: str, region: str, dimensions: int = 256, normalize: bool = True) -> None:
         super().__init__(model_id, region, dimensions, normalize)
         self._application_json = "application/json"
-        self.client = boto3.client("bedrock-runtime", region_name=self.region)
+        # Enough pooled connections for the requests kept in flight by the coroutine methods
+        self.client = boto3.client("bedrock-runtime", region_name=self.region,
+                                   config=Config(max_pool_connections=self.max_concurrency))
 
     @BedRockRetryHander()
     def embed(self, chunk: Chunk) -> Embeddings:
@@ -23,6 +27,29 @@ class BedRockEmbedding(BaseEmbedding):
         return Embeddings(embeddings=self.extract_embedding(model_response),
                           metadata=metadata, text=chunk.data)
 
+    @BedRockRetryHander()
+    async def aembed(self, chunk: Chunk) -> Embeddings:
+        payload = self._prepare_chunk(chunk)
+        response = await self._ainvoke_model(payload)
+        metadata = self._extract_metadata(response)
+        model_response = self._parse_model_response(response)
+        return Embeddings(embeddings=self.extract_embedding(model_response),
+                          metadata=metadata, text=chunk.data)
+
+    async def _ainvoke_model(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Invokes the model without blocking the event loop. boto3 has no asynchronous
+        client, so the request, including reading the response body, runs in the
+        executor of the embedder.
+        """
+        return await self._run_in_executor(self._invoke_model_and_read, payload)
+
+    def _invoke_model_and_read(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        response = self._invoke_model(payload)
+        if 'body' in response:
+            response['body'] = io.BytesIO(response['body'].read())
+        return response
+
     def _invoke_model(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         return self.client.invoke_model(
             modelId=self.model_id,
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import List, Dict
 from chunking.chunking import Chunk
 from config.config import Config
@@ -5,9 +6,14 @@ from config.env_config_provider import EnvConfigProvider
 from embedding.sagemaker_embedding import SageMakerEmbedder
 from embedding.embedding_registry import register
 
-env_config_provider = EnvConfigProvider()
-config = Config(env_config_provider)
 
+@lru_cache(maxsize=None)
+def _config() -> Config:
+    """
+    Returns the configuration, read from the environment when the first model is created
+    rather than when the module is imported.
+    """
+    return Config(EnvConfigProvider())
 
 
 @register("huggingface-sentencesimilarity-bge-large-en-v1-5")
@@ -16,10 +22,17 @@ class BGELargeEmbedding(SageMakerEmbedder):
     BGE Large Hugging Face model for sentence similarity.
     """
     def __init__(self, model_id: str, region: str, dimensions: int = 256, normalize: bool = True) -> None:
-        super().__init__(model_id, region, config.get_sagemaker_arn_role(), dimensions, normalize)
+        super().__init__(model_id, region, _config().get_sagemaker_arn_role(), dimensions, normalize)
+
+    # Requests are limited by the 6 MB SageMaker payload size
+    max_batch_size = 32
+    max_batch_bytes = 4 * 1024 * 1024
 
     def _prepare_chunk(self, chunk: Chunk) -> Dict:
-        return {"text_inputs": [chunk.data], "mode": "embedding"}
+        return self._prepare_batch([chunk])
+
+    def _prepare_batch(self, chunks: List[Chunk]) -> Dict:
+        return {"text_inputs": [chunk.data for chunk in chunks], "mode": "embedding"}
 
 
 @register("huggingface-sentencesimilarity-bge-m3")
@@ -28,10 +41,16 @@ class BGEM3Embedding(SageMakerEmbedder):
     BGE M3 Hugging Face model for sentence similarity.
     """
     def __init__(self, model_id: str, region: str, dimensions: int = 256, normalize: bool = True) -> None:
-        super().__init__(model_id, region, config.get_sagemaker_arn_role(), dimensions, normalize)
+        super().__init__(model_id, region, _config().get_sagemaker_arn_role(), dimensions, normalize)
+
+    max_batch_size = 32
+    max_batch_bytes = 4 * 1024 * 1024
 
     def _prepare_chunk(self, chunk: Chunk) -> Dict:
-        return {"text_inputs": [chunk.data], "mode": "embedding"}
+        return self._prepare_batch([chunk])
+
+    def _prepare_batch(self, chunks: List[Chunk]) -> Dict:
+        return {"text_inputs": [chunk.data for chunk in chunks], "mode": "embedding"}
 
 
 @register("huggingface-textembedding-gte-qwen2-7b-instruct")
@@ -40,7 +59,13 @@ class GTEQwen2Embedding(SageMakerEmbedder):
     GTE Qwen2-7B Instruct Hugging Face model for text embedding.
     """
     def __init__(self, model_id: str, region: str, dimensions: int = 256, normalize: bool = True) -> None:
-        super().__init__(model_id, region, config.get_sagemaker_arn_role(), dimensions, normalize)
+        super().__init__(model_id, region, _config().get_sagemaker_arn_role(), dimensions, normalize)
+
+    max_batch_size = 32
+    max_batch_bytes = 4 * 1024 * 1024
 
     def _prepare_chunk(self, chunk: Chunk) -> Dict:
-        return {"inputs": [chunk.data]}
+        return self._prepare_batch([chunk])
+
+    def _prepare_batch(self, chunks: List[Chunk]) -> Dict:
+        return {"inputs": [chunk.data for chunk in chunks]}
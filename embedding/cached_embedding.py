@@ -0,0 +1,224 @@
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from chunking.chunking import Chunk
+from .embedding import BaseEmbedding, EmbeddingList, EmbeddingMetadata, Embeddings
+
+
+class EmbeddingCache:
+    """
+    A persistent, size-bounded store of embedding vectors in a local SQLite file.
+
+    Vectors are stored as float32 blobs under a caller-chosen key, together with a
+    use counter that is bumped on every hit; when the store holds more than max_entries
+    vectors, the least recently used ones are deleted. The file may be shared by several
+    processes, so the entry count is only an estimate between evictions.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1000000):
+        """
+        Initializes the EmbeddingCache class.
+        Args:
+            path (str): The path of the SQLite file, created if it does not exist.
+            max_entries (int): The maximum number of vectors kept.
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS embeddings "
+                                 "(key BLOB PRIMARY KEY, vector BLOB NOT NULL, last_used INTEGER NOT NULL)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._connection.commit()
+        self._count, last_used = self._connection.execute(
+            "SELECT COUNT(*), COALESCE(MAX(last_used), 0) FROM embeddings").fetchone()
+        self._clock = last_used
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """
+        Returns the cached vectors of the keys that are present, and marks them as used.
+        Args:
+            keys (List[bytes]): The keys to look up.
+        Returns:
+            Dict[bytes, np.ndarray]: The float32 vectors found, by key.
+        """
+        found = {}
+        with self._lock:
+            unique = list(dict.fromkeys(keys))
+            # Stay below the SQLite limit on query parameters
+            for i in range(0, len(unique), 500):
+                batch = unique[i:i + 500]
+                rows = self._connection.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch)
+                for key, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype=np.float32)
+            if found:
+                self._clock += 1
+                self._connection.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                             [(self._clock, key) for key in found])
+                self._connection.commit()
+            hits = sum(key in found for key in keys)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, items: Dict[bytes, List[float]]) -> None:
+        """
+        Stores vectors, evicting the least recently used ones if the cache is full.
+        Args:
+            items (Dict[bytes, List[float]]): The vectors to store, by key.
+        """
+        if not items:
+            return
+        with self._lock:
+            self._clock += 1
+            cursor = self._connection.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes(), self._clock) for key, vector in items.items()])
+            self._count += max(cursor.rowcount, 0)
+            if self._count > self.max_entries:
+                self._evict()
+            self._connection.commit()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the hit and miss counters, the hit rate and the number of entries.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _evict(self) -> None:
+        # Other processes may have added entries, so evict based on the exact count
+        self._count = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = self._count - self.max_entries
+        if excess > 0:
+            self._connection.execute("DELETE FROM embeddings WHERE key IN "
+                                     "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)", (excess,))
+            self._count -= excess
+            self.evictions += excess
+
+
+"""
+This class is responsible for serving embeddings from a persistent cache, and embedding
+only the chunks it misses with the wrapped embedder.
+"""
+class CachedEmbedding(BaseEmbedding):
+    """
+    Initializes the CachedEmbedding class.
+    :param base_embedding: The embedder used for cache misses.
+    :param cache: The cache, which may be shared by embedders of different models.
+    """
+
+    def __init__(self, base_embedding: BaseEmbedding, cache: EmbeddingCache) -> None:
+        super().__init__(base_embedding.model_id, base_embedding.region, base_embedding.dimension,
+                         base_embedding.normalize)
+        self.base_embedding = base_embedding
+        self.cache = cache
+        self.tokenizer = base_embedding.tokenizer
+        self.max_batch_size = base_embedding.max_batch_size
+        self.max_batch_bytes = base_embedding.max_batch_bytes
+        # The model parameters that change the vector of a text
+        self._key_prefix = f"{self.model_id}\x00{self.dimension}\x00{self.normalize}\x00".encode('utf-8')
+
+    def _prepare_chunk(self, chunk: Chunk) -> Dict:
+        return self.base_embedding._prepare_chunk(chunk)
+
+    """
+    Embeds the chunk, or returns its cached embedding with zero token and latency metadata.
+    :param chunk: The chunk to be embedded.
+    :return: The embeddings.
+    """
+    def embed(self, chunk: Chunk) -> Embeddings:
+        return self.embed_batch([chunk]).embeddings[0]
+
+    """
+    Embeds the chunks, serving the cached ones from the cache and embedding the others
+    with embed_batch of the wrapped embedder.
+    :param chunks: The chunks to be embedded.
+    :return: The list of embeddings, one per chunk.
+    """
+    def embed_batch(self, chunks: List[Chunk]) -> EmbeddingList:
+        keys, found, missing = self._lookup(chunks)
+        embedded = self.base_embedding.embed_batch([chunk for _, chunk in missing]) if missing else EmbeddingList()
+        return self._merge(chunks, keys, found, missing, embedded)
+
+    async def aembed(self, chunk: Chunk) -> Embeddings:
+        return (await self.aembed_batch([chunk])).embeddings[0]
+
+    async def aembed_batch(self, chunks: List[Chunk]) -> EmbeddingList:
+        keys, found, missing = self._lookup(chunks)
+        embedded = await self.base_embedding.aembed_batch([chunk for _, chunk in missing]) if missing \
+            else EmbeddingList()
+        return self._merge(chunks, keys, found, missing, embedded)
+
+    def cache_key(self, text: str) -> bytes:
+        """
+        Returns the cache key of a text: a digest of the model parameters and the text.
+        """
+        digest = hashlib.blake2b(self._key_prefix, digest_size=16)
+        digest.update(text.encode('utf-8'))
+        return digest.digest()
+
+    def _lookup(self, chunks: List[Chunk]) -> Tuple[List[bytes], Dict[bytes, np.ndarray], List[Tuple[bytes, Chunk]]]:
+        """
+        Returns the cache keys of the chunks, the cached vectors found, and the distinct
+        chunks to embed with their keys.
+        """
+        keys = [self.cache_key(chunk.data) for chunk in chunks]
+        found = self.cache.get_many(keys)
+        missing = {}
+        for key, chunk in zip(keys, chunks):
+            if key not in found and key not in missing:
+                missing[key] = chunk
+        return keys, found, list(missing.items())
+
+    def _merge(self, chunks: List[Chunk], keys: List[bytes], found: Dict[bytes, np.ndarray],
+               missing: List[Tuple[bytes, Chunk]], embedded: EmbeddingList) -> EmbeddingList:
+        """
+        Stores the new embeddings and returns the embeddings of all chunks in order. Cache
+        hits, and repeats of a text embedded in this call, have zero token and latency metadata.
+        The stats of the result are those of the requests for the cache misses, which are
+        also added to the stats of this embedder.
+        """
+        new = {key: embedding for (key, _), embedding in zip(missing, embedded.embeddings)}
+        # Rounded to the stored float32 values, so that a text has the same vector
+        # whether it was embedded now or served from the cache
+        vectors = {key: np.asarray(embedding.embeddings, dtype=np.float32) for key, embedding in new.items()}
+        self.cache.put_many(vectors)
+        for key, embedding in new.items():
+            embedding.embeddings = vectors[key].tolist()
+
+        embedding_list = EmbeddingList()
+        embedding_list.stats = embedded.stats
+        self.stats.merge(embedded.stats)
+        for key, chunk in zip(keys, chunks):
+            embedding = new.pop(key, None)
+            if embedding is None:
+                vector = (found[key] if key in found else vectors[key]).tolist()
+                embedding = Embeddings(embeddings=vector, metadata=EmbeddingMetadata(0, 0), text=chunk.data)
+            embedding_list.append(embedding)
+        return embedding_list
@@ -1,7 +1,9 @@
 from typing import Any, Dict, List
 
 from chunking.chunking import Chunk
+from utils.bedrock_retry_handler import BedRockRetryHander
 from .bedrock_embedding import BedRockEmbedding
+from .embedding import Embeddings
 from .embedding_registry import register
 
 """
@@ -18,6 +20,9 @@ class CohereEmbedding(BedRockEmbedding):
     :param normalize: Normalize the embedding.
     """
 
+    # Cohere Embed on Bedrock accepts up to 96 texts per request
+    max_batch_size = 96
+
     def __init__(self, model_id: str, region: str, dimensions: int = 256, normalize: bool = True) -> None:
         super().__init__(model_id, region, dimensions, normalize)
 
@@ -28,8 +33,32 @@ class CohereEmbedding(BedRockEmbedding):
     """
     
     def _prepare_chunk(self, chunk: Chunk) -> Dict:
-        return {"texts": [chunk.data], "input_type": "search_document"}
+        return self._prepare_batch([chunk])
+
+    def _prepare_batch(self, chunks: List[Chunk]) -> Dict:
+        return {"texts": [chunk.data for chunk in chunks], "input_type": "search_document"}
     
     def extract_embedding(self, response: Dict[str, Any]) -> List[float]:
         return response["embeddings"][0]
 
+    """
+    Embeds a batch of chunks in one request.
+    :param chunks: The chunks to be embedded.
+    :return: The embeddings, in the order of the chunks.
+    """
+    @BedRockRetryHander()
+    def _embed_batch(self, chunks: List[Chunk]) -> List[Embeddings]:
+        return self._batch_embeddings(self._invoke_model(self._prepare_batch(chunks)), chunks)
+
+    @BedRockRetryHander()
+    async def _aembed_batch(self, chunks: List[Chunk]) -> List[Embeddings]:
+        return self._batch_embeddings(await self._ainvoke_model(self._prepare_batch(chunks)), chunks)
+
+    def _batch_embeddings(self, response: Dict[str, Any], chunks: List[Chunk]) -> List[Embeddings]:
+        metadata = self._split_metadata(self._extract_metadata(response), chunks)
+        vectors = self._parse_model_response(response)["embeddings"]
+        if len(vectors) != len(chunks):
+            raise ValueError(f"Expected {len(chunks)} embeddings, got {len(vectors)}")
+        return [Embeddings(embeddings=vector, metadata=item_metadata, text=chunk.data)
+                for vector, item_metadata, chunk in zip(vectors, metadata, chunks)]
+
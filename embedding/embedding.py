@@ -1,8 +1,22 @@
 from abc import ABC, abstractmethod
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import functools
 import re
-from typing import List, Dict
+import threading
+import time
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+import numpy as np
 
 from chunking.chunking import Chunk
+from tokenizer.tokenizer import BaseTokenizer, CharacterRatioTokenizer
+from utils.rate_limiter import RateLimiter
+from .adaptive_batching import AdaptiveBatcher
+from .embedding_stats import EmbeddingStats
+from .quantization import VectorQuantizer
 
 """
 This class is responsible for embedding the text using the Llama model.
@@ -10,35 +24,72 @@ This class is responsible for embedding the text using the Llama model.
 class EmbeddingMetadata:
     """
     Initializes the EmbeddingMetadata class.
-    :param input_tokens: The number of input tokens.
+    :param input_tokens: The number of input tokens billed.
     :param latency_ms: The latency in milliseconds.
+    :param requested_tokens: The number of input tokens requested, which is higher than the
+        billed input_tokens when embeddings are reused. Defaults to input_tokens.
     """
-    def __init__(self, input_tokens: int, latency_ms: int):
+    def __init__(self, input_tokens: int, latency_ms: int, requested_tokens: Optional[int] = None):
         self.input_tokens = input_tokens
         self.latency_ms = latency_ms
-    
+        self._requested_tokens = requested_tokens
+
+    @property
+    def requested_tokens(self) -> int:
+        return int(self.input_tokens) if self._requested_tokens is None else self._requested_tokens
+
     def append(self, metadata: 'EmbeddingMetadata'):
+        requested_tokens = self.requested_tokens + metadata.requested_tokens
         self.input_tokens += int(metadata.input_tokens)
         self.latency_ms += int(metadata.latency_ms)
+        self._requested_tokens = None if requested_tokens == self.input_tokens else requested_tokens
 
     def to_json(self):
         return {
             'input_token': self.input_tokens,
+            'requested_tokens': self.requested_tokens,
             'latency_ms': self.latency_ms
         }
 
+    def split(self, weights: List[int]) -> List['EmbeddingMetadata']:
+        """
+        Apportions the metadata of a batch request to its items, in proportion to the
+        weights, so that the parts add up to the totals of the batch.
+        :param weights: The weight of each item, e.g. its token count.
+        :return: The metadata of each item.
+        """
+        input_tokens = _apportion(int(self.input_tokens), weights)
+        latency_ms = _apportion(int(self.latency_ms), weights)
+        return [EmbeddingMetadata(tokens, latency) for tokens, latency in zip(input_tokens, latency_ms)]
+
+
+def _apportion(total: int, weights: List[int]) -> List[int]:
+    """
+    Splits an integer total in proportion to the weights with the largest remainder
+    method, so that the parts are integers that add up to the total.
+    """
+    if sum(weights) <= 0:
+        weights = [1] * len(weights)
+    weight_sum = sum(weights)
+    parts = [total * weight // weight_sum for weight in weights]
+    remainders = sorted(range(len(weights)), key=lambda i: (total * weights[i]) % weight_sum, reverse=True)
+    for i in remainders[:total - sum(parts)]:
+        parts[i] += 1
+    return parts
+
 
 class Embeddings:
     """
     Initializes the Embeddings class.
-    :param embeddings: The embeddings.
+    :param embeddings: The embeddings, as a list of floats or a NumPy vector.
     :param metadata: The metadata.
     """
-    def __init__(self, embeddings: List[List[float]], metadata: EmbeddingMetadata, text: str):
+    def __init__(self, embeddings: Union[List[float], np.ndarray], metadata: EmbeddingMetadata, text: str):
         self.embeddings = embeddings
         self.metadata = metadata
         self.text = text
         self.id = ''
+        self.parent_id = None
 
     def clean_text_for_vector_db(self, text):
         """
@@ -62,25 +113,152 @@ class Embeddings:
         # Strip leading and trailing spaces
         return text.strip()
 
-    def to_json(self) -> Dict:
-        return {
-            "vectors": self.embeddings,
+    def to_json(self, quantizer: Optional[VectorQuantizer] = None) -> Dict:
+        """
+        Returns the index document of the embedding.
+        :param quantizer: The quantizer that compresses the vector, or None to write it
+            in full precision. Queries of the index must use the same quantizer.
+        """
+        if quantizer is not None:
+            vectors = quantizer.encode(self.embeddings)
+        else:
+            vectors = self.embeddings.tolist() if isinstance(self.embeddings, np.ndarray) else self.embeddings
+        result = {
+            "vectors": vectors,
             "text": self.clean_text_for_vector_db(self.text),
             "metadata": {
                     "inputTokens": self.metadata.input_tokens,
                     "latencyMs": self.metadata.latency_ms
                 }
         }
+        if self.parent_id is not None:
+            result["parent_id"] = self.parent_id
+        return result
 
 class EmbeddingList:
     def __init__(self):
         self.embeddings: List[Embeddings] = []
         self.metadata = EmbeddingMetadata(0, 0)
+        # Parent chunk texts keyed by parent id, filled when children share their parent text
+        self.parents: Dict[str, str] = {}
+        # The requests that produced the embeddings, filled by embed_batch and embed_list
+        self.stats = EmbeddingStats()
 
     def append(self, embeddings: Embeddings):
         self.embeddings.append(embeddings)
         self.metadata.append(embeddings.metadata)
 
+    def latency_percentiles(self, percentiles: Iterable[float] = (50, 95, 99)) -> Dict[float, float]:
+        """
+        Returns the latencies, in milliseconds, of the requests at the given percentiles.
+        """
+        return self.stats.latency_percentiles(percentiles)
+
+    @property
+    def tokens_per_second(self) -> float:
+        """
+        Returns the input tokens embedded per second of wall-clock time.
+        """
+        return self.stats.tokens_per_second
+
+
+class ArrayEmbeddingList(EmbeddingList):
+    """
+    An EmbeddingList that stores the vectors as rows of one float32 matrix, and the ids,
+    texts and per-embedding metadata in parallel arrays, instead of one Embeddings object
+    and one list of Python floats per vector. The matrix grows by doubling.
+
+    vectors is a zero-copy view of the stored rows. embeddings and indexing build
+    Embeddings objects on demand whose vectors are views of the matrix rows, so changes to
+    their ids or texts are not stored. Vectors become Python lists only in to_json.
+    :param dimension: The vector dimension, or None to take it from the first vector.
+    :param capacity: The number of vectors to allocate room for up front.
+    """
+    def __init__(self, dimension: Optional[int] = None, capacity: int = 1024):
+        self.metadata = EmbeddingMetadata(0, 0)
+        self.parents: Dict[str, str] = {}
+        self.stats = EmbeddingStats()
+        self.dimension = dimension
+        self._capacity = max(capacity, 1)
+        self._vectors = None if dimension is None else np.empty((self._capacity, dimension), dtype=np.float32)
+        # Per-embedding input tokens, requested tokens and latency
+        self._usage = np.empty((self._capacity, 3), dtype=np.int64)
+        self._size = 0
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.parent_ids: List[Optional[str]] = []
+
+    def append(self, embeddings: Embeddings):
+        vector = np.asarray(embeddings.embeddings, dtype=np.float32).ravel()
+        if self._vectors is None:
+            self.dimension = len(vector)
+            self._vectors = np.empty((self._capacity, self.dimension), dtype=np.float32)
+        if len(vector) != self.dimension:
+            raise ValueError(f"Expected a vector of dimension {self.dimension}, got {len(vector)}")
+        if self._size == self._capacity:
+            self._grow()
+        metadata = embeddings.metadata
+        self._vectors[self._size] = vector
+        self._usage[self._size] = (int(metadata.input_tokens), metadata.requested_tokens, int(metadata.latency_ms))
+        self._size += 1
+        self.ids.append(embeddings.id)
+        self.texts.append(embeddings.text)
+        self.parent_ids.append(embeddings.parent_id)
+        self.metadata.append(metadata)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """
+        Returns the vectors as a (len, dimension) float32 view, without copying.
+        """
+        if self._vectors is None:
+            return np.empty((0, self.dimension or 0), dtype=np.float32)
+        return self._vectors[:self._size]
+
+    @property
+    def embeddings(self) -> List[Embeddings]:
+        return [self[i] for i in range(self._size)]
+
+    def to_json(self, quantizer: Optional[VectorQuantizer] = None) -> List[Dict]:
+        """
+        Returns the JSON documents of all embeddings, as Embeddings.to_json would.
+        """
+        return [self[i].to_json(quantizer) for i in range(self._size)]
+
+    def nbytes(self) -> int:
+        """
+        Returns the number of bytes allocated for the vectors and per-embedding metadata.
+        """
+        return (0 if self._vectors is None else self._vectors.nbytes) + self._usage.nbytes
+
+    def _grow(self):
+        self._capacity *= 2
+        vectors = np.empty((self._capacity, self.dimension), dtype=np.float32)
+        vectors[:self._size] = self._vectors[:self._size]
+        usage = np.empty((self._capacity, 3), dtype=np.int64)
+        usage[:self._size] = self._usage[:self._size]
+        self._vectors = vectors
+        self._usage = usage
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: int) -> Embeddings:
+        if not -self._size <= index < self._size:
+            raise IndexError("embedding index out of range")
+        index %= self._size
+        input_tokens, requested_tokens, latency_ms = (int(value) for value in self._usage[index])
+        embedding = Embeddings(embeddings=self._vectors[index],
+                               metadata=EmbeddingMetadata(input_tokens, latency_ms, requested_tokens),
+                               text=self.texts[index])
+        embedding.id = self.ids[index]
+        embedding.parent_id = self.parent_ids[index]
+        return embedding
+
+# The stats of the embed_batch call whose request is running in the current thread or task
+_request_stats: contextvars.ContextVar[Optional[EmbeddingStats]] = contextvars.ContextVar("request_stats",
+                                                                                          default=None)
+
 """
 This class is responsible for embedding the text."""
 class BaseEmbedding(ABC):
@@ -90,12 +268,31 @@ class BaseEmbedding(ABC):
     :param normalize: Normalize the embedding.
     """
 
+    # The most texts, and UTF-8 bytes of text, that one request of the model may carry
+    max_batch_size: int = 1
+    max_batch_bytes: Optional[int] = None
+
     def __init__(self,  model_id: str, region: str, dimensions: int = 256, normalize: bool = True) -> None:
         super().__init__()
         self.model_id = model_id
         self.region = region
         self.dimension = dimensions
         self.normalize = normalize
+        # Used where the service does not report token counts; replace with a
+        # vocabulary based tokenizer for accurate accounting.
+        self.tokenizer: BaseTokenizer = CharacterRatioTokenizer()
+        # The number of requests embed_batch and embed_list keep in flight, and the
+        # optional client-side limit they are sent under
+        self.max_workers = 1
+        self.rate_limiter: Optional[RateLimiter] = None
+        # Tunes the batch size from the reported tokens and latencies, within the limits above
+        self.batcher: Optional[AdaptiveBatcher] = None
+        # The requests of all embed_batch and embed_list calls of this embedder
+        self.stats = EmbeddingStats()
+        # The number of requests the coroutine methods keep in flight
+        self.max_concurrency = 64
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
 
     """
     Prepares the chunk for embedding.
@@ -116,23 +313,338 @@ class BaseEmbedding(ABC):
         pass
 
     """
-    Embeds the list of chunks.
+    Embeds the chunks, in as few requests as the model allows. The chunks are packed into
+    batches of up to max_batch_size texts and max_batch_bytes bytes, each embedded with one
+    _embed_batch call; the embeddings are returned in the order of the chunks.
+    With max_workers above one, up to max_workers batches are embedded concurrently in a
+    thread pool. Every request first waits for the rate_limiter, if one is set.
+    Batches are formed as requests are sent, so that they follow the batcher, if one is set.
+    The requests are measured in the stats of the returned list, and added to the stats of
+    the embedder.
+    :param chunks: The chunks to be embedded.
+    :return: The list of embeddings, one per chunk.
+    """
+    def embed_batch(self, chunks: List[Chunk]) -> EmbeddingList:
+        embedding_list = EmbeddingList()
+        batches = self._batches(chunks)
+        stats = embedding_list.stats
+        try:
+            if self.max_workers > 1 and len(chunks) > 1:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    pending = deque()
+                    results = []
+                    for batch in batches:
+                        if len(pending) == self.max_workers:
+                            results.append(pending.popleft().result())
+                        pending.append(executor.submit(self._embed_request, batch, stats))
+                    results.extend(future.result() for future in pending)
+            else:
+                results = (self._embed_request(batch, stats) for batch in batches)
+            for embeddings in results:
+                for embedding in embeddings:
+                    embedding_list.append(embedding)
+        finally:
+            # Failed calls count too, with their errors and the requests that completed
+            self.stats.merge(stats)
+        return embedding_list
+
+    def _embed_request(self, batch: List[Chunk], stats: EmbeddingStats) -> List[Embeddings]:
+        """
+        Embeds one batch with a single request, within the rate limits, and records it in stats.
+        """
+        estimated_tokens = sum(self.tokenizer.count_tokens(chunk.data) for chunk in batch) \
+            if self.rate_limiter is not None or self.batcher is not None else 0
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(estimated_tokens)
+        # Lets on_retryable_error count throttling retries in the stats of this call
+        context = _request_stats.set(stats)
+        start = stats.begin()
+        try:
+            embeddings = self._embed_batch(batch) if len(batch) > 1 else [self.embed(batch[0])]
+        except Exception:
+            stats.end(start, failed=True)
+            raise
+        finally:
+            _request_stats.reset(context)
+        self._record_request(embeddings, estimated_tokens, start, stats)
+        return embeddings
+
+    def _record_request(self, embeddings: List[Embeddings], estimated_tokens: int, start: float,
+                        stats: EmbeddingStats) -> None:
+        """
+        Records a completed request in stats, and passes its tokens and latency to the
+        batcher, if one is set. The batcher gets the invocation latency reported by the
+        service rather than the elapsed time, which includes retries and the network.
+        """
+        metadata = [embedding.metadata for embedding in embeddings if embedding.metadata is not None]
+        tokens = sum(int(item.input_tokens) for item in metadata)
+        stats.end(start, len(embeddings), tokens)
+        if self.batcher is not None:
+            latency_ms = sum(int(item.latency_ms) for item in metadata) or (time.time() - start) * 1000
+            self.batcher.record(len(embeddings), estimated_tokens, tokens, latency_ms)
+
+    def on_retryable_error(self, error_code: str) -> None:
+        """
+        Called by the retry handlers when a request failed with a retryable error, such as
+        throttling. The retry is counted in the stats, and the batcher, if one is set,
+        sends smaller batches.
+        """
+        stats = _request_stats.get()
+        (stats if stats is not None else self.stats).record_throttle()
+        if self.batcher is not None:
+            self.batcher.record_throttle()
+
+    """
+    Embeds a batch of chunks in one request. Models that accept a single text per request
+    keep this default, which embeds the chunks one at a time.
+    :param chunks: The chunks to be embedded, within the batch limits of the model.
+    :return: The embeddings, in the order of the chunks.
+    """
+    def _embed_batch(self, chunks: List[Chunk]) -> List[Embeddings]:
+        return [self.embed(chunk) for chunk in chunks]
+
+    def _batches(self, chunks: List[Chunk]) -> Iterator[List[Chunk]]:
+        """
+        Packs the chunks, in order, into batches within the batch limits of the model and,
+        if one is set, the current batch size and token limit of the batcher. A chunk
+        larger than a limit on its own is sent alone.
+        """
+        batch = []
+        batch_bytes = 0
+        batch_tokens = 0
+        max_batch_size, token_limit = self._batch_limits()
+        for chunk in chunks:
+            size = len(chunk.data.encode('utf-8')) if self.max_batch_bytes else 0
+            tokens = self.tokenizer.count_tokens(chunk.data) if token_limit else 0
+            if batch and (len(batch) >= max_batch_size or
+                          (self.max_batch_bytes and batch_bytes + size > self.max_batch_bytes) or
+                          (token_limit and batch_tokens + tokens > token_limit)):
+                yield batch
+                batch = []
+                batch_bytes = 0
+                batch_tokens = 0
+                max_batch_size, token_limit = self._batch_limits()
+            batch.append(chunk)
+            batch_bytes += size
+            batch_tokens += tokens
+        if batch:
+            yield batch
+
+    def _batch_limits(self) -> Tuple[int, Optional[float]]:
+        """
+        Returns the most chunks, and estimated tokens, the next batch may carry.
+        """
+        if self.batcher is None:
+            return self.max_batch_size, None
+        return min(self.max_batch_size, self.batcher.batch_size), self.batcher.batch_token_limit
+
+    def _split_metadata(self, metadata: EmbeddingMetadata, chunks: List[Chunk]) -> List[EmbeddingMetadata]:
+        """
+        Apportions the metadata of a batch request to its chunks by their token counts.
+        """
+        return metadata.split([self.tokenizer.count_tokens(chunk.data) for chunk in chunks])
+
+    """
+    Embeds the list of chunks. For hierarchical chunks the children are embedded; by default
+    each child embedding carries the parent id and the parent text. With shared_parents, each
+    child embedding keeps its own id and text and refers to its parent through parent_id,
+    and every parent text is stored once in EmbeddingList.parents, so that writers can store
+    parents separately instead of repeating the parent text in every child document.
+    The chunks are embedded with embed_batch, so they share its batching, concurrency and rate limits.
+    With deduplicate, each distinct text is embedded once and its vector is reused for the
+    other chunks with the same text; their metadata counts the tokens as requested but not billed.
     :param chunks: The list of chunks to be embedded.
+    :param shared_parents: Store parent texts once in the result instead of in every child.
+    :param deduplicate: Embed chunks with identical texts once.
+    :param as_array: Return an ArrayEmbeddingList, which stores the vectors in one float32 matrix.
     :return: The list of embeddings.
     """
-    def embed_list(self, chunks: List[Chunk]) -> EmbeddingList:
+    def embed_list(self, chunks: List[Chunk], shared_parents: bool = False, deduplicate: bool = True,
+                   as_array: bool = False) -> EmbeddingList:
+        if not isinstance(chunks, list):
+            embedding_list = EmbeddingList()
+            embedding_list.append(self.embed(chunks))
+            return embedding_list
+        targets = self._embedding_targets(chunks)
+        unique, positions = self._unique_texts([target for target, _ in targets], deduplicate)
+        batch = self.embed_batch(unique)
+        embedding_list = self._assemble(targets, self._fan_out(batch.embeddings, positions), shared_parents, as_array)
+        embedding_list.stats = batch.stats
+        return embedding_list
+
+    """
+    Embeds the chunk without blocking the event loop. The default implementation runs
+    embed in the executor of the embedder.
+    :param chunk: The chunk to be embedded.
+    :return: The embeddings.
+    """
+    async def aembed(self, chunk: Chunk) -> Embeddings:
+        return await self._run_in_executor(self.embed, chunk)
+
+    """
+    The coroutine version of embed_batch. Up to max_concurrency requests are in flight at
+    once, each waiting for the rate_limiter first, if one is set.
+    :param chunks: The chunks to be embedded.
+    :return: The list of embeddings, one per chunk.
+    """
+    async def aembed_batch(self, chunks: List[Chunk]) -> EmbeddingList:
+        # Each worker takes the next batch when its request completes, so batches are
+        # formed as requests are sent
+        batches = enumerate(self._batches(chunks))
+        results = {}
         embedding_list = EmbeddingList()
+
+        async def worker():
+            for index, batch in batches:
+                results[index] = await self._aembed_request(batch, embedding_list.stats)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(min(self.max_concurrency, max(len(chunks), 1)))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            # When a request fails, stop the other workers before they send more requests,
+            # and wait for them so that their requests are in the stats
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.stats.merge(embedding_list.stats)
+        for index in range(len(results)):
+            for embedding in results[index]:
+                embedding_list.append(embedding)
+        return embedding_list
+
+    async def _aembed_request(self, batch: List[Chunk], stats: EmbeddingStats) -> List[Embeddings]:
+        """
+        The coroutine version of _embed_request.
+        """
+        estimated_tokens = sum(self.tokenizer.count_tokens(chunk.data) for chunk in batch) \
+            if self.rate_limiter is not None or self.batcher is not None else 0
+        if self.rate_limiter is not None:
+            await self.rate_limiter.aacquire(estimated_tokens)
+        # Each worker runs in its own task, so the variable is not shared between requests
+        _request_stats.set(stats)
+        start = stats.begin()
+        try:
+            embeddings = await self._aembed_batch(batch) if len(batch) > 1 else [await self.aembed(batch[0])]
+        except BaseException:
+            # Including cancellation, so that the request does not stay in flight
+            stats.end(start, failed=True)
+            raise
+        self._record_request(embeddings, estimated_tokens, start, stats)
+        return embeddings
+
+    """
+    The coroutine version of embed_list.
+    :param chunks: The list of chunks to be embedded.
+    :param shared_parents: Store parent texts once in the result instead of in every child.
+    :return: The list of embeddings.
+    """
+    async def aembed_list(self, chunks: List[Chunk], shared_parents: bool = False,
+                          deduplicate: bool = True, as_array: bool = False) -> EmbeddingList:
         if not isinstance(chunks, list):
-            return embedding_list.append(self.embed(chunks))
+            embedding_list = EmbeddingList()
+            embedding_list.append(await self.aembed(chunks))
+            return embedding_list
+        targets = self._embedding_targets(chunks)
+        unique, positions = self._unique_texts([target for target, _ in targets], deduplicate)
+        batch = await self.aembed_batch(unique)
+        embedding_list = self._assemble(targets, self._fan_out(batch.embeddings, positions), shared_parents, as_array)
+        embedding_list.stats = batch.stats
+        return embedding_list
+
+    """
+    Embeds a batch of chunks in one request without blocking the event loop. The default
+    implementation runs _embed_batch in the executor of the embedder.
+    :param chunks: The chunks to be embedded, within the batch limits of the model.
+    :return: The embeddings, in the order of the chunks.
+    """
+    async def _aembed_batch(self, chunks: List[Chunk]) -> List[Embeddings]:
+        return await self._run_in_executor(self._embed_batch, chunks)
+
+    async def _run_in_executor(self, func, *args):
+        """
+        Runs a blocking call in a thread pool dedicated to this embedder, sized to
+        max_concurrency, so that it does not compete with the default executor.
+        """
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                        thread_name_prefix=type(self).__name__)
+        # Run in the current context, so that retries in the thread count in its stats
+        call = functools.partial(contextvars.copy_context().run, func, *args)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    @staticmethod
+    def _embedding_targets(chunks: List[Chunk]) -> List[Tuple[Chunk, Optional[Chunk]]]:
+        """
+        Returns the chunks to embed, each with the parent chunk it belongs to, if any.
+        """
+        targets = []
         for chunk in chunks:
             if chunk.child_data:
-                for child_chunk in chunk.child_data:
-                    embedding = self.embed(child_chunk)
-                    embedding.id = chunk.id
-                    embedding.text = chunk.data
-                    embedding_list.append(embedding)
+                targets.extend((child_chunk, chunk) for child_chunk in chunk.child_data)
             else:
-                embedding = self.embed(chunk)
-                embedding.id = chunk.id
-                embedding_list.append(embedding)
-        return embedding_list
\ No newline at end of file
+                targets.append((chunk, None))
+        return targets
+
+    @staticmethod
+    def _unique_texts(chunks: List[Chunk], deduplicate: bool) -> Tuple[List[Chunk], List[int]]:
+        """
+        Returns the chunks with distinct texts, in order of first occurrence, and for each
+        chunk the position of its text among them.
+        """
+        if not deduplicate:
+            return chunks, list(range(len(chunks)))
+        first = {}
+        unique = []
+        positions = []
+        for chunk in chunks:
+            position = first.setdefault(chunk.data, len(unique))
+            if position == len(unique):
+                unique.append(chunk)
+            positions.append(position)
+        return unique, positions
+
+    @staticmethod
+    def _fan_out(embeddings: List[Embeddings], positions: List[int]) -> List[Embeddings]:
+        """
+        Returns an embedding per position. Repeats of a position get a new Embeddings that
+        shares the vector, with the tokens of the original as requested but none billed.
+        """
+        result = []
+        used = set()
+        for position in positions:
+            embedding = embeddings[position]
+            if position in used:
+                embedding = Embeddings(embeddings=embedding.embeddings, text=embedding.text,
+                                       metadata=EmbeddingMetadata(0, 0, int(embedding.metadata.input_tokens)))
+            used.add(position)
+            result.append(embedding)
+        return result
+
+    @staticmethod
+    def _assemble(targets: List[Tuple[Chunk, Optional[Chunk]]], embeddings: List[Embeddings],
+                  shared_parents: bool, as_array: bool = False) -> EmbeddingList:
+        """
+        Sets the ids, texts and parent ids of the embeddings of the targets.
+        """
+        embedding_list = ArrayEmbeddingList(capacity=len(embeddings)) if as_array else EmbeddingList()
+        # Materialise each parent text once for all of its children
+        parent_texts = {}
+        for embedding, (target, parent) in zip(embeddings, targets):
+            if parent is None:
+                embedding.id = target.id
+            else:
+                if parent.id not in parent_texts:
+                    parent_texts[parent.id] = parent.data
+                if shared_parents:
+                    embedding.id = target.id
+                    embedding.parent_id = parent.id
+                else:
+                    embedding.id = parent.id
+                    embedding.text = parent_texts[parent.id]
+            embedding_list.append(embedding)
+        if shared_parents:
+            embedding_list.parents = parent_texts
+        return embedding_list
@@ -0,0 +1,237 @@
+import hashlib
+import io
+import logging
+import os
+import zipfile
+from abc import ABC, abstractmethod
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+from botocore.exceptions import ClientError
+
+from chunking.chunking import Chunk
+from storage.db.dynamodb import DynamoDB
+from storage.local_storage import LocalStorageProvider
+from storage.storage import StorageProvider
+from .embedding import ArrayEmbeddingList, BaseEmbedding, EmbeddingList, EmbeddingMetadata, Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointStore(ABC):
+    """
+    Stores the serialized results of completed batches of an embedding job by name.
+    """
+
+    @abstractmethod
+    def load(self, name: str) -> Optional[bytes]:
+        """
+        Returns the data saved under name, or None if there is none.
+        """
+        pass
+
+    @abstractmethod
+    def save(self, name: str, data: bytes) -> None:
+        pass
+
+
+class StorageCheckpointStore(CheckpointStore):
+    """
+    Saves each checkpoint as a file under a prefix of a StorageProvider, e.g. a local
+    directory or an S3 prefix.
+    """
+
+    def __init__(self, storage: StorageProvider, prefix: str):
+        """
+        Initializes the StorageCheckpointStore class.
+        Args:
+            storage (StorageProvider): The storage to write to.
+            prefix (str): The directory or key prefix of the checkpoints.
+        """
+        self.storage = storage
+        self.prefix = prefix.rstrip("/")
+        if isinstance(storage, LocalStorageProvider):
+            os.makedirs(self.prefix, exist_ok=True)
+
+    def load(self, name: str) -> Optional[bytes]:
+        try:
+            return b"".join(self.storage.read(self._path(name)))
+        except FileNotFoundError:
+            return None
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                return None
+            raise
+
+    def save(self, name: str, data: bytes) -> None:
+        path = self._path(name)
+        if isinstance(self.storage, LocalStorageProvider):
+            # Written under a temporary name and renamed, so that a process killed while
+            # writing does not leave a truncated checkpoint. S3 puts are already atomic.
+            self.storage.write(path + ".tmp", data)
+            os.replace(path + ".tmp", path)
+        else:
+            self.storage.write(path, data)
+
+    def _path(self, name: str) -> str:
+        return f"{self.prefix}/{name}"
+
+
+class DynamoDBCheckpointStore(CheckpointStore):
+    """
+    Saves each checkpoint as a binary attribute of a DynamoDB item. DynamoDB items are
+    limited to 400 KB, so batches must be small enough for their vectors to fit.
+    """
+    max_item_bytes = 400 * 1024
+
+    def __init__(self, dynamodb: DynamoDB, key_attribute: str = "id", data_attribute: str = "checkpoint"):
+        """
+        Initializes the DynamoDBCheckpointStore class.
+        Args:
+            dynamodb (DynamoDB): The table to write to.
+            key_attribute (str): The name of the partition key of the table.
+            data_attribute (str): The name of the attribute that holds the checkpoint.
+        """
+        self.dynamodb = dynamodb
+        self.key_attribute = key_attribute
+        self.data_attribute = data_attribute
+
+    def load(self, name: str) -> Optional[bytes]:
+        item = self.dynamodb.read({self.key_attribute: name})
+        if not item or self.data_attribute not in item:
+            return None
+        return bytes(item[self.data_attribute])
+
+    def save(self, name: str, data: bytes) -> None:
+        if len(data) > self.max_item_bytes:
+            raise ValueError(f"A checkpoint of {len(data)} bytes does not fit in a DynamoDB item; "
+                             f"use a smaller batch_size")
+        if not self.dynamodb.write({self.key_attribute: name, self.data_attribute: data}):
+            raise RuntimeError(f"Could not write checkpoint {name} to DynamoDB")
+
+
+class EmbeddingJob:
+    """
+    Embeds a large list of chunks in batches, saving the result of every completed batch
+    to a CheckpointStore, so that a job that stops can be run again and only embeds the
+    batches that were not completed.
+
+    Batch i holds chunks [i * batch_size, (i + 1) * batch_size) of the list and is saved as
+    "<job_id>-batch-<i>". Its checkpoint holds the vectors and token and latency metadata
+    of the batch, and a fingerprint of the model and the chunk texts; ids and texts come
+    from the chunks when the batch is resumed, as embed_list would set them. A checkpoint
+    of different chunks is an error rather than reused. Runs of the same job on several
+    machines share the work by processing the batches with i % num_shards == shard_index.
+    """
+
+    def __init__(self, embedder: BaseEmbedding, store: CheckpointStore, job_id: str, batch_size: int = 256,
+                 shard_index: int = 0, num_shards: int = 1, shared_parents: bool = False, deduplicate: bool = True):
+        """
+        Initializes the EmbeddingJob class.
+        Args:
+            embedder (BaseEmbedding): The embedder.
+            store (CheckpointStore): Where completed batches are saved.
+            job_id (str): Identifies the job in the store; runs with the same id resume each other.
+            batch_size (int): The number of chunks per checkpoint.
+            shard_index (int): The shard this run processes, in [0, num_shards).
+            num_shards (int): The number of runs that share the job.
+            shared_parents (bool): Passed to embed_list.
+            deduplicate (bool): Passed to embed_list.
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        if not 0 <= shard_index < num_shards:
+            raise ValueError("shard_index must be in [0, num_shards)")
+        self.embedder = embedder
+        self.store = store
+        self.job_id = job_id
+        self.batch_size = batch_size
+        self.shard_index = shard_index
+        self.num_shards = num_shards
+        self.shared_parents = shared_parents
+        self.deduplicate = deduplicate
+        self.embedded_batches = 0
+        self.resumed_batches = 0
+
+    def run(self, chunks: List[Chunk], as_array: bool = False) -> EmbeddingList:
+        """
+        Embeds the batches of this shard, resuming completed ones from the store.
+        Args:
+            chunks (List[Chunk]): All chunks of the job, in the same order on every run.
+            as_array (bool): Return an ArrayEmbeddingList.
+        Returns:
+            EmbeddingList: The embeddings of the batches of this shard, in order. Its stats
+                cover the batches embedded by this run.
+        """
+        result = ArrayEmbeddingList() if as_array else EmbeddingList()
+        for _, embedding_list in self.iter_batches(chunks):
+            for embedding in embedding_list.embeddings:
+                result.append(embedding)
+            result.parents.update(embedding_list.parents)
+            result.stats.merge(embedding_list.stats)
+        return result
+
+    def iter_batches(self, chunks: List[Chunk]) -> Iterator[Tuple[int, EmbeddingList]]:
+        """
+        Yields the index and embeddings of each batch of this shard as it completes, so
+        that callers can write them out without holding the whole job in memory.
+        """
+        for index in range(self.shard_index, (len(chunks) + self.batch_size - 1) // self.batch_size,
+                           self.num_shards):
+            batch = chunks[index * self.batch_size:(index + 1) * self.batch_size]
+            name = f"{self.job_id}-batch-{index:08d}"
+            fingerprint = self._fingerprint(batch)
+            data = self.store.load(name)
+            checkpoint = self._read_checkpoint(data, name) if data is not None else None
+            if checkpoint is not None:
+                embedding_list = self._restore(checkpoint, batch, fingerprint, name)
+                self.resumed_batches += 1
+            else:
+                embedding_list = self.embedder.embed_list(batch, shared_parents=self.shared_parents,
+                                                          deduplicate=self.deduplicate)
+                self.store.save(name, self._serialize(embedding_list, fingerprint))
+                self.embedded_batches += 1
+                logger.info(f"Saved batch {index} of embedding job {self.job_id}")
+            yield index, embedding_list
+
+    def _fingerprint(self, batch: List[Chunk]) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{self.embedder.model_id}\x00{self.embedder.dimension}\x00{self.embedder.normalize}".encode())
+        for target, _ in self.embedder._embedding_targets(batch):
+            digest.update(b"\x00" + target.data.encode("utf-8"))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _serialize(embedding_list: EmbeddingList, fingerprint: str) -> bytes:
+        embeddings = embedding_list.embeddings
+        vectors = np.array([np.asarray(embedding.embeddings, dtype=np.float32) for embedding in embeddings],
+                           dtype=np.float32)
+        usage = np.array([(int(embedding.metadata.input_tokens), embedding.metadata.requested_tokens,
+                           int(embedding.metadata.latency_ms)) for embedding in embeddings], dtype=np.int64)
+        buffer = io.BytesIO()
+        np.savez(buffer, vectors=vectors, usage=usage.reshape(-1, 3), fingerprint=np.array(fingerprint))
+        return buffer.getvalue()
+
+    @staticmethod
+    def _read_checkpoint(data: bytes, name: str) -> Optional[Tuple[str, np.ndarray, np.ndarray]]:
+        """
+        Returns the fingerprint, vectors and usage of a checkpoint, or None if it cannot be
+        read, e.g. because it was truncated, in which case its batch is embedded again.
+        """
+        try:
+            with np.load(io.BytesIO(data), allow_pickle=False) as checkpoint:
+                return str(checkpoint["fingerprint"]), checkpoint["vectors"], checkpoint["usage"]
+        except (OSError, EOFError, KeyError, ValueError, zipfile.BadZipFile) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {name}: {e}")
+            return None
+
+    def _restore(self, checkpoint: Tuple[str, np.ndarray, np.ndarray], batch: List[Chunk], fingerprint: str,
+                 name: str) -> EmbeddingList:
+        saved_fingerprint, vectors, usage = checkpoint
+        if saved_fingerprint != fingerprint:
+            raise ValueError(f"Checkpoint {name} was saved for other chunks or another model")
+        targets = self.embedder._embedding_targets(batch)
+        embeddings = [Embeddings(embeddings=vector, metadata=EmbeddingMetadata(int(tokens), int(latency), int(requested)),
+                                 text=target.data)
+                      for vector, (tokens, requested, latency), (target, _) in zip(vectors, usage, targets)]
+        return self.embedder._assemble(targets, embeddings, self.shared_parents)
@@ -1,21 +1,101 @@
+import importlib
+
+# The built-in models, registered lazily so that the registry only imports the module,
+# and the provider SDK, of a model when it is first requested
+BUILTIN_MODELS = {
+    "amazon.titan-embed-image-v1": "embedding.titanv1_embedding:TitanV1Embedding",
+    "amazon.titan-text-express-v1": "embedding.titanv1_embedding:TitanV1Embedding",
+    "amazon.titan-embed-text-v2:0": "embedding.titanv2_embedding:TitanV2Embedding",
+    "cohere.embed-multilingual-v3": "embedding.cohere_embedding:CohereEmbedding",
+    "cohere.embed-english-v3": "embedding.cohere_embedding:CohereEmbedding",
+    "huggingface-sentencesimilarity-bge-large-en-v1-5": "embedding.bge_large_embedding:BGELargeEmbedding",
+    "huggingface-sentencesimilarity-bge-m3": "embedding.bge_large_embedding:BGEM3Embedding",
+    "huggingface-textembedding-gte-qwen2-7b-instruct": "embedding.bge_large_embedding:GTEQwen2Embedding",
+    "llama2": "embedding.llama_embedding:LlamaEmbedding",
+    "local-hash-ngram": "embedding.local_embedding:LocalHashEmbedding",
+}
+
+
 class EmbeddingRegistry:
     def __init__(self):
         self._models = {}
+        self._cache = None
 
     def register_model(self, model_id, embedding_class):
+        """
+        Registers an embedding class under a model id.
+        :param model_id: The model id.
+        :param embedding_class: The class, or a "module:Class" string that is imported
+            when the model is first requested.
+        """
+        if isinstance(embedding_class, str) and embedding_class.count(":") != 1:
+            raise ValueError(f"Expected a 'module:Class' string, got '{embedding_class}'")
         self._models[model_id] = embedding_class
 
     def get_model(self, model_id):
         embedding_class = self._models.get(model_id)
         if not embedding_class:
             raise ValueError(f"Model '{model_id}' not found in the registry.")
+        if isinstance(embedding_class, str):
+            embedding_class = self._resolve(model_id, embedding_class)
+        if self._cache is not None:
+            return self._cached_factory(embedding_class)
+        return embedding_class
+
+    def model_ids(self):
+        """
+        Returns the ids of the registered models, without importing them.
+        """
+        return list(self._models)
+
+    def _resolve(self, model_id, path):
+        module_name, class_name = path.split(":")
+        module = importlib.import_module(module_name)
+        try:
+            embedding_class = getattr(module, class_name)
+        except AttributeError:
+            raise ValueError(f"Model '{model_id}' refers to '{path}', which does not exist.") from None
+        # Importing the module may already have registered the class; keep an explicit registration
+        if self._models.get(model_id) == path:
+            self._models[model_id] = embedding_class
         return embedding_class
 
+    def enable_cache(self, path, max_entries=1000000):
+        """
+        Makes get_model return factories that wrap the embedders they create in a
+        CachedEmbedding backed by one persistent cache file.
+        :param path: The path of the SQLite cache file.
+        :param max_entries: The maximum number of vectors kept in the cache.
+        :return: The cache, e.g. to read its statistics.
+        """
+        from .cached_embedding import EmbeddingCache
+
+        self.disable_cache()
+        self._cache = EmbeddingCache(path, max_entries)
+        return self._cache
+
+    def disable_cache(self):
+        if self._cache is not None:
+            self._cache.close()
+            self._cache = None
+
+    def _cached_factory(self, embedding_class):
+        from .cached_embedding import CachedEmbedding
+
+        cache = self._cache
+
+        def create(*args, **kwargs):
+            return CachedEmbedding(embedding_class(*args, **kwargs), cache)
+        create.__name__ = f"Cached{embedding_class.__name__}"
+        create.__wrapped__ = embedding_class
+        return create
+
 # Global registry instance
 embedding_registry = EmbeddingRegistry()
+embedding_registry._models.update(BUILTIN_MODELS)
 
 def register(model_id):
     def decorator(cls):
         embedding_registry.register_model(model_id, cls)
         return cls
-    return decorator
\ No newline at end of file
+    return decorator
@@ -0,0 +1,207 @@
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.latency_histogram import LatencyHistogram
+
+
+class EmbeddingStats:
+    """
+    Request-level measurements of embedding calls: the distribution of request latencies,
+    the requests, chunks, billed input tokens, errors and throttling retries, the most
+    requests in flight at once, the input tokens completed in each of the most recent
+    wall-clock seconds, and the most input tokens completed in any one second.
+
+    Latencies are measured by the client, so they include queueing, retries and the
+    network. Throughput is computed over wall-clock time from the start of the first
+    request to the end of the last, which makes stats of concurrent workers or processes
+    mergeable into the throughput of the whole job. The per-second timeline keeps only
+    the last timeline_seconds seconds that had completed requests, so the stats of a
+    long-lived embedder stay the same size.
+    """
+
+    def __init__(self, relative_error: float = 0.01, timeline_seconds: int = 300):
+        """
+        Initializes the EmbeddingStats class.
+        Args:
+            relative_error (float): The relative error of the latency percentiles.
+            timeline_seconds (int): The number of most recent seconds kept in the throughput timeline.
+        """
+        if timeline_seconds <= 0:
+            raise ValueError("timeline_seconds must be positive")
+        self.latency = LatencyHistogram(relative_error)
+        self.requests = 0
+        self.items = 0
+        self.input_tokens = 0
+        self.errors = 0
+        self.throttles = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        # Input tokens of the requests that completed in each of the most recent seconds
+        # since the epoch, at most timeline_seconds of them
+        self.timeline_seconds = timeline_seconds
+        self.tokens_by_second: Dict[int, int] = {}
+        self.peak_tokens_per_second = 0
+        self._lock = threading.Lock()
+
+    def begin(self) -> float:
+        """
+        Marks a request as in flight.
+        Returns:
+            float: The start time to pass to end.
+        """
+        now = time.time()
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.started = now if self.started is None else min(self.started, now)
+        return now
+
+    def end(self, start: float, items: int = 0, input_tokens: int = 0, failed: bool = False) -> None:
+        """
+        Records the outcome of a request started with begin.
+        Args:
+            start (float): The value begin returned.
+            items (int): The number of chunks embedded.
+            input_tokens (int): The number of input tokens billed.
+            failed (bool): Whether the request raised an error.
+        """
+        now = time.time()
+        with self._lock:
+            self.in_flight -= 1
+            self.finished = now if self.finished is None else max(self.finished, now)
+            self.latency.record((now - start) * 1000)
+            self.requests += 1
+            if failed:
+                self.errors += 1
+                return
+            self.items += items
+            self.input_tokens += input_tokens
+            self._add_tokens(int(now), input_tokens)
+            self._trim_timeline()
+
+    def record_throttle(self) -> None:
+        with self._lock:
+            self.throttles += 1
+
+    def merge(self, other: 'EmbeddingStats') -> 'EmbeddingStats':
+        """
+        Adds the measurements of another EmbeddingStats, e.g. of another worker, to these.
+        Returns:
+            EmbeddingStats: These stats.
+        """
+        with self._lock:
+            self.latency.merge(other.latency)
+            self.requests += other.requests
+            self.items += other.items
+            self.input_tokens += other.input_tokens
+            self.errors += other.errors
+            self.throttles += other.throttles
+            self.max_in_flight = max(self.max_in_flight, other.max_in_flight)
+            if other.started is not None:
+                self.started = other.started if self.started is None else min(self.started, other.started)
+            if other.finished is not None:
+                self.finished = other.finished if self.finished is None else max(self.finished, other.finished)
+            # Seconds already trimmed from both timelines are only counted in their peaks
+            self.peak_tokens_per_second = max(self.peak_tokens_per_second, other.peak_tokens_per_second)
+            for second, tokens in other.tokens_by_second.items():
+                self._add_tokens(second, tokens)
+            self._trim_timeline()
+        return self
+
+    def _add_tokens(self, second: int, tokens: int) -> None:
+        total = self.tokens_by_second.get(second, 0) + tokens
+        self.tokens_by_second[second] = total
+        self.peak_tokens_per_second = max(self.peak_tokens_per_second, total)
+
+    def _trim_timeline(self) -> None:
+        while len(self.tokens_by_second) > self.timeline_seconds:
+            del self.tokens_by_second[min(self.tokens_by_second)]
+
+    @property
+    def elapsed_s(self) -> float:
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.input_tokens / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    @property
+    def items_per_second(self) -> float:
+        return self.items / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    def latency_percentiles(self, percentiles: Iterable[float] = (50, 95, 99)) -> Dict[float, float]:
+        """
+        Returns the request latencies, in milliseconds, at the given percentiles.
+        """
+        return self.latency.percentiles(percentiles)
+
+    def throughput_timeline(self) -> List[Tuple[int, int]]:
+        """
+        Returns the input tokens completed in each of the last timeline_seconds seconds, as
+        (second, tokens) pairs in time order, leaving out the seconds in which no request
+        completed.
+        """
+        return sorted(self.tokens_by_second.items())
+
+    def to_json(self) -> Dict:
+        """
+        Returns the stats as a JSON-serializable dict, which from_json restores.
+        """
+        with self._lock:
+            return {
+                "latency_ms": self.latency.to_json(),
+                "requests": self.requests,
+                "items": self.items,
+                "input_tokens": self.input_tokens,
+                "errors": self.errors,
+                "throttles": self.throttles,
+                "max_in_flight": self.max_in_flight,
+                "started": self.started,
+                "finished": self.finished,
+                "timeline_seconds": self.timeline_seconds,
+                "tokens_by_second": [[second, tokens] for second, tokens in sorted(self.tokens_by_second.items())],
+                "peak_tokens_per_second": self.peak_tokens_per_second,
+            }
+
+    @classmethod
+    def from_json(cls, data: Dict) -> 'EmbeddingStats':
+        stats = cls(timeline_seconds=data["timeline_seconds"])
+        stats.latency = LatencyHistogram.from_json(data["latency_ms"])
+        for name in ("requests", "items", "input_tokens", "errors", "throttles", "max_in_flight", "started",
+                     "finished", "peak_tokens_per_second"):
+            setattr(stats, name, data[name])
+        stats.tokens_by_second = {int(second): int(tokens) for second, tokens in data["tokens_by_second"]}
+        return stats
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Returns the headline numbers: latency percentiles, throughput and counters.
+        """
+        percentiles = self.latency_percentiles()
+        return {
+            "requests": self.requests,
+            "items": self.items,
+            "input_tokens": self.input_tokens,
+            "p50_ms": percentiles[50],
+            "p95_ms": percentiles[95],
+            "p99_ms": percentiles[99],
+            "tokens_per_second": self.tokens_per_second,
+            "peak_tokens_per_second": self.peak_tokens_per_second,
+            "max_in_flight": self.max_in_flight,
+            "throttles": self.throttles,
+            "errors": self.errors,
+        }
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
@@ -0,0 +1,110 @@
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from chunking.chunking import Chunk
+from .embedding import BaseEmbedding, Embeddings, EmbeddingMetadata
+from .embedding_registry import register
+
+# Odd 64-bit constants of the rolling n-gram hash and of the final bit mixing
+_PRIME = np.uint64(0x100000001B3)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+"""
+This class is responsible for embedding the text on the local CPU, without a model service.
+"""
+@register("local-hash-ngram")
+class LocalHashEmbedding(BaseEmbedding):
+    """
+    Initializes the LocalHashEmbedding class.
+
+    Each text is embedded by hashing its lowercased character n-grams, byte-wise, into
+    dimensions buckets with a random sign per n-gram (the hashing trick), so texts that
+    share n-grams get similar vectors. The vectors are deterministic across processes and
+    machines and are computed for a whole batch at once with NumPy. They carry no meaning
+    beyond surface similarity; the model is meant for tests, load tests and throughput
+    baselines on machines without access to a model service.
+    :param model_id: The model id the embedder is registered under.
+    :param region: Not used; kept for the signature of the other embedders.
+    :param dimensions: The dimensions of the embedding.
+    :param normalize: Normalize the embedding to unit length.
+    :param ngram_range: The smallest and largest n-gram lengths, in bytes.
+    :param seed: Selects another, independent hash function.
+    """
+
+    max_batch_size = 512
+
+    def __init__(self, model_id: str = "local-hash-ngram", region: str = "local", dimensions: int = 256,
+                 normalize: bool = True, ngram_range: Tuple[int, int] = (3, 5), seed: int = 0) -> None:
+        super().__init__(model_id, region, dimensions, normalize)
+        if dimensions <= 0:
+            raise ValueError("dimensions must be positive")
+        if not 1 <= ngram_range[0] <= ngram_range[1]:
+            raise ValueError("ngram_range must be (min, max) with 1 <= min <= max")
+        self.ngram_range = ngram_range
+        self.seed = seed
+
+    """
+    Prepares the chunk for embedding.
+    :param chunk: The chunk to be embedded.
+    :return: The prepared chunk.
+    """
+    def _prepare_chunk(self, chunk: Chunk) -> Dict:
+        return {"inputText": chunk.data}
+
+    """
+    Embeds the chunk.
+    :param chunk: The chunk to be embedded.
+    :return: The embeddings.
+    """
+    def embed(self, chunk: Chunk) -> Embeddings:
+        return self._embed_batch([chunk])[0]
+
+    """
+    Embeds a batch of chunks in one vectorized pass. The latency of the pass is
+    apportioned to the chunks by their token counts.
+    :param chunks: The chunks to be embedded.
+    :return: The embeddings, in the order of the chunks.
+    """
+    def _embed_batch(self, chunks: List[Chunk]) -> List[Embeddings]:
+        start = time.perf_counter()
+        vectors = self.vectorize([chunk.data for chunk in chunks])
+        latency_ms = int((time.perf_counter() - start) * 1000)
+        tokens = [self.tokenizer.count_tokens(chunk.data) for chunk in chunks]
+        metadata = EmbeddingMetadata(sum(tokens), latency_ms).split(tokens)
+        return [Embeddings(embeddings=vector, metadata=item_metadata, text=chunk.data)
+                for vector, item_metadata, chunk in zip(vectors, metadata, chunks)]
+
+    def vectorize(self, texts: List[str]) -> np.ndarray:
+        """
+        Returns the embeddings of the texts as the rows of a (len(texts), dimension) float32 array.
+        """
+        # Pad every text with spaces so that n-grams mark the start and end of the text
+        encoded = [f" {text.lower()} ".encode("utf-8") for text in texts]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+        rows = np.repeat(np.arange(len(texts)), lengths)
+        counts = np.zeros(len(texts) * self.dimension, dtype=np.float64)
+        # The rolling hashes of the n-grams starting at each byte, extended by one byte per n
+        rolling = np.full(len(data), self.seed, dtype=np.uint64)
+        for n in range(1, self.ngram_range[1] + 1):
+            starts = len(data) - n + 1
+            if starts <= 0:
+                break
+            rolling = rolling[:starts] * _PRIME + data[n - 1:]
+            if n < self.ngram_range[0]:
+                continue
+            # Drop the n-grams that span two texts
+            inside = rows[:starts] == rows[n - 1:]
+            hashes = rolling[inside] + np.uint64(n)
+            hashes = (hashes ^ (hashes >> np.uint64(29))) * _MIX
+            buckets = (hashes >> np.uint64(32)) % np.uint64(self.dimension)
+            signs = ((hashes >> np.uint64(31)) & np.uint64(1)).astype(np.float64) * 2 - 1
+            counts += np.bincount(rows[:starts][inside] * self.dimension + buckets.astype(np.int64),
+                                  weights=signs, minlength=len(counts))
+        vectors = counts.reshape(len(texts), self.dimension)
+        if self.normalize:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors /= np.where(norms > 0, norms, 1.0)
+        return vectors.astype(np.float32)
@@ -0,0 +1,178 @@
+from typing import List, Optional
+
+import numpy as np
+
+from chunking.chunking import Chunk
+from .embedding import BaseEmbedding, EmbeddingList, Embeddings
+
+
+class Projection:
+    """
+    A linear map from the vectors of a model to fewer dimensions: vectors are centered
+    on mean and multiplied by the transposed rows of components. Fitted projections are
+    saved to and loaded from NumPy .npz files.
+    """
+
+    def __init__(self, components: np.ndarray, mean: Optional[np.ndarray] = None,
+                 explained_variance_ratio: Optional[np.ndarray] = None):
+        """
+        Initializes the Projection class.
+        Args:
+            components (np.ndarray): The (dimensions, input_dimension) projection matrix.
+            mean (np.ndarray): The vector subtracted before projecting, or None.
+            explained_variance_ratio (np.ndarray): The share of the variance of the fitting
+                sample along each component, if known.
+        """
+        self.components = np.ascontiguousarray(components, dtype=np.float32)
+        if self.components.ndim != 2:
+            raise ValueError("components must be a (dimensions, input_dimension) matrix")
+        self.mean = None if mean is None else np.asarray(mean, dtype=np.float32)
+        self.explained_variance_ratio = explained_variance_ratio
+        # Stored transposed, so that a batch is projected with one matrix multiply
+        self._matrix = np.ascontiguousarray(self.components.T)
+
+    @property
+    def dimensions(self) -> int:
+        return self.components.shape[0]
+
+    @property
+    def input_dimension(self) -> int:
+        return self.components.shape[1]
+
+    @classmethod
+    def fit_pca(cls, vectors: np.ndarray, dimensions: int) -> 'Projection':
+        """
+        Fits a PCA projection onto the top principal components of a sample of vectors.
+        Args:
+            vectors (np.ndarray): The (n, input_dimension) sample, with n >= dimensions.
+            dimensions (int): The number of dimensions to keep.
+        Returns:
+            Projection: The fitted projection.
+        """
+        vectors = np.asarray(vectors, dtype=np.float64)
+        if vectors.ndim != 2 or not 0 < dimensions <= min(vectors.shape):
+            raise ValueError(f"Cannot fit {dimensions} components on a sample of shape {vectors.shape}")
+        mean = vectors.mean(axis=0)
+        _, singular_values, components = np.linalg.svd(vectors - mean, full_matrices=False)
+        variance = singular_values ** 2
+        return cls(components[:dimensions], mean, variance[:dimensions] / variance.sum())
+
+    @classmethod
+    def truncation(cls, input_dimension: int, dimensions: int) -> 'Projection':
+        """
+        Returns the projection that keeps the first dimensions of each vector, for
+        Matryoshka-trained models whose leading dimensions carry the most information.
+        """
+        if not 0 < dimensions <= input_dimension:
+            raise ValueError("dimensions must be in [1, input_dimension]")
+        return cls(np.eye(dimensions, input_dimension, dtype=np.float32))
+
+    def apply(self, vectors: np.ndarray, normalize: bool = True) -> np.ndarray:
+        """
+        Projects the rows of a (n, input_dimension) array, or a single vector.
+        Args:
+            vectors (np.ndarray): The vectors.
+            normalize (bool): Rescale the projected vectors to unit length.
+        Returns:
+            np.ndarray: The float32 projected vectors.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.shape[-1] != self.input_dimension:
+            raise ValueError(f"Expected vectors of dimension {self.input_dimension}, got {vectors.shape[-1]}")
+        if self.mean is not None:
+            vectors = vectors - self.mean
+        projected = vectors @ self._matrix
+        if normalize:
+            norms = np.linalg.norm(projected, axis=-1, keepdims=True)
+            projected /= np.where(norms > 0, norms, 1.0)
+        return projected
+
+    def save(self, path: str) -> None:
+        arrays = {"components": self.components}
+        if self.mean is not None:
+            arrays["mean"] = self.mean
+        if self.explained_variance_ratio is not None:
+            arrays["explained_variance_ratio"] = self.explained_variance_ratio
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> 'Projection':
+        with np.load(path) as data:
+            return cls(data["components"], data["mean"] if "mean" in data else None,
+                       data["explained_variance_ratio"] if "explained_variance_ratio" in data else None)
+
+
+"""
+This class is responsible for reducing the embeddings of another embedder to fewer
+dimensions with a fitted projection.
+"""
+class ProjectedEmbedding(BaseEmbedding):
+    """
+    Initializes the ProjectedEmbedding class.
+    :param base_embedding: The embedder whose vectors are projected.
+    :param projection: The projection, with the input dimension of the base embedder's vectors.
+    :param normalize: Rescale the projected vectors to unit length.
+    """
+
+    def __init__(self, base_embedding: BaseEmbedding, projection: Projection, normalize: bool = True) -> None:
+        super().__init__(base_embedding.model_id, base_embedding.region, projection.dimensions, normalize)
+        self.base_embedding = base_embedding
+        self.projection = projection
+        self.tokenizer = base_embedding.tokenizer
+        self.max_batch_size = base_embedding.max_batch_size
+        self.max_batch_bytes = base_embedding.max_batch_bytes
+
+    @classmethod
+    def fit(cls, base_embedding: BaseEmbedding, sample: List[Chunk], dimensions: int,
+            normalize: bool = True) -> 'ProjectedEmbedding':
+        """
+        Embeds a sample of chunks with the base embedder and fits a PCA projection on their vectors.
+        :param base_embedding: The embedder whose vectors are projected.
+        :param sample: The chunks to fit on, representative of the corpus and at least dimensions of them.
+        :param dimensions: The number of dimensions to keep.
+        :param normalize: Rescale the projected vectors to unit length.
+        :return: The embedder. Save its projection to reuse it for queries and later ingestion.
+        """
+        vectors = np.array([embedding.embeddings for embedding in base_embedding.embed_list(sample).embeddings])
+        return cls(base_embedding, Projection.fit_pca(vectors, dimensions), normalize)
+
+    def _prepare_chunk(self, chunk: Chunk):
+        return self.base_embedding._prepare_chunk(chunk)
+
+    """
+    Embeds the chunk with the base embedder and projects its vector.
+    :param chunk: The chunk to be embedded.
+    :return: The embeddings.
+    """
+    def embed(self, chunk: Chunk) -> Embeddings:
+        return self._project([self.base_embedding.embed(chunk)])[0]
+
+    """
+    Embeds the chunks with embed_batch of the base embedder and projects their vectors
+    with one matrix multiply.
+    :param chunks: The chunks to be embedded.
+    :return: The list of embeddings, one per chunk.
+    """
+    def embed_batch(self, chunks: List[Chunk]) -> EmbeddingList:
+        return self._project_list(self.base_embedding.embed_batch(chunks))
+
+    async def aembed(self, chunk: Chunk) -> Embeddings:
+        return self._project([await self.base_embedding.aembed(chunk)])[0]
+
+    async def aembed_batch(self, chunks: List[Chunk]) -> EmbeddingList:
+        return self._project_list(await self.base_embedding.aembed_batch(chunks))
+
+    def _project_list(self, embedding_list: EmbeddingList) -> EmbeddingList:
+        projected = EmbeddingList()
+        projected.stats = embedding_list.stats
+        for embedding in self._project(embedding_list.embeddings):
+            projected.append(embedding)
+        return projected
+
+    def _project(self, embeddings: List[Embeddings]) -> List[Embeddings]:
+        if not embeddings:
+            return []
+        vectors = self.projection.apply(np.array([embedding.embeddings for embedding in embeddings]), self.normalize)
+        for embedding, vector in zip(embeddings, vectors):
+            embedding.embeddings = vector
+        return embeddings
@@ -0,0 +1,225 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+VectorLike = Union[Sequence[float], np.ndarray]
+
+
+class VectorQuantizer(ABC):
+    """
+    Compresses embedding vectors before they are written to a vector index.
+
+    quantize returns the compact codes as a NumPy array, and encode returns them as the
+    Python lists sent in index documents and queries. Documents and queries must be
+    encoded by the same, identically calibrated quantizer, and the index field must be
+    created with the mapping of that quantizer.
+    """
+
+    def fit(self, vectors: VectorLike) -> 'VectorQuantizer':
+        """
+        Calibrates the quantizer on a sample of vectors. Quantizers that need no
+        calibration ignore it.
+        Args:
+            vectors: The sample, as a (n, dimension) array.
+        Returns:
+            VectorQuantizer: The quantizer itself.
+        """
+        return self
+
+    @abstractmethod
+    def quantize(self, vectors: VectorLike) -> np.ndarray:
+        """
+        Returns the codes of one vector or of the rows of a (n, dimension) array.
+        """
+        pass
+
+    @abstractmethod
+    def dequantize(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Returns float32 approximations of the vectors the codes were computed from.
+        """
+        pass
+
+    @abstractmethod
+    def mapping(self, dimension: int, space_type: str = "l2") -> Dict:
+        """
+        Returns the OpenSearch knn_vector field mapping that stores the codes.
+        """
+        pass
+
+    @abstractmethod
+    def bytes_per_vector(self, dimension: int) -> int:
+        """
+        Returns the number of bytes the index stores per vector.
+        """
+        pass
+
+    def encode(self, vectors: VectorLike) -> List:
+        """
+        Returns the codes of one vector or of several as (nested) Python lists for JSON.
+        """
+        return self.quantize(vectors).tolist()
+
+
+class Float16Quantizer(VectorQuantizer):
+    """
+    Rounds vectors to half precision. The index keeps them as float16 with the faiss
+    scalar quantizer, and the JSON documents carry 5 significant digits per value,
+    enough to restore the float16 value, instead of the 17 digits of a float64.
+    """
+    significant_digits = 5
+
+    def quantize(self, vectors: VectorLike) -> np.ndarray:
+        return np.asarray(vectors, dtype=np.float32).astype(np.float16)
+
+    def dequantize(self, codes: np.ndarray) -> np.ndarray:
+        return np.asarray(codes).astype(np.float32)
+
+    def encode(self, vectors: VectorLike) -> List:
+        values = self.quantize(vectors).astype(np.float64)
+        return _round_significant(values, self.significant_digits).tolist()
+
+    def mapping(self, dimension: int, space_type: str = "l2") -> Dict:
+        return {
+            "type": "knn_vector",
+            "dimension": dimension,
+            "space_type": space_type,
+            "method": {
+                "name": "hnsw",
+                "engine": "faiss",
+                "parameters": {"encoder": {"name": "sq", "parameters": {"type": "fp16"}}}
+            }
+        }
+
+    def bytes_per_vector(self, dimension: int) -> int:
+        return 2 * dimension
+
+
+class Int8Quantizer(VectorQuantizer):
+    """
+    Maps each value symmetrically to an integer in [-127, 127]: round(value / scale).
+
+    With global calibration one scale is shared by all dimensions, so distances and
+    inner products between codes are proportional to those of the vectors. Per-dimension
+    calibration gives each dimension its own scale, which lowers the reconstruction error
+    of dequantize but weighs the dimensions differently when the index compares codes.
+    """
+
+    def __init__(self, calibration: str = "global", percentile: float = 100.0,
+                 scale: Optional[Union[float, VectorLike]] = None):
+        """
+        Initializes the Int8Quantizer class.
+        Args:
+            calibration (str): "global" or "per_dimension".
+            percentile (float): The percentile of the absolute values that maps to 127 when
+                fitting. Values above it are clipped; lower it to ignore outliers.
+            scale: A scale from a previous fit, as a float for global calibration or one
+                value per dimension, or None to fit the quantizer before use.
+        """
+        if calibration not in ("global", "per_dimension"):
+            raise ValueError(f"Unsupported calibration: {calibration}")
+        if not 0 < percentile <= 100:
+            raise ValueError("percentile must be in (0, 100]")
+        self.calibration = calibration
+        self.percentile = percentile
+        self.scale = None if scale is None else self._check_scale(np.asarray(scale, dtype=np.float32))
+
+    def fit(self, vectors: VectorLike) -> 'Int8Quantizer':
+        magnitudes = np.abs(np.asarray(vectors, dtype=np.float32).reshape(-1, np.shape(vectors)[-1]))
+        axis = None if self.calibration == "global" else 0
+        limit = np.percentile(magnitudes, self.percentile, axis=axis).astype(np.float32)
+        # Dimensions that are always zero would otherwise divide by zero
+        self.scale = self._check_scale(np.where(limit > 0, limit, 1.0).astype(np.float32) / 127)
+        return self
+
+    def quantize(self, vectors: VectorLike) -> np.ndarray:
+        if self.scale is None:
+            raise ValueError("Int8Quantizer must be fitted or given a scale before quantizing")
+        codes = np.rint(np.asarray(vectors, dtype=np.float32) / self.scale)
+        return np.clip(codes, -127, 127).astype(np.int8)
+
+    def dequantize(self, codes: np.ndarray) -> np.ndarray:
+        return np.asarray(codes, dtype=np.float32) * self.scale
+
+    def mapping(self, dimension: int, space_type: str = "l2") -> Dict:
+        return {
+            "type": "knn_vector",
+            "dimension": dimension,
+            "data_type": "byte",
+            "space_type": space_type,
+            "method": {"name": "hnsw", "engine": "lucene"}
+        }
+
+    def bytes_per_vector(self, dimension: int) -> int:
+        return dimension
+
+    def _check_scale(self, scale: np.ndarray) -> np.ndarray:
+        if self.calibration == "global" and scale.ndim != 0:
+            raise ValueError("Global calibration takes a single scale")
+        if self.calibration == "per_dimension" and scale.ndim != 1:
+            raise ValueError("Per-dimension calibration takes one scale per dimension")
+        return scale
+
+
+class BinaryQuantizer(VectorQuantizer):
+    """
+    Keeps one bit per dimension, set when the value is above a threshold, and packs
+    the bits into bytes. The index compares the codes by Hamming distance, so the
+    dimension must be a multiple of 8. Recall drops noticeably; rescoring the top hits
+    with full-precision vectors usually recovers it.
+    """
+
+    def __init__(self, thresholds: Optional[VectorLike] = None):
+        """
+        Initializes the BinaryQuantizer class.
+        Args:
+            thresholds: One threshold per dimension, or None to threshold at zero until
+                fit sets them to the mean of each dimension.
+        """
+        self.thresholds = None if thresholds is None else np.asarray(thresholds, dtype=np.float32)
+
+    def fit(self, vectors: VectorLike) -> 'BinaryQuantizer':
+        self.thresholds = np.asarray(vectors, dtype=np.float32).reshape(-1, np.shape(vectors)[-1]).mean(axis=0)
+        return self
+
+    def quantize(self, vectors: VectorLike) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.shape[-1] % 8:
+            raise ValueError(f"The dimension must be a multiple of 8, got {vectors.shape[-1]}")
+        bits = vectors > (0 if self.thresholds is None else self.thresholds)
+        # OpenSearch takes the packed bytes of binary vectors as signed integers
+        return np.packbits(bits, axis=-1).view(np.int8)
+
+    def dequantize(self, codes: np.ndarray) -> np.ndarray:
+        bits = np.unpackbits(np.asarray(codes).view(np.uint8), axis=-1)
+        return np.where(bits, 1.0, -1.0).astype(np.float32)
+
+    def mapping(self, dimension: int, space_type: str = "hamming") -> Dict:
+        if space_type != "hamming":
+            raise ValueError(f"Binary vectors are only searched with the hamming space, not {space_type}")
+        return {
+            "type": "knn_vector",
+            "dimension": dimension,
+            "data_type": "binary",
+            "space_type": "hamming",
+            "method": {"name": "hnsw", "engine": "faiss"}
+        }
+
+    def bytes_per_vector(self, dimension: int) -> int:
+        return (dimension + 7) // 8
+
+
+def _round_significant(values: np.ndarray, digits: int) -> np.ndarray:
+    """
+    Rounds each value to the given number of significant decimal digits. Dividing the
+    rounded integers by an exact power of ten gives the float closest to the short
+    decimal, so the values serialize with at most that many digits.
+    """
+    magnitudes = np.abs(values)
+    exponents = np.floor(np.log10(np.where(magnitudes > 0, magnitudes, 1.0))).astype(np.int64)
+    shifts = digits - 1 - exponents
+    # Negative shifts would need inexact negative powers of ten, so multiply instead
+    up = np.power(10.0, np.maximum(shifts, 0))
+    down = np.power(10.0, np.maximum(-shifts, 0))
+    return np.rint(values * up / down) * down / up
@@ -295,16 +295,12 @@ class SageMakerEmbedder(BaseEmbedding):
     
     def _extract_metadata(self, chunk: Chunk, latency: int) -> EmbeddingMetadata:
         return EmbeddingMetadata(
-            input_tokens = len(chunk.data) // 4,
+            input_tokens = self.tokenizer.count_tokens(chunk.data),
             latency_ms = latency
         )
     
-    def _parse_model_response(self, response: Dict[str, Any]) -> Dict[str, Any]:
-        # If the response is in byte format, decode it
-        if isinstance(response, (bytes, bytearray)):
-            response = json.loads(response.decode('utf-8'))
-        elif isinstance(response, str):
-            response = json.loads(response)
+    def _parse_model_response(self, response: Dict[str, Any]) -> np.ndarray:
+        response = self._decode_response(response)
 
         # Extract the embedding from the response
         if isinstance(response, dict) and 'embedding' in response:
@@ -312,49 +308,143 @@ class SageMakerEmbedder(BaseEmbedding):
         else:
             embedding = np.array(response[0] if isinstance(response, list) else response)
 
+        return self._postprocess_embedding(embedding)
+
+    def _parse_batch_response(self, response: Dict[str, Any]) -> List[np.ndarray]:
+        """
+        Extracts one embedding per input text from the response to a batch request.
+        """
+        response = self._decode_response(response)
+        if isinstance(response, dict) and 'embedding' in response:
+            embeddings = response['embedding']
+        else:
+            embeddings = response
+        return [self._postprocess_embedding(np.array(embedding)) for embedding in embeddings]
+
+    @staticmethod
+    def _decode_response(response: Any) -> Any:
+        # If the response is in byte format, decode it
+        if isinstance(response, (bytes, bytearray)):
+            return json.loads(response.decode('utf-8'))
+        elif isinstance(response, str):
+            return json.loads(response)
+        return response
+
+    def _postprocess_embedding(self, embedding: np.ndarray) -> np.ndarray:
         embedding = embedding.flatten()
 
         # Normalize the embedding to unit length
         embedding = embedding / np.linalg.norm(embedding)
 
-        # Check if the embedding dimension matches the expected value (1024)
+        # Check if the embedding dimension matches the expected value. To store fewer
+        # dimensions, wrap the embedder in a ProjectedEmbedding instead of truncating here.
         if len(embedding) != self.embedding_dimension:
-            logger.warning(f"Embedding dimension mismatch. Expected 1024, got {len(embedding)}")
+            logger.warning(f"Embedding dimension mismatch. Expected {self.embedding_dimension}, got {len(embedding)}")
             # Adjust the dimension by truncating or padding
             if len(embedding) > self.embedding_dimension:
                 embedding = embedding[:self.embedding_dimension]
             else:
                 embedding = np.pad(embedding, (0, self.embedding_dimension - len(embedding)))
 
-        return embedding.tolist()
+        return embedding.astype(np.float32)
 
     def embed(self, chunk: Chunk) -> Embeddings:
-        if not self.predictor:
-            raise ValueError("Embedding predictor not initialized")
-
-        if not chunk.data or not chunk.data.strip():
-            raise ValueError("Input text cannot be empty")
-
+        self._check_chunk(chunk)
+        payload = response = None
         try:
             payload = self._prepare_chunk(chunk)
             start_time = time.time()
             response = self._invoke_model(payload)
-            latency = int((time.time() - start_time) * 1000)
-            metadata = self._extract_metadata(chunk, latency)
-            model_response = self._parse_model_response(response)
-            return Embeddings(embeddings=model_response, metadata=metadata, text=chunk.data)
+            return self._chunk_embeddings(chunk, response, start_time)
         except Exception as e:
-            # Log detailed error information for debugging
-            logger.error("Error in get_embedding: %s", str(e))
-            logger.error("Model ID: %s", self.embedding_model_id)
-            logger.error("Input text length: %d", len(chunk.data))
-            logger.error("Input data: %s", json.dumps(payload, indent=2))
-
-            if 'response' in locals():
-                logger.error("Response structure: %s", type(response))
-                try:
-                    logger.error("Response content: %s", json.dumps(response, indent=2))
-                except Exception as json_error:
-                    logger.error("Response content (raw): %s", response)
+            self._log_embed_error(e, chunk, payload, response)
             raise
-    
\ No newline at end of file
+
+    async def aembed(self, chunk: Chunk) -> Embeddings:
+        self._check_chunk(chunk)
+        payload = response = None
+        try:
+            payload = self._prepare_chunk(chunk)
+            start_time = time.time()
+            response = await self._ainvoke_model(payload)
+            return self._chunk_embeddings(chunk, response, start_time)
+        except Exception as e:
+            self._log_embed_error(e, chunk, payload, response)
+            raise
+
+    def _check_chunk(self, chunk: Chunk) -> None:
+        if not self.predictor:
+            raise ValueError("Embedding predictor not initialized")
+
+        if not chunk.data or not chunk.data.strip():
+            raise ValueError("Input text cannot be empty")
+
+    def _chunk_embeddings(self, chunk: Chunk, response: Any, start_time: float) -> Embeddings:
+        latency = int((time.time() - start_time) * 1000)
+        metadata = self._extract_metadata(chunk, latency)
+        model_response = self._parse_model_response(response)
+        return Embeddings(embeddings=model_response, metadata=metadata, text=chunk.data)
+
+    def _log_embed_error(self, error: Exception, chunk: Chunk, payload: Any, response: Any) -> None:
+        # Log detailed error information for debugging
+        logger.error(f"Error in get_embedding: {error}")
+        logger.error(f"Model ID: {self.embedding_model_id}")
+        logger.error(f"Input text length: {len(chunk.data)}")
+        logger.error(f"Input data: {json.dumps(payload, indent=2)}")
+
+        if response is not None:
+            logger.error(f"Response structure: {type(response)}")
+            try:
+                logger.error(f"Response content: {json.dumps(response, indent=2)}")
+            except Exception as json_error:
+                logger.error(f"Response content (raw): {response}")
+
+    async def _ainvoke_model(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Invokes the endpoint without blocking the event loop. The SageMaker predictor is
+        synchronous, so the request runs in the executor of the embedder.
+        """
+        return await self._run_in_executor(self._invoke_model, payload)
+
+    def _supports_batch(self) -> bool:
+        """
+        Models that accept several texts per request define _prepare_batch, which returns
+        the payload of a batch request. The others embed a batch one chunk at a time.
+        """
+        return hasattr(self, '_prepare_batch')
+
+    def _embed_batch(self, chunks: List[Chunk]) -> List[Embeddings]:
+        if not self._supports_batch():
+            return super()._embed_batch(chunks)
+        payload = self._prepare_batch(self._check_batch(chunks))
+        start_time = time.time()
+        response = self._invoke_model(payload)
+        latency = int((time.time() - start_time) * 1000)
+        return self._batch_embeddings(response, chunks, latency)
+
+    async def _aembed_batch(self, chunks: List[Chunk]) -> List[Embeddings]:
+        if not self._supports_batch():
+            return [await self.aembed(chunk) for chunk in chunks]
+        payload = self._prepare_batch(self._check_batch(chunks))
+        start_time = time.time()
+        response = await self._ainvoke_model(payload)
+        latency = int((time.time() - start_time) * 1000)
+        return self._batch_embeddings(response, chunks, latency)
+
+    def _check_batch(self, chunks: List[Chunk]) -> List[Chunk]:
+        if not self.predictor:
+            raise ValueError("Embedding predictor not initialized")
+
+        if any(not chunk.data or not chunk.data.strip() for chunk in chunks):
+            raise ValueError("Input text cannot be empty")
+        return chunks
+
+    def _batch_embeddings(self, response: Any, chunks: List[Chunk], latency: int) -> List[Embeddings]:
+        vectors = self._parse_batch_response(response)
+        if len(vectors) != len(chunks):
+            logger.error(f"Model ID: {self.embedding_model_id}, expected {len(chunks)} embeddings, got {len(vectors)}")
+            raise ValueError(f"Expected {len(chunks)} embeddings, got {len(vectors)}")
+        tokens = [self.tokenizer.count_tokens(chunk.data) for chunk in chunks]
+        metadata = EmbeddingMetadata(sum(tokens), latency).split(tokens)
+        return [Embeddings(embeddings=vector, metadata=item_metadata, text=chunk.data)
+                for vector, item_metadata, chunk in zip(vectors, metadata, chunks)]
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Tuple
 
+from tokenizer.tokenizer import BaseTokenizer, CharacterRatioTokenizer
+
 class BaseInferencer(ABC):
     """
     Abstract base class for all inferencers.
@@ -23,6 +25,8 @@ class BaseInferencer(ABC):
         self.n_shot_prompts = n_shot_prompts
         self.temperature = temperature
         self.n_shot_prompt_guide_obj = n_shot_prompt_guide_obj
+        # Used where the service does not report token counts
+        self.tokenizer: BaseTokenizer = CharacterRatioTokenizer()
 
     @abstractmethod
     def generate_text(self, user_query: str, context: List[Dict]) -> Tuple[Dict[Any, Any], str]:
@@ -98,8 +98,8 @@ class SageMakerInferencer(BaseInferencer):
             if not cleaned_response or cleaned_response.isspace() or 'DRAFT' in cleaned_response:
                 return None, "Unable to generate a proper response. Please try again."
             
-            input_tokens = len(prompt) // 4
-            output_tokens = len(generated_text) // 4
+            input_tokens = self.tokenizer.count_tokens(prompt)
+            output_tokens = self.tokenizer.count_tokens(generated_text)
             total_tokens = input_tokens + output_tokens
             
             answer_metadata = {
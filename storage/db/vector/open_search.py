@@ -1,9 +1,11 @@
 import os
 from opensearchpy import OpenSearch
 from chunking.chunking import Chunk
-from embedding.embedding import BaseEmbedding
+from embedding.embedding import BaseEmbedding, EmbeddingMetadata, Embeddings
+from embedding.quantization import VectorQuantizer
 from storage.db.vector.vector_storage import VectorStorage, VectorStorageSearchItem, VectorStorageSearchResponse
 from typing import List, Optional
+from utils.lru_cache import LRUCache
 
 """
 This class is responsible for storing the data in the OpenSearch.
@@ -11,13 +13,23 @@ This class is responsible for storing the data in the OpenSearch.
 
 class OpenSearchClient(VectorStorage):
     def __init__(self, host, port, username, password, index, use_ssl=True, verify_certs=False, ssl_assert_hostname=False, ssl_show_warn=False,
-                 embedder: Optional[BaseEmbedding] = None):
+                 embedder: Optional[BaseEmbedding] = None, query_cache: Optional[LRUCache] = None,
+                 quantizer: Optional[VectorQuantizer] = None):
+        """
+        :param query_cache: The cache of query embeddings used by search. Defaults to an
+            LRUCache of 10000 entries without expiry; pass an LRUCache with a ttl to expire them.
+        :param quantizer: The quantizer the index documents were written with, through
+            Embeddings.to_json(quantizer), or None for full-precision vectors. Query vectors
+            are quantized the same way.
+        """
         self.host = host
         self.port = port
         self.username = username
         self.password = password
         self.index = index
         self.embedder = embedder
+        self.query_cache = query_cache if query_cache is not None else LRUCache(maxsize=10000)
+        self.quantizer = quantizer
         
         self.client = OpenSearch(
             hosts=[{'host': self.host, 'port': self.port}],
@@ -40,7 +52,7 @@ class OpenSearchClient(VectorStorage):
     # TODO: Need to create a model class for the return type of the search method
     # This model class has to be created in the base class and this return type has to be consitent in all the vector_sotrage classes
     def search(self, chunk: Chunk,  knn: int, hierarchical=False):
-        embedding = self.embedder.embed(chunk)
+        embedding = self._embed_query_text(chunk)
         query_vector = embedding.embeddings
         body = self.embed_query(query_vector, knn, hierarchical)
         response = self.client.search(index=self.index, body=body)
@@ -67,10 +79,25 @@ class OpenSearchClient(VectorStorage):
             }
         )
     
+    def _embed_query_text(self, chunk: Chunk) -> Embeddings:
+        """
+        Embeds the query, or returns its cached embedding with zero token and latency
+        metadata. Queries that only differ in whitespace share a cache entry.
+        """
+        key = (self.embedder.model_id, self.embedder.dimension, self.embedder.normalize, ' '.join(chunk.data.split()))
+        query_vector = self.query_cache.get(key)
+        if query_vector is not None:
+            return Embeddings(embeddings=query_vector, metadata=EmbeddingMetadata(0, 0), text=chunk.data)
+        embedding = self.embedder.embed(chunk)
+        self.query_cache.put(key, embedding.embeddings)
+        return embedding
+
     def embed_query(self, query_vector: List[float], knn: int, hierarchical=False):
         vector_field = next((field for field, props in 
                             self.client.indices.get_mapping(index=self.index)[self.index]['mappings']['properties'].items() 
                             if 'type' in props and props['type'] == 'knn_vector'), None)
+        if self.quantizer is not None:
+            query_vector = self.quantizer.encode(query_vector)
         query =  {
             "size": knn,
             "query": {
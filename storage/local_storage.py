@@ -29,7 +29,7 @@ class LocalStorageProvider(StorageProvider):
             path (str): The path to write the data to in local storage.
             data (bytes): The data to write to local storage.
         """
-        logger.info(f'Writing data to local storage: {data}')
+        logger.info(f'Writing {len(data)} bytes to local storage: {path}')
         if os.path.isdir(path):
             path = os.path.join(path, 'tmp.data')
         with open(path, 'wb') as file:
@@ -1,6 +1,8 @@
 import logging
 import os
-from typing import Generator
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Generator, Iterator, Optional
 from urllib.parse import urlparse
 import boto3
 from .storage import StorageProvider
@@ -14,20 +16,35 @@ class S3StorageProvider(StorageProvider):
     S3 storage provider
     """
 
-    def __init__(self, bucket: str, s3_client = boto3.client('s3')):
+    def __init__(self, bucket: str, s3_client = boto3.client('s3'), max_concurrency: int = 16,
+                 prefetch: Optional[int] = None, ordered: bool = True, page_size: int = 1000):
 
         """
         Initializes the S3Storage class with the specified S3 bucket.
         Args:
             bucket (str): The name of the S3 bucket to interact with.
+            max_concurrency (int): The number of files of a directory downloaded at once.
+            prefetch (int): The number of files of a directory downloaded ahead of the one
+                being consumed, which bounds the memory of a read. Defaults to twice max_concurrency.
+            ordered (bool): Yield the files of a directory in key order, rather than as their
+                downloads complete.
+            page_size (int): The number of keys listed per request, at most 1000.
         Attributes:
             bucket (str): The name of the S3 bucket.
             s3_client (boto3.client): The boto3 client for interacting with S3.
         """
 
         super().__init__()
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be positive")
+        if prefetch is not None and prefetch < max_concurrency:
+            raise ValueError("prefetch must be at least max_concurrency")
         self.bucket = bucket
         self.s3_client = s3_client
+        self.max_concurrency = max_concurrency
+        self.prefetch = 2 * max_concurrency if prefetch is None else prefetch
+        self.ordered = ordered
+        self.page_size = page_size
 
     def get_path(self, uri: str) -> str:
         parsed = urlparse(uri)
@@ -40,7 +57,7 @@ class S3StorageProvider(StorageProvider):
             path (str): The path to write the data to in the S3 bucket.
             data (bytes): The data to write to the S3 bucket.
         """
-        logger.info(f'Writing data to S3 storage: {data}')
+        logger.info(f'Writing {len(data)} bytes to S3 storage: {path}')
         if not path.endswith("/"):
             key = path
         else:
@@ -80,28 +97,53 @@ class S3StorageProvider(StorageProvider):
 
     def _read_directory(self, path: str) -> Generator[bytes, None, None]:
         """
-        Reads all files in the specified S3 directory.
+        Reads all files in the specified S3 directory. Keys are listed page by page while
+        up to max_concurrency files are downloaded in a thread pool, and at most prefetch
+        downloaded files wait to be consumed.
 
         Args:
             path (str): The S3 directory path.
 
         Returns:
-            Generator[bytes, None, None]: Yields file contents.
+            Generator[bytes, None, None]: Yields file contents, in key order if ordered is set.
         """
         if not path.endswith("/"):
             path += "/"
 
-        response = self.s3_client.list_objects_v2(Bucket=self.bucket, Prefix=path)
-
-        if "Contents" not in response:
+        keys = self._list_files(path)
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="S3StorageProvider")
+        try:
+            for key in keys:
+                pending.append(executor.submit(self._get_object, key))
+                if len(pending) >= self.prefetch:
+                    yield self._next_completed(pending)
+            while pending:
+                yield self._next_completed(pending)
+        finally:
+            # Stop the downloads of files that will not be consumed if the reader stops early
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _list_files(self, path: str) -> Iterator[str]:
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        found = False
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=path,
+                                       PaginationConfig={"PageSize": self.page_size}):
+            for obj in page.get("Contents", []):
+                found = True
+                if not obj["Key"].endswith("/"):  # Skip directories
+                    yield obj["Key"]
+        if not found:
             logger.warning(f"No files found in S3 directory: {path}")
-            return
-
-        for obj in response["Contents"]:
-            file_key = obj["Key"]
-            if file_key.endswith("/"):  # Skip directories
-                continue
 
-            logger.info(f"Reading S3 file: {file_key}")
-            file_response = self.s3_client.get_object(Bucket=self.bucket, Key=file_key)
-            yield file_response['Body'].read()
\ No newline at end of file
+    def _get_object(self, key: str) -> bytes:
+        logger.info(f"Reading S3 file: {key}")
+        return self.s3_client.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+
+    def _next_completed(self, pending: deque) -> bytes:
+        if self.ordered:
+            return pending.popleft().result()
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        future = next(iter(done))
+        pending.remove(future)
+        return future.result()
@@ -0,0 +1,11 @@
+from utils.boto_retry_handler import BotoRetryHandler, RetryParams
+
+
+class ImmediateRetryHandler(BotoRetryHandler):
+    @property
+    def retry_params(self) -> RetryParams:
+        return RetryParams(max_retries=3, retry_delay=0, backoff_factor=1)
+
+    @property
+    def retryable_errors(self):
+        return {"ThrottlingException"}
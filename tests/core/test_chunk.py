@@ -1,8 +1,18 @@
+import pickle
+import random
 import unittest
 
-from chunking.chunking import Chunk
+from chunking.chunking import Chunk, content_id
+from chunking.chunking_provider_factory import ChunkingFactory
+from chunking.content_defined_chunking import ContentDefinedChunker
 from chunking.fixedsize_chunking import FixedSizeChunker
 from chunking.hierarical_chunking import HieraricalChunker
+from chunking.near_duplicate import NearDuplicateFilter
+from chunking.parallel_chunking import ParallelChunker
+from chunking.semantic_chunking import SemanticChunker
+from embedding.embedding import BaseEmbedding, EmbeddingMetadata, Embeddings
+from utils.lru_cache import LRUCache
+from chunking.text_splitter import FixedSizeTextSplitter
 
 
 class TestChunk(unittest.TestCase):
@@ -25,6 +35,20 @@ class TestChunk(unittest.TestCase):
         chunk.add_child("Child data 2")
         self.assertEqual(str(chunk), "Parent Chunk: Parent data, Chunk: ['Child data 1', 'Child data 2']")
 
+    def test_chunk_from_source(self):
+        source = "shared source text"
+        chunk = Chunk(source=source, start=7, end=13)
+        self.assertEqual(chunk.data, "source")
+        chunk.data = "replaced"
+        self.assertEqual(chunk.data, "replaced")
+        self.assertFalse(hasattr(chunk, "__dict__"))
+
+    def test_content_id_is_deterministic(self):
+        self.assertEqual(content_id("text", "doc-1", 0, 4), content_id("text", "doc-1", 0, 4))
+        self.assertNotEqual(content_id("text", "doc-1", 0, 4), content_id("text", "doc-2", 0, 4))
+        self.assertNotEqual(content_id("text", "doc-1", 0, 4), content_id("text", "doc-1", 5, 9))
+        self.assertEqual(Chunk("same text").content_hash, Chunk("same text").content_hash)
+
 
 class TestFixedSizeChunk(unittest.TestCase):
     def setUp(self):
@@ -58,6 +82,36 @@ class TestFixedSizeChunk(unittest.TestCase):
         for chunk in chunks:
             self.assertIsInstance(chunk, Chunk)
 
+    def test_chunk_stream_matches_chunk(self):
+        data = "This is a test string for chunking.\nIt spans\tseveral   lines and words. " * 5
+        segments = [data[i:i + 7] for i in range(0, len(data), 7)]
+        expected = [chunk.data for chunk in self.fixed_chunk.chunk(data)]
+        streamed = [chunk.data for chunk in self.fixed_chunk.chunk_stream(segments)]
+        self.assertEqual(streamed, expected)
+
+    def test_chunk_stream_is_lazy(self):
+        def segments():
+            yield "first words of the document " * 3
+            raise RuntimeError("segment read too early")
+
+        stream = self.fixed_chunk.chunk_stream(segments())
+        self.assertIsInstance(next(stream), Chunk)
+
+    def test_chunk_stream_empty_data(self):
+        with self.assertRaises(ValueError):
+            list(self.fixed_chunk.chunk_stream(["", ""]))
+
+    def test_deterministic_ids(self):
+        chunker = FixedSizeChunker(self.chunk_size, self.chunk_overlap, deterministic_ids=True)
+        data = "This is a test string for chunking with stable chunk identifiers. " * 3
+        first = [chunk.id for chunk in chunker.chunk(data, "doc-1")]
+        second = [chunk.id for chunk in chunker.chunk(data, "doc-1")]
+        streamed = [chunk.id for chunk in chunker.chunk_stream([data[:20], data[20:]], "doc-1")]
+        self.assertEqual(first, second)
+        self.assertEqual(first, streamed)
+        self.assertEqual(len(set(first)), len(first))
+        self.assertNotEqual(first, [chunk.id for chunk in chunker.chunk(data, "doc-2")])
+
 
 class TestHieraricalChunk(unittest.TestCase):
     def setUp(self):
@@ -100,6 +154,234 @@ class TestHieraricalChunk(unittest.TestCase):
         self.assertIsInstance(parent_chunk.child_data, list)
         self.assertGreater(len(parent_chunk.child_data), 0)
 
+    def test_chunk_stream_matches_chunk(self):
+        data = "This is a test string for hierarchical chunking. It should split into parent and child chunks. " * 4
+        segments = [data[i:i + 11] for i in range(0, len(data), 11)]
+        expected = self.hierarchical_chunk.chunk(data)
+        streamed = list(self.hierarchical_chunk.chunk_stream(segments))
+        self.assertEqual([chunk.data for chunk in streamed], [chunk.data for chunk in expected])
+        for streamed_chunk, expected_chunk in zip(streamed, expected):
+            self.assertEqual([child.data for child in streamed_chunk.child_data],
+                             [child.data for child in expected_chunk.child_data])
+
+    def test_children_reference_parent(self):
+        data = "This is a test string for hierarchical chunking. It should split into parent and child chunks. " * 4
+        for chunk in pickle.loads(pickle.dumps(self.hierarchical_chunk.chunk(data))):
+            for child in chunk.child_data:
+                self.assertEqual(child.parent_id, chunk.id)
+                self.assertIn(child.data, chunk.data)
+
+    def test_embed_list_shared_parents(self):
+        data = "Cats sleep all day long. Rockets fly to space. Taxes are due in April. " * 4
+        chunks = self.hierarchical_chunk.chunk(data)
+        embedding_list = TopicEmbedding().embed_list(chunks, shared_parents=True)
+        self.assertEqual(embedding_list.parents, {chunk.id: chunk.data for chunk in chunks})
+        children = [child for chunk in chunks for child in chunk.child_data]
+        self.assertEqual([embedding.text for embedding in embedding_list.embeddings],
+                         [child.data for child in children])
+        self.assertEqual([embedding.parent_id for embedding in embedding_list.embeddings],
+                         [child.parent_id for child in children])
+        self.assertEqual(embedding_list.embeddings[0].to_json()["parent_id"], chunks[0].id)
+
+        embedding_list = TopicEmbedding().embed_list(chunks)
+        self.assertEqual(embedding_list.parents, {})
+        self.assertEqual(embedding_list.embeddings[0].text, chunks[0].data)
+        self.assertNotIn("parent_id", embedding_list.embeddings[0].to_json())
+
+
+class TestFixedSizeTextSplitter(unittest.TestCase):
+    def setUp(self):
+        self.data = ("Retrieval augmented\tgeneration  splits documents\n\ninto chunks.\r\n"
+                     "Überprüfung naïve 数据 text\xa0with a verylongwordthatexceedsthechunksize here. ") * 20
+
+    def test_matches_langchain(self):
+        from langchain.text_splitter import CharacterTextSplitter
+
+        for chunk_size, chunk_overlap in [(10, 0), (16, 5), (40, 8), (200, 60)]:
+            chunker = FixedSizeChunker(1, 0)
+            langchain_splitter = CharacterTextSplitter(separator=' ', chunk_size=chunk_size,
+                                                       chunk_overlap=chunk_overlap, length_function=len,
+                                                       is_separator_regex=False)
+            splitter = FixedSizeTextSplitter(chunk_size, chunk_overlap)
+            expected = langchain_splitter.split_text(chunker._clean_data(self.data))
+            self.assertEqual(splitter.split_text(self.data), expected)
+
+    def test_offsets_slice_normalized_text(self):
+        splitter = FixedSizeTextSplitter(40, 8)
+        text = splitter.normalize(self.data)
+        spans = splitter.split_offsets(text)
+        self.assertEqual([text[start:end] for start, end in spans], splitter.split_text(self.data))
+        for (start, _), (next_start, _) in zip(spans, spans[1:]):
+            self.assertLess(start, next_start)
+
+    def test_invalid_overlap(self):
+        with self.assertRaises(ValueError):
+            FixedSizeTextSplitter(10, 10)
+
+
+class TestParallelChunk(unittest.TestCase):
+    def setUp(self):
+        self.documents = [f"Document {i} talks about topic {i % 7}. " * (5 + i % 11) for i in range(40)]
+
+    def test_fixed_matches_serial(self):
+        chunker = FixedSizeChunker(10, 20, deterministic_ids=True)
+        expected = chunker.chunk_list(self.documents)
+        parallel = chunker.chunk_list(self.documents, workers=2, batch_size=3)
+        self.assertEqual([(chunk.id, chunk.data) for chunk in parallel],
+                         [(chunk.id, chunk.data) for chunk in expected])
+
+    def test_hierarchical_matches_serial(self):
+        chunker = ParallelChunker(HieraricalChunker(10, 20, 50, deterministic_ids=True), workers=2, batch_size=4)
+        expected = chunker.chunker.chunk_list(self.documents)
+        parallel = chunker.chunk_list(self.documents)
+        self.assertEqual([(chunk.id, chunk.data, [child.data for child in chunk.child_data]) for chunk in parallel],
+                         [(chunk.id, chunk.data, [child.data for child in chunk.child_data]) for chunk in expected])
+
+    def test_invalid_batch_size(self):
+        with self.assertRaises(ValueError):
+            ParallelChunker(FixedSizeChunker(10, 20), batch_size=0)
+
+
+class TestContentDefinedChunk(unittest.TestCase):
+    def setUp(self):
+        words = [f"w{(i * 7919) % 1013}x{i % 13}" for i in range(6000)]
+        self.data = " ".join(words)
+        self.edited = " ".join(words[:100] + ["an", "inserted", "sentence"] + words[100:])
+        self.chunker = ContentDefinedChunker(64)
+
+    def test_chunk_sizes(self):
+        chunks = self.chunker.chunk(self.data)
+        self.assertEqual(" ".join(chunk.data for chunk in chunks), self.data)
+        for chunk in chunks[:-1]:
+            self.assertGreaterEqual(len(chunk.data) + 1, 4 * self.chunker.min_chunk_size)
+            self.assertLessEqual(len(chunk.data) + 1, 4 * self.chunker.max_chunk_size)
+
+    def test_edit_only_changes_nearby_chunks(self):
+        known_hashes = {chunk.content_hash for chunk in self.chunker.chunk(self.data)}
+        edited_chunks = self.chunker.chunk(self.edited)
+        changed = ContentDefinedChunker.changed_chunks(edited_chunks, known_hashes)
+        self.assertGreater(len(edited_chunks), 20)
+        self.assertLessEqual(len(changed), 5)
+
+    def test_invalid_sizes(self):
+        with self.assertRaises(ValueError):
+            ContentDefinedChunker(64, min_chunk_size=64)
+        with self.assertRaises(ValueError):
+            ContentDefinedChunker(64, max_chunk_size=32)
+
+    def test_factory(self):
+        chunker = ChunkingFactory.create_chunker("content_defined", 64, 0)
+        self.assertIsInstance(chunker, ContentDefinedChunker)
+
+
+class TopicEmbedding(BaseEmbedding):
+    """
+    Embeds a sentence as a one-hot vector of the topic word it mentions.
+    """
+    topics = ["cats", "rockets", "taxes"]
+
+    def __init__(self):
+        super().__init__("topic-model", "local", dimensions=3)
+        self.embedded = []
+        self.batch_calls = 0
+
+    def _prepare_chunk(self, chunk):
+        return {}
+
+    def embed(self, chunk):
+        self.embedded.append(chunk.data)
+        vector = [1.0 if topic in chunk.data.lower() else 0.0 for topic in self.topics]
+        return Embeddings(embeddings=vector, metadata=EmbeddingMetadata(0, 0), text=chunk.data)
+
+    def embed_batch(self, chunks):
+        self.batch_calls += 1
+        return super().embed_batch(chunks)
+
+
+class TestSemanticChunk(unittest.TestCase):
+    def setUp(self):
+        self.data = ("I like cats. Many cats sleep all day. The cats purr. "
+                     "Rockets fly high. Rockets need fuel. "
+                     "Taxes are due in April. Paying taxes is no fun. Taxes again.")
+        self.embedder = TopicEmbedding()
+
+    def test_splits_at_topic_changes(self):
+        chunker = SemanticChunker(self.embedder, 100, breakpoint_percentile=70, batch_size=3)
+        chunks = chunker.chunk(self.data)
+        self.assertEqual([chunk.data for chunk in chunks], [
+            "I like cats. Many cats sleep all day. The cats purr.",
+            "Rockets fly high. Rockets need fuel.",
+            "Taxes are due in April. Paying taxes is no fun. Taxes again.",
+        ])
+        self.assertEqual(self.embedder.batch_calls, 3)
+
+    def test_sentence_embeddings_are_cached(self):
+        cache = LRUCache()
+        SemanticChunker(self.embedder, 100, embedding_cache=cache).chunk(self.data)
+        embedded = len(self.embedder.embedded)
+        SemanticChunker(self.embedder, 100, embedding_cache=cache).chunk(self.data)
+        self.assertEqual(len(self.embedder.embedded), embedded)
+        self.assertEqual(embedded, 8)
+
+    def test_cache_smaller_than_sentences(self):
+        cache = LRUCache(4)
+        chunks = SemanticChunker(self.embedder, 100, breakpoint_percentile=70, embedding_cache=cache).chunk(self.data)
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(len(cache), 4)
+
+    def test_default_cache_is_bounded(self):
+        chunker = SemanticChunker(self.embedder, 100)
+        self.assertEqual(chunker.embedding_cache.maxsize, SemanticChunker.default_cache_size)
+
+    def test_long_groups_are_split(self):
+        chunker = SemanticChunker(self.embedder, 5)
+        for chunk in chunker.chunk(self.data):
+            self.assertLessEqual(len(chunk.data), 20)
+
+    def test_factory(self):
+        chunker = ChunkingFactory.create_chunker("semantic", 100, 0, embedder=self.embedder)
+        self.assertIsInstance(chunker, SemanticChunker)
+
+
+class TestNearDuplicateFilter(unittest.TestCase):
+    footer = ("This email and any attachments are confidential and intended solely for the addressee. "
+              "If you have received it in error please notify the sender and delete it immediately. "
+              "Registered office: 1 Example Street, London.")
+
+    def setUp(self):
+        self.filter = NearDuplicateFilter(threshold=0.7)
+
+    def test_collapses_near_duplicates(self):
+        chunks = [Chunk(self.footer), Chunk("Cats sleep most of the day and hunt at night in the garden."),
+                  Chunk(self.footer.replace("London", "Leeds")), Chunk(self.footer.upper())]
+        result = self.filter.filter(chunks)
+        self.assertEqual([chunk.id for chunk in result.chunks], [chunks[0].id, chunks[1].id])
+        self.assertEqual(result.duplicates, {chunks[2].id: chunks[0].id, chunks[3].id: chunks[0].id})
+        self.assertEqual(result.avoided_calls, 2)
+
+    def test_keeps_distinct_chunks(self):
+        rng = random.Random(0)
+        words = ["vector", "index", "query", "document", "chunk", "embedding", "latency", "answer", "model"]
+        docs = [Chunk(" ".join(rng.choice(words) for _ in range(40))) for _ in range(20)]
+        result = self.filter.filter(docs)
+        self.assertEqual(len(result.chunks), len(docs))
+        self.assertEqual(result.avoided_calls, 0)
+
+    def test_hierarchical_duplicates_count_children(self):
+        chunker = HieraricalChunker(10, 2, 50)
+        chunks = chunker.chunk(self.footer) + chunker.chunk(self.footer)
+        result = self.filter.filter(chunks)
+        self.assertEqual(len(result.chunks), len(chunks) // 2)
+        self.assertEqual(result.avoided_calls, sum(len(chunk.child_data) for chunk in result.chunks))
+
+    def test_similarity(self):
+        self.assertEqual(self.filter.similarity(self.footer, self.footer), 1.0)
+        self.assertLess(self.filter.similarity(self.footer, "Rockets fly to space from the launch pad."), 0.2)
+
+    def test_invalid_threshold(self):
+        with self.assertRaises(ValueError):
+            NearDuplicateFilter(threshold=0)
+
 
 if __name__ == "__main__":
     unittest.main()
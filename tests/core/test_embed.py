@@ -1,9 +1,47 @@
+import asyncio
+import io
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
 import unittest
+from unittest import mock
+
+import boto3
+import numpy as np
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+from benchmarks.fake_endpoint import FakeBedrockEndpoint, fake_vector
 
 from chunking.chunking import Chunk
+from embedding.adaptive_batching import AdaptiveBatcher
 from embedding.cohere_embedding import CohereEmbedding
+from embedding.cached_embedding import CachedEmbedding, EmbeddingCache
+from embedding.embedding import ArrayEmbeddingList, BaseEmbedding, EmbeddingMetadata, Embeddings
+from embedding.embedding_job import DynamoDBCheckpointStore, EmbeddingJob, StorageCheckpointStore
+from embedding.embedding_registry import embedding_registry
+from embedding.embedding_stats import EmbeddingStats
+from embedding.local_embedding import LocalHashEmbedding
+from embedding.projected_embedding import ProjectedEmbedding, Projection
+from embedding.quantization import BinaryQuantizer, Float16Quantizer, Int8Quantizer
 from embedding.titanv1_embedding import TitanV1Embedding
 from embedding.titanv2_embedding import TitanV2Embedding
+from storage.db.dynamodb import DynamoDB
+from storage.local_storage import LocalStorageProvider
+from tests.core.helpers import ImmediateRetryHandler
+from utils.rate_limiter import RateLimiter
+
+
+def fake_response(body, input_tokens, latency_ms):
+    return {
+        "ResponseMetadata": {"HTTPHeaders": {"x-amzn-bedrock-input-token-count": str(input_tokens),
+                                             "x-amzn-bedrock-invocation-latency": str(latency_ms)}},
+        "body": io.BytesIO(json.dumps(body).encode("utf-8")),
+    }
 
 
 class TestCohereEmbed(unittest.TestCase):
@@ -15,6 +53,135 @@ class TestCohereEmbed(unittest.TestCase):
         payload = self.embedder._prepare_chunk(chunk)
         self.assertEqual(payload, {"texts": ["test data"], "input_type": "search_document"})
 
+    def test_embed_batch(self):
+        payloads = []
+
+        def invoke_model(payload):
+            payloads.append(payload)
+            return fake_response({"embeddings": [[float(len(text))] for text in payload["texts"]]},
+                                 input_tokens=10 * len(payload["texts"]), latency_ms=100)
+
+        self.embedder._invoke_model = invoke_model
+        chunks = [Chunk(data="x" * (i + 1)) for i in range(100)]
+        embedding_list = self.embedder.embed_batch(chunks)
+        self.assertEqual([len(payload["texts"]) for payload in payloads], [96, 4])
+        self.assertEqual([embedding.embeddings for embedding in embedding_list.embeddings],
+                         [[float(i + 1)] for i in range(100)])
+        self.assertEqual([embedding.text for embedding in embedding_list.embeddings], [chunk.data for chunk in chunks])
+        # The batch metadata is apportioned to the chunks without changing the totals
+        self.assertEqual(embedding_list.metadata.input_tokens, 1000)
+        self.assertEqual(embedding_list.metadata.latency_ms, 200)
+
+    def test_embed_list_uses_batches(self):
+        self.embedder._invoke_model = lambda payload: fake_response(
+            {"embeddings": [[1.0] for _ in payload["texts"]]}, input_tokens=1, latency_ms=1)
+        parent = Chunk(data="parent text")
+        parent.add_child(Chunk(data="parent"))
+        parent.add_child(Chunk(data="text"))
+        single = Chunk(data="single")
+        embedding_list = self.embedder.embed_list([parent, single])
+        self.assertEqual([embedding.id for embedding in embedding_list.embeddings], [parent.id, parent.id, single.id])
+        self.assertEqual([embedding.text for embedding in embedding_list.embeddings],
+                         ["parent text", "parent text", "single"])
+
+
+def import_sagemaker_embedders():
+    """
+    Imports the SageMaker embedders. If the sagemaker SDK is not installed, it is replaced
+    by stand-ins while the modules are imported; the tests only call a stubbed predictor.
+    """
+    try:
+        import sagemaker  # noqa: F401
+        stubs = {}
+    except ImportError:
+        stubs = {name: mock.MagicMock() for name in (
+            "sagemaker", "sagemaker.session", "sagemaker.predictor", "sagemaker.serializers",
+            "sagemaker.deserializers", "sagemaker.jumpstart", "sagemaker.jumpstart.model", "sagemaker.huggingface")}
+    models = dict(embedding_registry._models)
+    try:
+        with mock.patch.dict(sys.modules, stubs):
+            from embedding.bge_large_embedding import BGELargeEmbedding
+            from embedding.sagemaker_embedding import SageMakerEmbedder
+    finally:
+        embedding_registry._models.clear()
+        embedding_registry._models.update(models)
+    return SageMakerEmbedder, BGELargeEmbedding
+
+
+class StubPredictor:
+    def __init__(self, respond):
+        self.respond = respond
+        self.payloads = []
+
+    def predict(self, payload):
+        self.payloads.append(payload)
+        return self.respond(payload)
+
+
+class TestSageMakerEmbed(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.SageMakerEmbedder, cls.BGELargeEmbedding = import_sagemaker_embedders()
+
+    def create(self, embedding_class, respond, dimension=4):
+        # Skips __init__, which creates and waits for the endpoint
+        embedder = embedding_class.__new__(embedding_class)
+        BaseEmbedding.__init__(embedder, "test-model", "us-east-1")
+        embedder.predictor = embedder.embedding_predictor = StubPredictor(respond)
+        embedder.embedding_model_id = "test-model"
+        embedder.embedding_dimension = dimension
+        return embedder
+
+    def test_batch_requests(self):
+        embedder = self.create(self.BGELargeEmbedding, lambda payload: json.dumps(
+            {"embedding": [[3.0, 4.0, 0.0, 0.0] for _ in payload["text_inputs"]]}).encode())
+        chunks = [Chunk(data=f"chunk {i}") for i in range(40)]
+        embedding_list = embedder.embed_batch(chunks)
+        self.assertEqual([len(payload["text_inputs"]) for payload in embedder.predictor.payloads], [32, 8])
+        self.assertEqual(embedder.predictor.payloads[0]["mode"], "embedding")
+        for embedding, chunk in zip(embedding_list.embeddings, chunks):
+            self.assertEqual(embedding.text, chunk.data)
+            self.assertEqual(embedding.embeddings.dtype, np.float32)
+            np.testing.assert_allclose(embedding.embeddings, [0.6, 0.8, 0.0, 0.0], rtol=1e-6)
+        self.assertEqual(embedding_list.metadata.input_tokens,
+                         sum(embedder.tokenizer.count_tokens(chunk.data) for chunk in chunks))
+
+    def test_batch_response_with_wrong_count(self):
+        embedder = self.create(self.BGELargeEmbedding, lambda payload: {"embedding": [[1.0, 0.0, 0.0, 0.0]]})
+        with self.assertRaises(ValueError):
+            embedder.embed_batch([Chunk(data="one"), Chunk(data="two")])
+
+    def test_failed_requests_raise_the_model_error(self):
+        def respond(payload):
+            raise RuntimeError("endpoint went away")
+
+        embedder = self.create(self.BGELargeEmbedding, respond)
+        for embed in (embedder.embed, lambda chunk: asyncio.run(embedder.aembed(chunk))):
+            # The error is logged, then raised as it is
+            with self.assertRaisesRegex(RuntimeError, "endpoint went away"):
+                embed(Chunk(data="text"))
+
+    def test_models_without_batch_payload_embed_per_chunk(self):
+        class SingleTextEmbedding(self.SageMakerEmbedder):
+            max_batch_size = 4
+
+            def _prepare_chunk(self, chunk):
+                return {"inputs": chunk.data}
+
+        # A vector of another dimension is padded to the expected one
+        embedder = self.create(SingleTextEmbedding, lambda payload: [[0.0, 2.0, 0.0]])
+        chunks = [Chunk(data=f"chunk {i}") for i in range(6)]
+        embedding_list = embedder.embed_batch(chunks)
+        self.assertEqual(embedder.predictor.payloads, [{"inputs": chunk.data} for chunk in chunks])
+        for embedding in embedding_list.embeddings:
+            self.assertEqual(embedding.embeddings.dtype, np.float32)
+            np.testing.assert_array_equal(embedding.embeddings, [0.0, 1.0, 0.0, 0.0])
+
+        embedder = self.create(SingleTextEmbedding, lambda payload: {"embedding": [[0.0, 0.0, 5.0, 0.0]]})
+        embedding_list = asyncio.run(embedder.aembed_batch(chunks))
+        self.assertEqual(len(embedder.predictor.payloads), 6)
+        np.testing.assert_array_equal(embedding_list.embeddings[0].embeddings, [0.0, 0.0, 1.0, 0.0])
+
 
 class TestTitanV1Embed(unittest.TestCase):
     def setUp(self):
@@ -25,12 +192,51 @@ class TestTitanV1Embed(unittest.TestCase):
         payload = self.embedder._prepare_chunk(chunk)
         self.assertEqual(payload, {"inputText": "test data", "embeddingConfig": {"outputEmbeddingLength": 256}})
 
+    def test_embed_batch_falls_back_to_single_requests(self):
+        payloads = []
+
+        def invoke_model(payload):
+            payloads.append(payload)
+            return fake_response({"embedding": [float(len(payload["inputText"]))]}, input_tokens=2, latency_ms=5)
+
+        self.embedder._invoke_model = invoke_model
+        embedding_list = self.embedder.embed_batch([Chunk(data="a"), Chunk(data="bb"), Chunk(data="ccc")])
+        self.assertEqual(len(payloads), 3)
+        self.assertEqual([embedding.embeddings for embedding in embedding_list.embeddings], [[1.0], [2.0], [3.0]])
+        self.assertEqual(embedding_list.metadata.input_tokens, 6)
+
+    def test_embed_list_concurrently(self):
+        def invoke_model(payload):
+            time.sleep(0.05)
+            return fake_response({"embedding": [float(payload["inputText"])]}, input_tokens=3, latency_ms=50)
+
+        acquired = []
+        self.embedder._invoke_model = invoke_model
+        self.embedder.max_workers = 10
+        self.embedder.rate_limiter = RateLimiter(requests_per_minute=1000, sleep=acquired.append)
+        start = time.perf_counter()
+        embedding_list = self.embedder.embed_list([Chunk(data=str(i)) for i in range(20)])
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual([embedding.embeddings for embedding in embedding_list.embeddings],
+                         [[float(i)] for i in range(20)])
+        self.assertEqual(embedding_list.metadata.input_tokens, 60)
+        self.assertEqual(embedding_list.metadata.latency_ms, 1000)
+        self.assertEqual(acquired, [])
+
     def test_extract_embedding(self):
         response = {"embedding": [0.1, 0.2, 0.3]}
         embedding = self.embedder.extract_embedding(response)
         self.assertEqual(embedding, [0.1, 0.2, 0.3])
 
 
+class TestEmbeddingMetadata(unittest.TestCase):
+    def test_split_preserves_totals(self):
+        parts = EmbeddingMetadata(input_tokens="10", latency_ms=7).split([1, 2, 0])
+        self.assertEqual([part.input_tokens for part in parts], [3, 7, 0])
+        self.assertEqual(sum(part.latency_ms for part in parts), 7)
+        self.assertEqual([part.input_tokens for part in EmbeddingMetadata(5, 5).split([0, 0])], [3, 2])
+
+
 class TestTitanV2Embed(unittest.TestCase):
     def setUp(self):
         self.embedder = TitanV2Embedding(model_id="test_model", region="us-west-2")
@@ -46,5 +252,581 @@ class TestTitanV2Embed(unittest.TestCase):
         self.assertEqual(embedding, [0.1, 0.2, 0.3])
 
 
+@mock.patch.dict(os.environ, {"AWS_ACCESS_KEY_ID": "test", "AWS_SECRET_ACCESS_KEY": "test"})
+class TestAsyncEmbed(unittest.TestCase):
+    def setUp(self):
+        self.endpoint = FakeBedrockEndpoint(latency_s=0.02).__enter__()
+        self.addCleanup(self.endpoint.__exit__, None, None, None)
+
+    def connect(self, embedder):
+        embedder.client = boto3.client("bedrock-runtime", region_name="us-east-1", endpoint_url=self.endpoint.url)
+        return embedder
+
+    def test_aembed_list_preserves_order(self):
+        embedder = self.connect(TitanV2Embedding(model_id="test_model", region="us-east-1"))
+        embedder.max_concurrency = 4
+        chunks = [Chunk(data=f"chunk {i}") for i in range(20)]
+        embedding_list = asyncio.run(embedder.aembed_list(chunks))
+        self.assertEqual([embedding.embeddings for embedding in embedding_list.embeddings],
+                         [fake_vector(chunk.data) for chunk in chunks])
+        self.assertEqual([embedding.id for embedding in embedding_list.embeddings], [chunk.id for chunk in chunks])
+        self.assertEqual(embedding_list.metadata.input_tokens, sum(len(chunk.data) // 4 for chunk in chunks))
+        self.assertEqual(self.endpoint.requests, 20)
+        self.assertLessEqual(self.endpoint.max_in_flight, 4)
+
+    def test_adaptive_batches_grow(self):
+        embedder = self.connect(CohereEmbedding(model_id="test_model", region="us-east-1"))
+        embedder.batcher = AdaptiveBatcher(max_batch_size=8)
+        chunks = [Chunk(data=f"chunk number {i}") for i in range(60)]
+        embedding_list = embedder.embed_list(chunks)
+        self.assertEqual([embedding.embeddings for embedding in embedding_list.embeddings],
+                         [fake_vector(chunk.data) for chunk in chunks])
+        self.assertEqual(embedder.batcher.batch_size, 8)
+        # Batches of 1 to 8 chunks, then three of 8
+        self.assertEqual(self.endpoint.requests, 11)
+        self.assertEqual(embedder.batcher.requests, 11)
+
+    def test_aembed_list_uses_batches(self):
+        embedder = self.connect(CohereEmbedding(model_id="test_model", region="us-east-1"))
+        chunks = [Chunk(data=f"chunk {i}") for i in range(100)]
+        embedding_list = asyncio.run(embedder.aembed_list(chunks))
+        self.assertEqual(self.endpoint.requests, 2)
+        self.assertEqual([embedding.embeddings for embedding in embedding_list.embeddings],
+                         [fake_vector(chunk.data) for chunk in chunks])
+
+
+class CountingEmbedding(BaseEmbedding):
+    max_batch_size = 4
+
+    def __init__(self, model_id="counting", region="local", dimensions=8, normalize=True):
+        super().__init__(model_id, region, dimensions, normalize)
+        self.embedded = []
+
+    def _prepare_chunk(self, chunk):
+        return {}
+
+    def embed(self, chunk):
+        self.embedded.append(chunk.data)
+        return Embeddings(embeddings=fake_vector(chunk.data, self.dimension), metadata=EmbeddingMetadata(5, 20),
+                          text=chunk.data)
+
+
+class TestEmbedListDeduplication(unittest.TestCase):
+    def test_identical_texts_are_embedded_once(self):
+        embedder = CountingEmbedding()
+        parent = Chunk(data="header body")
+        parent.add_child(Chunk(data="header"))
+        parent.add_child(Chunk(data="body"))
+        chunks = [parent, Chunk(data="header"), Chunk(data="footer"), Chunk(data="header")]
+        embedding_list = embedder.embed_list(chunks)
+        self.assertEqual(embedder.embedded, ["header", "body", "footer"])
+        self.assertEqual([embedding.id for embedding in embedding_list.embeddings],
+                         [parent.id, parent.id, chunks[1].id, chunks[2].id, chunks[3].id])
+        self.assertEqual(embedding_list.embeddings[2].embeddings, embedding_list.embeddings[0].embeddings)
+        self.assertEqual(embedding_list.embeddings[2].text, "header")
+        self.assertEqual(embedding_list.metadata.input_tokens, 15)
+        self.assertEqual(embedding_list.metadata.requested_tokens, 25)
+        self.assertEqual(embedding_list.metadata.to_json()["requested_tokens"], 25)
+
+    def test_deduplication_can_be_disabled(self):
+        embedder = CountingEmbedding()
+        embedding_list = embedder.embed_list([Chunk(data="same"), Chunk(data="same")], deduplicate=False)
+        self.assertEqual(embedder.embedded, ["same", "same"])
+        self.assertEqual(embedding_list.metadata.requested_tokens, embedding_list.metadata.input_tokens)
+
+class TestArrayEmbeddingList(unittest.TestCase):
+    def test_embed_list_as_array(self):
+        embedder = CountingEmbedding()
+        chunks = [Chunk(data=f"chunk {i}") for i in range(10)] + [Chunk(data="chunk 0")]
+        expected = embedder.embed_list(chunks)
+        embedding_list = embedder.embed_list(chunks, as_array=True)
+        self.assertIsInstance(embedding_list, ArrayEmbeddingList)
+        self.assertEqual(embedding_list.vectors.dtype, np.float32)
+        self.assertEqual(embedding_list.vectors.shape, (11, 8))
+        self.assertEqual(embedding_list.ids, [chunk.id for chunk in chunks])
+        self.assertEqual(embedding_list.metadata.to_json(), expected.metadata.to_json())
+        self.assertEqual(embedding_list[-1].metadata.requested_tokens, 5)
+        np.testing.assert_allclose(embedding_list.vectors, [embedding.embeddings for embedding in expected.embeddings],
+                                   rtol=1e-6)
+        self.assertTrue(np.shares_memory(embedding_list[3].embeddings, embedding_list.vectors))
+
+    def test_grows_and_serializes_to_lists(self):
+        embedding_list = ArrayEmbeddingList(capacity=2)
+        for i in range(5):
+            embedding = Embeddings(embeddings=[float(i), 0.5], metadata=EmbeddingMetadata(1, 2), text=f"text {i}")
+            embedding.id = str(i)
+            embedding_list.append(embedding)
+        self.assertEqual(len(embedding_list), 5)
+        self.assertEqual(embedding_list.dimension, 2)
+        documents = embedding_list.to_json()
+        self.assertEqual(documents[4]["vectors"], [4.0, 0.5])
+        self.assertIsInstance(documents[4]["vectors"], list)
+        self.assertEqual([embedding.id for embedding in embedding_list.embeddings], ["0", "1", "2", "3", "4"])
+        with self.assertRaises(ValueError):
+            embedding_list.append(Embeddings(embeddings=[1.0], metadata=EmbeddingMetadata(0, 0), text=""))
+
+
+class TestQuantization(unittest.TestCase):
+    def setUp(self):
+        vectors = np.random.default_rng(0).standard_normal((200, 16)).astype(np.float32)
+        self.vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def test_float16_documents_are_short(self):
+        quantizer = Float16Quantizer()
+        embedding = Embeddings(embeddings=self.vectors[0], metadata=EmbeddingMetadata(1, 2), text="text")
+        vectors = embedding.to_json(quantizer)["vectors"]
+        np.testing.assert_array_equal(np.asarray(vectors, dtype=np.float16), self.vectors[0].astype(np.float16))
+        self.assertLess(len(json.dumps(vectors)), len(json.dumps(embedding.to_json()["vectors"])) / 2)
+
+    def test_int8_calibration(self):
+        for calibration in ("global", "per_dimension"):
+            quantizer = Int8Quantizer(calibration).fit(self.vectors)
+            codes = quantizer.quantize(self.vectors)
+            self.assertEqual(codes.dtype, np.int8)
+            self.assertEqual(int(np.abs(codes).max()), 127)
+            np.testing.assert_allclose(quantizer.dequantize(codes), self.vectors, atol=float(np.max(quantizer.scale)))
+        self.assertEqual(Int8Quantizer().fit(self.vectors).scale.ndim, 0)
+        self.assertEqual(Int8Quantizer("per_dimension").fit(self.vectors).scale.shape, (16,))
+        restored = Int8Quantizer(scale=Int8Quantizer().fit(self.vectors).scale)
+        self.assertEqual(restored.encode(self.vectors[0]), Int8Quantizer().fit(self.vectors).encode(self.vectors[0]))
+        with self.assertRaises(ValueError):
+            Int8Quantizer().quantize(self.vectors)
+
+    def test_binary_packs_sign_bits(self):
+        quantizer = BinaryQuantizer()
+        codes = quantizer.quantize(self.vectors)
+        self.assertEqual(codes.shape, (200, 2))
+        self.assertEqual(codes.dtype, np.int8)
+        np.testing.assert_array_equal(quantizer.dequantize(codes) > 0, self.vectors > 0)
+        self.assertEqual(quantizer.mapping(16)["data_type"], "binary")
+        with self.assertRaises(ValueError):
+            quantizer.mapping(16, "l2")
+        with self.assertRaises(ValueError):
+            quantizer.quantize(np.ones(12))
+
+    def test_array_embedding_list_quantized_documents(self):
+        embedding_list = ArrayEmbeddingList()
+        for i, vector in enumerate(self.vectors[:3]):
+            embedding_list.append(Embeddings(embeddings=vector, metadata=EmbeddingMetadata(1, 2), text=f"text {i}"))
+        quantizer = Int8Quantizer().fit(self.vectors)
+        documents = embedding_list.to_json(quantizer)
+        self.assertEqual([document["vectors"] for document in documents], quantizer.encode(self.vectors[:3]))
+
+
+class TestLocalHashEmbedding(unittest.TestCase):
+    def test_similar_texts_are_close(self):
+        embedder = LocalHashEmbedding(dimensions=64)
+        vectors = embedder.vectorize(["The quick brown fox", "the quick brown foxes", "Completely unrelated words"])
+        self.assertEqual(vectors.shape, (3, 64))
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1, rtol=1e-5)
+        self.assertGreater(vectors[0] @ vectors[1], 0.8)
+        self.assertLess(abs(vectors[0] @ vectors[2]), 0.3)
+
+    def test_batch_matches_single_embeddings(self):
+        embedder = LocalHashEmbedding()
+        chunks = [Chunk(data=f"chunk number {i}") for i in range(1000)] + [Chunk(data="")]
+        embedding_list = embedder.embed_list(chunks)
+        self.assertEqual(len(embedding_list.embeddings), 1001)
+        np.testing.assert_array_equal(embedding_list.embeddings[7].embeddings, embedder.embed(chunks[7]).embeddings)
+        np.testing.assert_array_equal(embedding_list.embeddings[-1].embeddings, np.zeros(256))
+        self.assertEqual(embedding_list.metadata.input_tokens,
+                         sum(embedder.tokenizer.count_tokens(chunk.data) for chunk in chunks))
+        self.assertFalse(np.any(LocalHashEmbedding(normalize=False).embed(chunks[7]).embeddings % 1))
+
+    def test_registered(self):
+        embedder = embedding_registry.get_model("local-hash-ngram")(dimensions=32, seed=1)
+        self.assertEqual(embedder.dimension, 32)
+        self.assertFalse(np.array_equal(embedder.vectorize(["text"]), LocalHashEmbedding(dimensions=32).vectorize(["text"])))
+
+
+class TestEmbeddingRegistry(unittest.TestCase):
+    def test_lazy_registration(self):
+        embedding_registry.register_model("lazy-local", "embedding.local_embedding:LocalHashEmbedding")
+        self.addCleanup(embedding_registry._models.pop, "lazy-local")
+        self.assertIn("lazy-local", embedding_registry.model_ids())
+        self.assertIs(embedding_registry.get_model("lazy-local"), LocalHashEmbedding)
+        self.assertIs(embedding_registry._models["lazy-local"], LocalHashEmbedding)
+        with self.assertRaises(ValueError):
+            embedding_registry.register_model("lazy-local", "embedding.local_embedding.LocalHashEmbedding")
+        embedding_registry.register_model("missing", "embedding.local_embedding:MissingEmbedding")
+        self.addCleanup(embedding_registry._models.pop, "missing")
+        with self.assertRaises(ValueError):
+            embedding_registry.get_model("missing")
+
+    def test_only_the_requested_provider_is_imported(self):
+        code = ("import sys\n"
+                "from embedding.embedding_registry import embedding_registry\n"
+                "embedding_registry.get_model('amazon.titan-embed-text-v2:0')\n"
+                "print(sorted(name for name in ('sagemaker', 'ollama', 'embedding.bge_large_embedding', "
+                "'embedding.cohere_embedding') if name in sys.modules))")
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        output = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.strip(), "[]")
+
+
+class SlowEmbedding(CountingEmbedding):
+    def embed(self, chunk):
+        time.sleep(0.01)
+        return super().embed(chunk)
+
+
+class TestEmbeddingStats(unittest.TestCase):
+    def test_embed_list_measures_requests(self):
+        embedder = SlowEmbedding()
+        embedder.max_workers = 4
+        embedding_list = embedder.embed_list([Chunk(data=f"chunk {i}") for i in range(40)])
+        stats = embedding_list.stats
+        self.assertEqual((stats.requests, stats.items, stats.input_tokens), (10, 40, 200))
+        self.assertEqual(stats.max_in_flight, 4)
+        self.assertEqual(stats.in_flight, 0)
+        percentiles = embedding_list.latency_percentiles()
+        self.assertGreaterEqual(percentiles[50], 35)
+        self.assertLessEqual(percentiles[50], percentiles[99])
+        self.assertGreater(embedding_list.tokens_per_second, 0)
+        self.assertEqual(sum(tokens for _, tokens in stats.throughput_timeline()), 200)
+
+        embedder.embed_list([Chunk(data="another chunk")])
+        self.assertEqual(embedder.stats.requests, 11)
+        self.assertEqual(embedder.stats.items, 41)
+
+    def test_stats_merge_across_processes(self):
+        embedder = CountingEmbedding()
+        first = embedder.embed_batch([Chunk(data=f"first {i}") for i in range(8)]).stats
+        second = embedder.embed_batch([Chunk(data=f"second {i}") for i in range(4)]).stats
+        merged = EmbeddingStats().merge(pickle.loads(pickle.dumps(first)))
+        merged.merge(EmbeddingStats.from_json(json.loads(json.dumps(second.to_json()))))
+        self.assertEqual(merged.to_json(), embedder.stats.to_json())
+        self.assertEqual(merged.summary()["requests"], 3)
+
+    def test_timeline_is_bounded(self):
+        stats = EmbeddingStats(timeline_seconds=3)
+        with mock.patch("embedding.embedding_stats.time.time") as clock:
+            for second, tokens in enumerate([10, 50, 20, 30, 40]):
+                clock.return_value = 1000 + second
+                stats.end(stats.begin(), 1, tokens)
+        self.assertEqual(stats.throughput_timeline(), [(1002, 20), (1003, 30), (1004, 40)])
+        self.assertEqual(stats.peak_tokens_per_second, 50)
+        merged = EmbeddingStats(timeline_seconds=3).merge(EmbeddingStats.from_json(stats.to_json()))
+        self.assertEqual(merged.summary()["peak_tokens_per_second"], 50)
+        self.assertEqual(len(merged.to_json()["tokens_by_second"]), 3)
+
+    def test_errors_are_counted(self):
+        chunks = [Chunk(data=f"chunk {i}") for i in range(8)]
+        embedder = FailingEmbedding("chunk 5")
+        with self.assertRaises(RuntimeError):
+            embedder.embed_list(chunks)
+        stats = embedder.stats
+        self.assertEqual((stats.requests, stats.errors, stats.items, stats.in_flight), (2, 1, 4, 0))
+        with self.assertRaises(RuntimeError):
+            asyncio.run(embedder.aembed_list(chunks))
+        self.assertEqual((stats.requests, stats.errors, stats.items), (4, 2, 8))
+
+    def test_failed_async_batch_sends_no_further_requests(self):
+        class AsyncFailingEmbedding(CountingEmbedding):
+            max_batch_size = 1
+
+            async def aembed(self, chunk):
+                self.embedded.append(chunk.data)
+                await asyncio.sleep(0.01)
+                if chunk.data == "chunk 2":
+                    raise RuntimeError("endpoint went away")
+                return Embeddings(embeddings=fake_vector(chunk.data, self.dimension),
+                                  metadata=EmbeddingMetadata(5, 20), text=chunk.data)
+
+        async def run(embedder):
+            with self.assertRaises(RuntimeError):
+                await embedder.aembed_batch([Chunk(data=f"chunk {i}") for i in range(40)])
+            sent = len(embedder.embedded)
+            await asyncio.sleep(0.05)
+            return sent
+
+        embedder = AsyncFailingEmbedding()
+        embedder.max_concurrency = 4
+        sent = asyncio.run(run(embedder))
+        self.assertEqual(len(embedder.embedded), sent)
+        # The requests in flight when the failure surfaced, and none after it
+        self.assertLess(sent, 2 * embedder.max_concurrency)
+        stats = embedder.stats
+        self.assertEqual((stats.requests, stats.in_flight), (sent, 0))
+        self.assertGreaterEqual(stats.errors, 1)
+
+    def test_async_in_flight(self):
+        embedder = SlowEmbedding()
+        embedder.max_concurrency = 3
+        embedding_list = asyncio.run(embedder.aembed_list([Chunk(data=f"chunk {i}") for i in range(12)]))
+        self.assertEqual(embedding_list.stats.requests, 3)
+        self.assertEqual(embedding_list.stats.max_in_flight, 3)
+
+
+class ThrottledEmbedding(CountingEmbedding):
+    def __init__(self):
+        super().__init__()
+        self.throttled = False
+        self.batch_sizes = []
+
+    @ImmediateRetryHandler()
+    def _embed_batch(self, chunks):
+        if not self.throttled:
+            self.throttled = True
+            raise ClientError({"Error": {"Code": "ThrottlingException", "Message": "slow down"}}, "InvokeModel")
+        self.batch_sizes.append(len(chunks))
+        return super()._embed_batch(chunks)
+
+
+class TestAdaptiveBatcher(unittest.TestCase):
+    def test_additive_increase_while_throughput_holds(self):
+        batcher = AdaptiveBatcher(max_batch_size=4)
+        for _ in range(5):
+            batcher.record(batcher.batch_size, 10 * batcher.batch_size, 10 * batcher.batch_size, 100)
+        self.assertEqual(batcher.batch_size, 4)
+        # A partial batch says nothing about larger ones
+        batcher = AdaptiveBatcher(max_batch_size=4)
+        batcher.record(1, 10, 10, 100)
+        batcher.record(1, 10, 10, 100)
+        self.assertEqual(batcher.batch_size, 2)
+        batcher.record(2, 20, 20, 100)
+        batcher.record(2, 20, 20, 100)
+        self.assertEqual(batcher.batch_size, 3)
+
+    def test_backs_off(self):
+        batcher = AdaptiveBatcher(max_batch_size=64, initial_batch_size=32, latency_target_ms=500)
+        batcher.record_throttle()
+        self.assertEqual(batcher.batch_size, 16)
+        batcher.record(16, 1600, 1600, 800)
+        self.assertEqual(batcher.batch_size, 8)
+        batcher.record(8, 800, 800, 100)
+        batcher.record(9, 90, 90, 100)
+        self.assertEqual(batcher.batch_size, 8)
+        for _ in range(10):
+            batcher.record_throttle()
+        self.assertEqual(batcher.batch_size, 1)
+        self.assertEqual(batcher.stats()["throttles"], 11)
+
+    def test_token_limit_follows_reported_tokens(self):
+        batcher = AdaptiveBatcher(max_batch_size=96, initial_batch_size=96, max_batch_tokens=100, smoothing=1.0)
+        embedder = CountingEmbedding()
+        embedder.max_batch_size = 96
+        embedder.batcher = batcher
+        chunks = [Chunk(data="x" * 40) for _ in range(10)]
+        self.assertEqual([len(batch) for batch in embedder._batches(chunks)], [10])
+        batcher.record(1, 10, 20, 100)
+        self.assertEqual(batcher.batch_token_limit, 50)
+        self.assertEqual([len(batch) for batch in embedder._batches(chunks)], [5, 5])
+
+    def test_throttling_shrinks_batches(self):
+        embedder = ThrottledEmbedding()
+        embedder.batcher = AdaptiveBatcher(max_batch_size=4, initial_batch_size=4)
+        embedding_list = embedder.embed_list([Chunk(data=f"chunk {i}") for i in range(8)])
+        self.assertEqual(len(embedding_list.embeddings), 8)
+        self.assertEqual(embedder.batcher.throttles, 1)
+        # The throttled batch is retried whole; the next ones start from half its size
+        self.assertEqual(embedder.batch_sizes, [4, 3])
+        self.assertEqual(embedder.batcher.requests, 3)
+        self.assertEqual(embedding_list.stats.throttles, 1)
+        self.assertEqual(embedding_list.stats.requests, 3)
+
+
+class TestProjectedEmbedding(unittest.TestCase):
+    def test_pca_keeps_a_low_rank_sample(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((100, 4)) @ rng.standard_normal((4, 16)) + 3.0
+        projection = Projection.fit_pca(vectors, 4)
+        self.assertAlmostEqual(float(projection.explained_variance_ratio.sum()), 1.0, places=5)
+        projected = projection.apply(vectors, normalize=False)
+        self.assertEqual(projected.shape, (100, 4))
+        # Distances between vectors are preserved when the sample has no more dimensions
+        np.testing.assert_allclose(np.linalg.norm(projected[0] - projected[1]),
+                                   np.linalg.norm(vectors[0] - vectors[1]), rtol=1e-4)
+        np.testing.assert_allclose(np.linalg.norm(projection.apply(vectors), axis=1), 1, rtol=1e-5)
+        with self.assertRaises(ValueError):
+            Projection.fit_pca(vectors[:3], 4)
+        with self.assertRaises(ValueError):
+            projection.apply(np.ones(8))
+
+    def test_save_and_load(self):
+        projection = Projection.fit_pca(np.random.default_rng(1).standard_normal((50, 8)), 3)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "projection.npz")
+            projection.save(path)
+            loaded = Projection.load(path)
+        vectors = np.random.default_rng(2).standard_normal((5, 8))
+        np.testing.assert_array_equal(loaded.apply(vectors), projection.apply(vectors))
+        np.testing.assert_array_equal(loaded.explained_variance_ratio, projection.explained_variance_ratio)
+
+    def test_truncation(self):
+        vector = np.arange(1, 9, dtype=np.float32)
+        np.testing.assert_allclose(Projection.truncation(8, 2).apply(vector), [1 / np.sqrt(5), 2 / np.sqrt(5)])
+
+    def test_wraps_an_embedder(self):
+        base = LocalHashEmbedding(dimensions=32)
+        sample = [Chunk(data=f"sample sentence number {i}") for i in range(40)]
+        embedder = ProjectedEmbedding.fit(base, sample, dimensions=8)
+        self.assertEqual(embedder.dimension, 8)
+        chunks = [Chunk(data="first text"), Chunk(data="second text"), Chunk(data="first text")]
+        embedding_list = embedder.embed_list(chunks)
+        self.assertEqual([embedding.id for embedding in embedding_list.embeddings], [chunk.id for chunk in chunks])
+        self.assertEqual(embedding_list.embeddings[0].embeddings.shape, (8,))
+        np.testing.assert_allclose(embedding_list.embeddings[0].embeddings, embedder.embed(chunks[0]).embeddings,
+                                   rtol=1e-5)
+        np.testing.assert_array_equal(embedding_list.embeddings[2].embeddings, embedding_list.embeddings[0].embeddings)
+        self.assertEqual(embedding_list.metadata.requested_tokens,
+                         sum(base.tokenizer.count_tokens(chunk.data) for chunk in chunks))
+        self.assertEqual(embedding_list.stats.requests, 1)
+        asynchronous = asyncio.run(embedder.aembed_list(chunks))
+        np.testing.assert_allclose(asynchronous.embeddings[1].embeddings, embedding_list.embeddings[1].embeddings,
+                                   rtol=1e-5)
+
+
+class TestCachedEmbedding(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "embeddings.sqlite")
+        self.cache = EmbeddingCache(self.path)
+        self.addCleanup(self.cache.close)
+
+    def test_hits_skip_the_model(self):
+        base = CountingEmbedding()
+        embedder = CachedEmbedding(base, self.cache)
+        chunks = [Chunk(data=text) for text in ["a b", "c d", "a b", "e f"]]
+        first = embedder.embed_list(chunks)
+        self.assertEqual(base.embedded, ["a b", "c d", "e f"])
+        self.assertEqual(first.metadata.input_tokens, 15)
+
+        reopened = EmbeddingCache(self.path)
+        self.addCleanup(reopened.close)
+        second = CachedEmbedding(base, reopened).embed_list(chunks)
+        self.assertEqual(len(base.embedded), 3)
+        self.assertEqual(second.metadata.input_tokens, 0)
+        self.assertEqual(second.metadata.latency_ms, 0)
+        self.assertEqual([embedding.id for embedding in second.embeddings], [chunk.id for chunk in chunks])
+        for cached, embedded in zip(second.embeddings, first.embeddings):
+            self.assertEqual(len(cached.embeddings), 8)
+            # Misses are rounded to the stored float32 values, so hits return the same vector
+            self.assertEqual(cached.embeddings, embedded.embeddings)
+        self.assertEqual((embedder.stats.requests, embedder.stats.items), (1, 3))
+
+    def test_key_includes_model_parameters(self):
+        chunks = [Chunk(data="same text")]
+        CachedEmbedding(CountingEmbedding(dimensions=8), self.cache).embed_list(chunks)
+        base = CountingEmbedding(dimensions=4)
+        CachedEmbedding(base, self.cache).embed_list(chunks)
+        self.assertEqual(base.embedded, ["same text"])
+
+    def test_lru_eviction_and_stats(self):
+        cache = EmbeddingCache(os.path.join(os.path.dirname(self.path), "small.sqlite"), max_entries=2)
+        self.addCleanup(cache.close)
+        embedder = CachedEmbedding(CountingEmbedding(), cache)
+        embedder.embed(Chunk(data="one"))
+        embedder.embed(Chunk(data="two"))
+        embedder.embed(Chunk(data="one"))
+        embedder.embed(Chunk(data="three"))
+        self.assertEqual(len(cache), 2)
+        self.assertIn(embedder.cache_key("one"), cache.get_many([embedder.cache_key("one")]))
+        self.assertEqual(cache.get_many([embedder.cache_key("two")]), {})
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (2, 4, 1))
+
+    def test_registry_wraps_models(self):
+        embedding_registry.register_model("counting", CountingEmbedding)
+        self.addCleanup(embedding_registry._models.pop, "counting")
+        embedding_registry.enable_cache(os.path.join(os.path.dirname(self.path), "registry.sqlite"))
+        self.addCleanup(embedding_registry.disable_cache)
+        embedder = embedding_registry.get_model("counting")("counting", "local")
+        self.assertIsInstance(embedder, CachedEmbedding)
+        self.assertIsInstance(embedder.base_embedding, CountingEmbedding)
+
+
+class FailingEmbedding(CountingEmbedding):
+
+    def __init__(self, fail_on):
+        super().__init__()
+        self.fail_on = fail_on
+
+    def embed(self, chunk):
+        if chunk.data == self.fail_on:
+            raise RuntimeError("endpoint went away")
+        return super().embed(chunk)
+
+
+class TestEmbeddingJob(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = StorageCheckpointStore(LocalStorageProvider(), os.path.join(directory.name, "checkpoints"))
+        self.chunks = [Chunk(data=f"chunk {i}") for i in range(7)]
+
+    def test_resumes_completed_batches(self):
+        job = EmbeddingJob(FailingEmbedding("chunk 4"), self.store, "job", batch_size=2)
+        with self.assertRaises(RuntimeError):
+            job.run(self.chunks)
+        self.assertEqual(job.embedded_batches, 2)
+
+        embedder = CountingEmbedding()
+        job = EmbeddingJob(embedder, self.store, "job", batch_size=2)
+        result = job.run(self.chunks)
+        self.assertEqual(embedder.embedded, ["chunk 4", "chunk 5", "chunk 6"])
+        self.assertEqual((job.resumed_batches, job.embedded_batches), (2, 2))
+        self.assertEqual([embedding.id for embedding in result.embeddings], [chunk.id for chunk in self.chunks])
+        self.assertEqual([embedding.text for embedding in result.embeddings], [chunk.data for chunk in self.chunks])
+        expected = CountingEmbedding().embed_list(self.chunks)
+        for resumed, embedded in zip(result.embeddings, expected.embeddings):
+            np.testing.assert_allclose(resumed.embeddings, embedded.embeddings, rtol=1e-6)
+            self.assertEqual(resumed.metadata.input_tokens, embedded.metadata.input_tokens)
+
+    def test_reembeds_truncated_checkpoints(self):
+        EmbeddingJob(CountingEmbedding(), self.store, "job", batch_size=2).run(self.chunks)
+        path = self.store._path("job-batch-00000001")
+        with open(path, "rb") as file:
+            data = file.read()
+        with open(path, "wb") as file:
+            file.write(data[:len(data) // 2])
+        embedder = CountingEmbedding()
+        job = EmbeddingJob(embedder, self.store, "job", batch_size=2)
+        self.assertEqual(len(job.run(self.chunks).embeddings), 7)
+        self.assertEqual(embedder.embedded, ["chunk 2", "chunk 3"])
+        self.assertEqual((job.resumed_batches, job.embedded_batches), (3, 1))
+        self.assertFalse(any(name.endswith(".tmp") for name in os.listdir(self.store.prefix)))
+        job = EmbeddingJob(CountingEmbedding(), self.store, "job", batch_size=2)
+        job.run(self.chunks)
+        self.assertEqual(job.resumed_batches, 4)
+
+    def test_shards_split_the_batches(self):
+        ids = []
+        for shard_index in range(2):
+            embedder = CountingEmbedding()
+            job = EmbeddingJob(embedder, self.store, "job", batch_size=2, shard_index=shard_index, num_shards=2)
+            ids.extend(embedding.id for embedding in job.run(self.chunks, as_array=True).embeddings)
+            self.assertEqual(job.resumed_batches, 0)
+        self.assertCountEqual(ids, [chunk.id for chunk in self.chunks])
+        job = EmbeddingJob(CountingEmbedding(), self.store, "job", batch_size=2)
+        job.run(self.chunks)
+        self.assertEqual((job.resumed_batches, job.embedded_batches), (4, 0))
+
+    def test_rejects_checkpoints_of_other_chunks(self):
+        EmbeddingJob(CountingEmbedding(), self.store, "job", batch_size=2).run(self.chunks)
+        changed = [Chunk(data="edited")] + self.chunks[1:]
+        with self.assertRaises(ValueError):
+            EmbeddingJob(CountingEmbedding(), self.store, "job", batch_size=2).run(changed)
+        with self.assertRaises(ValueError):
+            EmbeddingJob(CountingEmbedding(dimensions=4), self.store, "job", batch_size=2).run(self.chunks)
+
+    @mock_aws
+    def test_dynamodb_store(self):
+        boto3.client("dynamodb", region_name="us-east-1").create_table(
+            TableName="checkpoints", KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}], BillingMode="PAY_PER_REQUEST")
+        store = DynamoDBCheckpointStore(DynamoDB("checkpoints"))
+        self.assertIsNone(store.load("job-batch-00000000"))
+        EmbeddingJob(CountingEmbedding(), store, "job", batch_size=4).run(self.chunks)
+        embedder = CountingEmbedding()
+        job = EmbeddingJob(embedder, store, "job", batch_size=4)
+        self.assertEqual(len(job.run(self.chunks).embeddings), 7)
+        self.assertEqual((job.resumed_batches, embedder.embedded), (2, []))
+        with self.assertRaises(ValueError):
+            store.save("too-large", bytes(store.max_item_bytes + 1))
+
+
 if __name__ == '__main__':
     unittest.main()
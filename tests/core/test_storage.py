@@ -1,6 +1,10 @@
 import unittest
-from unittest.mock import patch, mock_open
+from unittest.mock import MagicMock, patch, mock_open
 
+from chunking.chunking import Chunk
+from embedding.embedding import EmbeddingMetadata, Embeddings
+from embedding.quantization import Int8Quantizer
+from storage.db.vector.open_search import OpenSearchClient
 from storage.local_storage import LocalStorageProvider
 from storage.s3_storage import S3StorageProvider
 from testcontainers.minio import MinioContainer
@@ -39,6 +43,44 @@ class TestS3StorageProvider(unittest.TestCase):
         self.mock_s3_client.put_object.assert_called_once_with(Bucket='test_bucket', Key='/tmp/test_path.data',
                                                                Body='test_data')
 
+class TestS3DirectoryRead(unittest.TestCase):
+
+    def setUp(self):
+        mock = mock_aws()
+        mock.start()
+        self.addCleanup(mock.stop)
+        self.s3_client = boto3.client('s3', region_name='us-east-1')
+        self.s3_client.create_bucket(Bucket='test-bucket')
+        self.files = [f'file {i}'.encode() for i in range(7)]
+        for i, data in enumerate(self.files):
+            self.s3_client.put_object(Bucket='test-bucket', Key=f'docs/{i:03d}.txt', Body=data)
+        self.s3_client.put_object(Bucket='test-bucket', Key='docs/sub/', Body=b'')
+        self.s3_client.put_object(Bucket='test-bucket', Key='other.txt', Body=b'other')
+
+    def test_reads_every_page_in_key_order(self):
+        provider = S3StorageProvider('test-bucket', s3_client=self.s3_client, max_concurrency=3, page_size=2)
+        self.assertEqual(list(provider.read('docs')), self.files)
+
+    def test_reads_as_completed(self):
+        provider = S3StorageProvider('test-bucket', s3_client=self.s3_client, max_concurrency=4, ordered=False)
+        self.assertCountEqual(list(provider.read('docs/')), self.files)
+
+    def test_prefetch_bounds_downloads(self):
+        provider = S3StorageProvider('test-bucket', s3_client=self.s3_client, max_concurrency=2, prefetch=3)
+        with patch.object(provider, '_get_object', wraps=provider._get_object) as get_object:
+            reader = provider.read('docs')
+            self.assertEqual(next(reader), self.files[0])
+            reader.close()
+            # At most prefetch files are requested before the reader stops
+            self.assertLessEqual(get_object.call_count, 3)
+        with self.assertRaises(ValueError):
+            S3StorageProvider('test-bucket', s3_client=self.s3_client, max_concurrency=4, prefetch=2)
+
+    def test_single_file(self):
+        provider = S3StorageProvider('test-bucket', s3_client=self.s3_client)
+        self.assertEqual(list(provider.read('other.txt')), [b'other'])
+
+
 # class TestS3StorageContainer(unittest.TestCase):
     # Use testcontainer and test the S3StorageProvider
     class TestS3StorageContainer(unittest.TestCase):
@@ -67,6 +109,41 @@ class TestS3StorageProvider(unittest.TestCase):
             self.provider.write('/tmp/test_path.data', 'this is a test data')
 
 
+class TestOpenSearchQueryCache(unittest.TestCase):
+
+    @patch('storage.db.vector.open_search.OpenSearch')
+    def setUp(self, mock_opensearch):
+        self.embedder = MagicMock(model_id='model', dimension=3, normalize=True)
+        self.embedder.embed.side_effect = lambda chunk: Embeddings([0.1, 0.2, 0.3], EmbeddingMetadata(4, 30), chunk.data)
+        self.storage = OpenSearchClient('localhost', 9200, 'user', 'password', 'index', embedder=self.embedder)
+        self.storage.client.indices.get_mapping.return_value = {
+            'index': {'mappings': {'properties': {'vectors': {'type': 'knn_vector'}}}}}
+        self.storage.client.search.return_value = {'hits': {'hits': [
+            {'_id': '1', '_source': {'text': 'answer', 'vectors': [0.1, 0.2, 0.3], 'metadata': {}}}]}}
+
+    def test_repeated_queries_are_embedded_once(self):
+        first = self.storage.search(Chunk('What is RAG?'), knn=3)
+        second = self.storage.search(Chunk(' What is  RAG? '), knn=5)
+        self.assertEqual(self.embedder.embed.call_count, 1)
+        self.assertEqual(first.metadata['embedding_metadata'].input_tokens, 4)
+        self.assertEqual(second.metadata['embedding_metadata'].input_tokens, 0)
+        self.assertEqual(second.result[0].text, 'answer')
+        query = self.storage.client.search.call_args.kwargs['body']['query']['knn']['vectors']
+        self.assertEqual(query, {'vector': [0.1, 0.2, 0.3], 'k': 5})
+        self.assertEqual(self.storage.query_cache.hit_rate, 0.5)
+
+    def test_embedder_settings_are_part_of_the_key(self):
+        self.storage.search(Chunk('What is RAG?'), knn=3)
+        self.embedder.dimension = 256
+        self.storage.search(Chunk('What is RAG?'), knn=3)
+        self.assertEqual(self.embedder.embed.call_count, 2)
+
+    def test_query_vector_is_quantized(self):
+        self.storage.quantizer = Int8Quantizer(scale=0.3 / 127)
+        self.storage.search(Chunk('What is RAG?'), knn=3)
+        query = self.storage.client.search.call_args.kwargs['body']['query']['knn']['vectors']
+        self.assertEqual(query['vector'], [42, 85, 127])
+
 # class TestPDFReader(unittest.TestCase):
 #
 #     @patch('storage.storage.PdfReader')
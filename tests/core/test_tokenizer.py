@@ -0,0 +1,119 @@
+import json
+import os
+import pickle
+import tempfile
+import unittest
+
+from chunking.chunking_provider_factory import ChunkingFactory
+from chunking.token_chunking import TokenChunker
+from tokenizer.bpe_tokenizer import BPETokenizer
+from tokenizer.tokenizer import CharacterRatioTokenizer
+from tokenizer.tokenizer_factory import TokenizerFactory
+from tokenizer.wordpiece_tokenizer import WordPieceTokenizer
+
+
+class TestCharacterRatioTokenizer(unittest.TestCase):
+    def test_count_tokens(self):
+        tokenizer = CharacterRatioTokenizer()
+        self.assertEqual(tokenizer.count_tokens("abcdefghi"), 3)
+        self.assertEqual(len(tokenizer.tokenize("abcdefghi")), 3)
+        self.assertEqual(tokenizer.count_tokens("a"), 1)
+        self.assertEqual(tokenizer.count_tokens(""), 0)
+
+    def test_token_chunker_limits_short_words(self):
+        chunker = ChunkingFactory.create_chunker('token', 10, 10,
+                                                 tokenizer=TokenizerFactory.create_tokenizer('character'))
+        tokenizer = CharacterRatioTokenizer()
+        chunks = chunker.chunk('the cat sat on a mat and ran far ' * 200)
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(sum(tokenizer.count_tokens(word) for word in chunk.data.split(' ')), 10)
+
+    def test_invalid_ratio(self):
+        with self.assertRaises(ValueError):
+            CharacterRatioTokenizer(0)
+
+
+class TestWordPieceTokenizer(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        vocab_path = os.path.join(self.temp_dir.name, "vocab.txt")
+        with open(vocab_path, "w", encoding="utf-8") as file:
+            file.write("\n".join(["[UNK]", "un", "##aff", "##able", "the", "cafe", ",", "数", "据"]))
+        self.tokenizer = WordPieceTokenizer(vocab_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_tokenize(self):
+        self.assertEqual(self.tokenizer.tokenize("The unaffable, Café 数据 xyz"),
+                         ["the", "un", "##aff", "##able", ",", "cafe", "数", "据", "[UNK]"])
+        self.assertEqual(self.tokenizer.encode("the unaffable"), [4, 1, 2, 3])
+
+    def test_count_tokens_is_cached(self):
+        self.tokenizer.count_tokens("the unaffable")
+        self.tokenizer.count_tokens("the unaffable")
+        self.assertEqual(self.tokenizer.cache_info().hits, 1)
+
+    def test_pickle(self):
+        tokenizer = pickle.loads(pickle.dumps(self.tokenizer))
+        self.assertEqual(tokenizer.count_tokens("the unaffable"), 4)
+
+
+class TestBPETokenizer(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        vocab_path = os.path.join(self.temp_dir.name, "vocab.json")
+        merges_path = os.path.join(self.temp_dir.name, "merges.txt")
+        tokens = ["l", "o", "w", "e", "r", "Ġ", "lo", "low", "er", "Ġlow", "Ġlower"]
+        with open(vocab_path, "w", encoding="utf-8") as file:
+            json.dump({token: index for index, token in enumerate(tokens)}, file)
+        with open(merges_path, "w", encoding="utf-8") as file:
+            file.write("#version: 0.2\nl o\nlo w\ne r\nĠ low\nĠlow er\n")
+        self.tokenizer = TokenizerFactory.create_tokenizer("bpe", vocab_path, merges_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_tokenize(self):
+        self.assertIsInstance(self.tokenizer, BPETokenizer)
+        self.assertEqual(self.tokenizer.tokenize("lower lower low"), ["low", "er", "Ġlower", "Ġlow"])
+        self.assertEqual(self.tokenizer.count_tokens("lower lower low"), 4)
+
+
+class TestTokenChunker(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        vocab_path = os.path.join(self.temp_dir.name, "vocab.txt")
+        with open(vocab_path, "w", encoding="utf-8") as file:
+            file.write("\n".join(["[UNK]", "un", "##aff", "##able", "the", "cafe", "."]))
+        self.tokenizer = WordPieceTokenizer(vocab_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_chunks_respect_token_limit(self):
+        chunker = TokenChunker(5, 40, self.tokenizer)
+        data = "the unaffable cafe. " * 10
+        chunks = chunker.chunk(data)
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(self.tokenizer.count_tokens(chunk.data), 5)
+        covered = " ".join(chunk.data for chunk in chunks)
+        self.assertEqual(set(covered.split()), set(data.split()))
+
+    def test_chunks_overlap(self):
+        chunker = TokenChunker(5, 40, self.tokenizer)
+        chunks = chunker.chunk("the cafe the cafe the cafe the cafe")
+        self.assertEqual([chunk.data for chunk in chunks],
+                         ["the cafe the cafe the", "cafe the cafe the cafe"])
+
+    def test_factory(self):
+        chunker = ChunkingFactory.create_chunker("token", 5, 0, tokenizer=self.tokenizer)
+        self.assertIsInstance(chunker, TokenChunker)
+        with self.assertRaises(ValueError):
+            ChunkingFactory.create_chunker("token", 5, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
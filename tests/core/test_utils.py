@@ -0,0 +1,184 @@
+import asyncio
+import threading
+import unittest
+
+import botocore.exceptions
+
+from tests.core.helpers import ImmediateRetryHandler
+from utils.latency_histogram import LatencyHistogram
+from utils.lru_cache import LRUCache
+from utils.rate_limiter import RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        with self.lock:
+            self.now += seconds
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_requests_per_minute(self):
+        limiter = RateLimiter(requests_per_minute=60, clock=self.clock, sleep=self.clock.sleep)
+        waits = [limiter.acquire() for _ in range(70)]
+        # The first minute of budget is available at once, then one request per second
+        self.assertEqual(waits[:60], [0] * 60)
+        self.assertTrue(all(abs(wait - 1) < 1e-9 for wait in waits[60:]))
+        self.assertAlmostEqual(self.clock.now, 10)
+
+    def test_tokens_per_minute(self):
+        limiter = RateLimiter(tokens_per_minute=600, clock=self.clock, sleep=self.clock.sleep)
+        self.assertEqual(limiter.acquire(600), 0)
+        self.assertAlmostEqual(limiter.acquire(100), 10)
+        # A request larger than the bucket is delayed, not rejected
+        self.assertAlmostEqual(limiter.acquire(1200), 120)
+
+    def test_refills_over_time(self):
+        limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=100, clock=self.clock, sleep=self.clock.sleep)
+        limiter.acquire(50)
+        limiter.acquire(50)
+        self.clock.now += 60
+        self.assertEqual(limiter.acquire(100), 0)
+
+    def test_invalid_limits(self):
+        with self.assertRaises(ValueError):
+            RateLimiter(requests_per_minute=0)
+
+
+class TestLRUCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertEqual((cache.get("a"), cache.get("b"), cache.get("c")), (1, None, 3))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_entries_expire(self):
+        cache = LRUCache(maxsize=10, ttl=60, clock=self.clock)
+        cache.put("a", 1)
+        self.clock.now = 59
+        self.assertIn("a", cache)
+        self.assertEqual(cache.get("a"), 1)
+        self.clock.now = 60
+        self.assertNotIn("a", cache)
+        self.assertIsNone(cache.get("a"))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["expirations"], stats["size"]), (1, 1, 1, 0))
+        self.assertEqual(cache.hit_rate, 0.5)
+
+    def test_concurrent_access(self):
+        cache = LRUCache(maxsize=50)
+
+        def work(offset):
+            for i in range(2000):
+                cache.put((offset + i) % 100, i)
+                cache.get((offset + i * 7) % 100)
+
+        threads = [threading.Thread(target=work, args=(offset,)) for offset in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(cache), 50)
+        self.assertEqual(cache.hits + cache.misses, 16000)
+
+    def test_invalid_ttl(self):
+        with self.assertRaises(ValueError):
+            LRUCache(ttl=0)
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles_within_relative_error(self):
+        histogram = LatencyHistogram(relative_error=0.01)
+        values = [float(value) for value in range(1, 10001)]
+        for value in values:
+            histogram.record(value)
+        for percentile, expected in ((50, 5000.5), (95, 9500.05), (99, 9900.01)):
+            self.assertAlmostEqual(histogram.percentile(percentile), expected, delta=expected * 0.01)
+        self.assertEqual(histogram.percentile(0), 1.0)
+        self.assertEqual(histogram.percentile(100), 10000.0)
+        self.assertEqual(histogram.mean, 5000.5)
+        self.assertLess(len(histogram.to_json()["buckets"]), 500)
+
+    def test_merge_and_round_trip(self):
+        first, second, combined = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        for value in range(100):
+            (first if value % 2 else second).record(value)
+            combined.record(value)
+        first.merge(LatencyHistogram.from_json(second.to_json()))
+        self.assertEqual(first.to_json(), combined.to_json())
+        self.assertEqual(first.percentile(0), 0.0)
+        self.assertEqual(LatencyHistogram().percentile(99), 0.0)
+        with self.assertRaises(ValueError):
+            first.merge(LatencyHistogram(relative_error=0.05))
+
+
+class TestBotoRetryHandler(unittest.TestCase):
+    def test_retries_coroutines(self):
+        calls = []
+
+        @ImmediateRetryHandler()
+        async def invoke(code):
+            calls.append(code)
+            if len(calls) < 3:
+                raise botocore.exceptions.ClientError({"Error": {"Code": code}}, "InvokeModel")
+            return "ok"
+
+        self.assertEqual(asyncio.run(invoke("ThrottlingException")), "ok")
+        self.assertEqual(len(calls), 3)
+        calls.clear()
+        with self.assertRaises(botocore.exceptions.ClientError):
+            asyncio.run(invoke("ValidationException"))
+        self.assertEqual(len(calls), 1)
+
+    def test_notifies_the_retried_object(self):
+        class Client:
+            def __init__(self):
+                self.errors = []
+                self.calls = 0
+
+            def on_retryable_error(self, error_code):
+                self.errors.append(error_code)
+
+            def fail_twice(self, code):
+                self.calls += 1
+                if self.calls < 3:
+                    raise botocore.exceptions.ClientError({"Error": {"Code": code}}, "InvokeModel")
+                return "ok"
+
+            @ImmediateRetryHandler()
+            def invoke(self, code):
+                return self.fail_twice(code)
+
+            @ImmediateRetryHandler()
+            async def ainvoke(self, code):
+                return self.fail_twice(code)
+
+        client = Client()
+        self.assertEqual(client.invoke("ThrottlingException"), "ok")
+        self.assertEqual(client.errors, ["ThrottlingException"] * 2)
+        client = Client()
+        self.assertEqual(asyncio.run(client.ainvoke("ThrottlingException")), "ok")
+        self.assertEqual(client.errors, ["ThrottlingException"] * 2)
+        client = Client()
+        with self.assertRaises(botocore.exceptions.ClientError):
+            client.invoke("ValidationException")
+        self.assertEqual(client.errors, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import json
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from .tokenizer import BaseTokenizer
+
+# Approximation of the GPT-2 pre-tokenization pattern using the re module:
+# contractions, letters, digits, other symbols, each with an optional leading space.
+_PRETOKENIZE_PATTERN = re.compile(
+    r"""'s|'t|'re|'ve|'m|'ll|'d| ?[^\W\d_]+| ?\d+| ?(?:[^\s\w]|_)+|\s+(?!\S)|\s+"""
+)
+
+
+def _bytes_to_unicode() -> Dict[int, str]:
+    """
+    Maps every byte to a printable unicode character, as in GPT-2's byte-level BPE.
+    """
+    printable = list(range(ord("!"), ord("~") + 1)) + list(range(ord("¡"), ord("¬") + 1)) + \
+        list(range(ord("®"), ord("ÿ") + 1))
+    characters = printable[:]
+    extra = 0
+    for byte in range(256):
+        if byte not in printable:
+            printable.append(byte)
+            characters.append(256 + extra)
+            extra += 1
+    return dict(zip(printable, map(chr, characters)))
+
+
+class BPETokenizer(BaseTokenizer):
+    """
+    Byte-level BPE tokenizer as used by GPT-2 and RoBERTa style models, loaded from a
+    local vocab.json (token to id) and merges.txt (one merge per line) pair of files.
+    :param vocab_path: The path of the vocabulary file.
+    :param merges_path: The path of the merges file.
+    :param cache_size: The maximum number of cached words and token counts.
+    """
+
+    def __init__(self, vocab_path: str, merges_path: str, cache_size: int = 65536):
+        super().__init__(cache_size)
+        with open(vocab_path, "r", encoding="utf-8") as file:
+            self.vocab: Dict[str, int] = json.load(file)
+        self.merge_ranks = self._load_merges(merges_path)
+        self.byte_encoder = _bytes_to_unicode()
+
+    def _init_caches(self):
+        super()._init_caches()
+        self._tokenize_word = lru_cache(maxsize=self.cache_size)(self._bpe)
+
+    @staticmethod
+    def _load_merges(merges_path: str) -> Dict[Tuple[str, str], int]:
+        ranks = {}
+        with open(merges_path, "r", encoding="utf-8") as file:
+            for line in file:
+                line = line.rstrip("\n")
+                if not line or line.startswith("#version"):
+                    continue
+                first, second = line.split(" ")
+                ranks[(first, second)] = len(ranks)
+        return ranks
+
+    def tokenize(self, text: str) -> List[str]:
+        tokens = []
+        for word in _PRETOKENIZE_PATTERN.findall(text):
+            tokens.extend(self._tokenize_word("".join(self.byte_encoder[byte] for byte in word.encode("utf-8"))))
+        return tokens
+
+    def encode(self, text: str) -> List[int]:
+        return [self.vocab[token] for token in self.tokenize(text) if token in self.vocab]
+
+    def _bpe(self, word: str) -> tuple:
+        parts = list(word)
+        while len(parts) > 1:
+            pairs = zip(parts, parts[1:])
+            best = min(pairs, key=lambda pair: self.merge_ranks.get(pair, float("inf")))
+            if best not in self.merge_ranks:
+                break
+            merged = []
+            i = 0
+            while i < len(parts):
+                if i < len(parts) - 1 and (parts[i], parts[i + 1]) == best:
+                    merged.append(parts[i] + parts[i + 1])
+                    i += 2
+                else:
+                    merged.append(parts[i])
+                    i += 1
+            parts = merged
+        return tuple(parts)
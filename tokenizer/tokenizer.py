@@ -0,0 +1,83 @@
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import List
+
+
+class BaseTokenizer(ABC):
+    """
+    Abstract base class for tokenizers used to size chunks and to account for tokens.
+    Token counts are memoised in an LRU cache, since the same words and texts are
+    counted repeatedly while chunking and embedding a corpus.
+    """
+
+    def __init__(self, cache_size: int = 65536):
+        """
+        Constructs a new BaseTokenizer object.
+        Args:
+            cache_size (int): The maximum number of texts whose token counts are cached.
+        """
+        super().__init__()
+        self.cache_size = cache_size
+        self._init_caches()
+
+    def _init_caches(self):
+        """
+        Creates the caches. Subclasses that cache more than token counts extend this.
+        """
+        self.count_tokens = lru_cache(maxsize=self.cache_size)(self._count_tokens)
+
+    def __getstate__(self):
+        # Caches wrap bound methods and cannot be pickled; they are rebuilt on load
+        return {key: value for key, value in self.__dict__.items() if not hasattr(value, 'cache_info')}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_caches()
+
+    @abstractmethod
+    def tokenize(self, text: str) -> List[str]:
+        """
+        Splits the input text into tokens.
+        Args:
+            text (str): The input text.
+        Returns:
+            List[str]: The tokens.
+        """
+        pass
+
+    def _count_tokens(self, text: str) -> int:
+        """
+        Counts the tokens in the input text. Called through the count_tokens cache.
+        Args:
+            text (str): The input text.
+        Returns:
+            int: The number of tokens.
+        """
+        return len(self.tokenize(text))
+
+    def cache_info(self):
+        """
+        Returns the hit and miss statistics of the token count cache.
+        """
+        return self.count_tokens.cache_info()
+
+
+class CharacterRatioTokenizer(BaseTokenizer):
+    """
+    Estimates tokens from the number of characters. This is the heuristic used when
+    no vocabulary is available.
+    :param chars_per_token: The average number of characters per token.
+    """
+
+    def __init__(self, chars_per_token: int = 4, cache_size: int = 0):
+        super().__init__(cache_size)
+        if chars_per_token <= 0:
+            raise ValueError("chars_per_token must be positive")
+        self.chars_per_token = chars_per_token
+
+    def tokenize(self, text: str) -> List[str]:
+        return [text[i:i + self.chars_per_token] for i in range(0, len(text), self.chars_per_token)]
+
+    def _count_tokens(self, text: str) -> int:
+        # Rounded up, to equal len(tokenize(text)): a short word is one token, not none
+        return -(-len(text) // self.chars_per_token)
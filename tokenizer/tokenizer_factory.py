@@ -0,0 +1,24 @@
+from tokenizer.bpe_tokenizer import BPETokenizer
+from tokenizer.tokenizer import BaseTokenizer, CharacterRatioTokenizer
+from tokenizer.wordpiece_tokenizer import WordPieceTokenizer
+
+
+class TokenizerFactory:
+    """
+    Factory to create tokenizers from local vocabulary files.
+    """
+    @staticmethod
+    def create_tokenizer(tokenizer_type: str = "character", vocab_path: str = None, merges_path: str = None,
+                         cache_size: int = 65536) -> BaseTokenizer:
+        if tokenizer_type.lower() == "character":
+            return CharacterRatioTokenizer()
+        elif tokenizer_type.lower() == "wordpiece":
+            if not vocab_path:
+                raise ValueError("vocab_path must be provided for the wordpiece tokenizer")
+            return WordPieceTokenizer(vocab_path, cache_size=cache_size)
+        elif tokenizer_type.lower() == "bpe":
+            if not (vocab_path and merges_path):
+                raise ValueError("vocab_path and merges_path must be provided for the bpe tokenizer")
+            return BPETokenizer(vocab_path, merges_path, cache_size=cache_size)
+        else:
+            raise ValueError(f"Unsupported tokenizer type: {tokenizer_type}")
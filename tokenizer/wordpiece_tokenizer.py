@@ -0,0 +1,84 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List
+
+from .tokenizer import BaseTokenizer
+
+# ASCII punctuation, CJK ideographs and any other non-word, non-space character
+# are split into tokens of their own, as in BERT's basic tokenizer.
+_SPLIT_PATTERN = re.compile(
+    r'([!-/:-@\[-`{-~\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\U00020000-\U0002fa1f]|[^\w\s])'
+)
+
+
+class WordPieceTokenizer(BaseTokenizer):
+    """
+    WordPiece tokenizer as used by BERT style models, loaded from a local vocab.txt
+    file with one token per line.
+    :param vocab_path: The path of the vocabulary file.
+    :param lowercase: Lowercase the text and strip accents before tokenizing.
+    :param unk_token: The token used for words that cannot be tokenized.
+    :param continuing_prefix: The prefix of tokens that continue a word.
+    :param max_input_chars_per_word: Longer words are mapped to unk_token.
+    :param cache_size: The maximum number of cached words and token counts.
+    """
+
+    def __init__(self, vocab_path: str, lowercase: bool = True, unk_token: str = "[UNK]",
+                 continuing_prefix: str = "##", max_input_chars_per_word: int = 100, cache_size: int = 65536):
+        super().__init__(cache_size)
+        self.vocab = self._load_vocab(vocab_path)
+        self.lowercase = lowercase
+        self.unk_token = unk_token
+        self.continuing_prefix = continuing_prefix
+        self.max_input_chars_per_word = max_input_chars_per_word
+
+    def _init_caches(self):
+        super()._init_caches()
+        self._tokenize_word = lru_cache(maxsize=self.cache_size)(self._wordpiece)
+
+    @staticmethod
+    def _load_vocab(vocab_path: str) -> Dict[str, int]:
+        with open(vocab_path, "r", encoding="utf-8") as file:
+            return {line.rstrip("\n"): index for index, line in enumerate(file) if line.rstrip("\n")}
+
+    def tokenize(self, text: str) -> List[str]:
+        tokens = []
+        for word in self._basic_tokenize(text):
+            tokens.extend(self._tokenize_word(word))
+        return tokens
+
+    def encode(self, text: str) -> List[int]:
+        unk_id = self.vocab.get(self.unk_token)
+        return [self.vocab.get(token, unk_id) for token in self.tokenize(text)]
+
+    def _basic_tokenize(self, text: str) -> List[str]:
+        if self.lowercase:
+            text = unicodedata.normalize("NFD", text.lower())
+            text = "".join(char for char in text if unicodedata.category(char) != "Mn")
+        words = []
+        for word in text.split():
+            words.extend(piece for piece in _SPLIT_PATTERN.split(word) if piece)
+        return words
+
+    def _wordpiece(self, word: str) -> tuple:
+        if len(word) > self.max_input_chars_per_word:
+            return (self.unk_token,)
+        tokens = []
+        start = 0
+        while start < len(word):
+            end = len(word)
+            token = None
+            while start < end:
+                candidate = word[start:end]
+                if start > 0:
+                    candidate = self.continuing_prefix + candidate
+                if candidate in self.vocab:
+                    token = candidate
+                    break
+                end -= 1
+            if token is None:
+                return (self.unk_token,)
+            tokens.append(token)
+            start = end
+        return tuple(tokens)
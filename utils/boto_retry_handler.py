@@ -1,4 +1,7 @@
 from abc import ABC, abstractmethod
+import asyncio
+import functools
+import inspect
 import time
 from pydantic import BaseModel
 import botocore
@@ -27,6 +30,9 @@ class BotoRetryHandler(ABC):
         
         
     def __call__(self, func):
+        if inspect.iscoroutinefunction(func):
+            return self._wrap_coroutine(func)
+
         def wrapper(*args, **kwargs):
             retries = 0
             retry_params = self.retry_params
@@ -37,6 +43,7 @@ class BotoRetryHandler(ABC):
                     error_code = e.response['Error']['Code']
                     if error_code in self.retryable_errors:
                         retries += 1
+                        self._notify(args, error_code)
                         logger.error(f"Rate limit error in Bedrock converse (Attempt {retries}/{retry_params.max_retries}): {str(e)}")
                         
                         if retries >= retry_params.max_retries:
@@ -54,4 +61,36 @@ class BotoRetryHandler(ABC):
                     logger.error(f"Unexpected error in Bedrock converse: {str(e)}")
                     raise
             
-        return wrapper
\ No newline at end of file
+        return wrapper
+
+    def _wrap_coroutine(self, func):
+        """Retries a coroutine function, sleeping between attempts without blocking the event loop."""
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            retries = 0
+            retry_params = self.retry_params
+            while True:
+                try:
+                    return await func(*args, **kwargs)
+                except botocore.exceptions.ClientError as e:
+                    error_code = e.response['Error']['Code']
+                    if error_code not in self.retryable_errors:
+                        raise
+                    retries += 1
+                    self._notify(args, error_code)
+                    logger.error(f"Rate limit error (Attempt {retries}/{retry_params.max_retries}): {str(e)}")
+                    if retries >= retry_params.max_retries:
+                        logger.error("Max retries reached.")
+                        raise
+                    backoff_time = retry_params.retry_delay * (retry_params.backoff_factor ** (retries - 1))
+                    logger.info(f"Retrying in {backoff_time} seconds...")
+                    await asyncio.sleep(backoff_time)
+
+        return wrapper
+
+    @staticmethod
+    def _notify(args, error_code: str):
+        """Lets the object whose method is retried react to the error, e.g. by sending smaller requests."""
+        listener = getattr(args[0], "on_retryable_error", None) if args else None
+        if callable(listener):
+            listener(error_code)
@@ -0,0 +1,127 @@
+import math
+from typing import Dict, Iterable, Optional
+
+
+class LatencyHistogram:
+    """
+    A compact histogram of latencies with logarithmic buckets, from which percentiles are
+    read with a bounded relative error.
+
+    Bucket i holds the values in (gamma^(i-1), gamma^i], with gamma chosen so that the
+    value reported for a bucket is within relative_error of every value in it. Only
+    non-empty buckets are stored, so a histogram of any number of values spanning
+    microseconds to minutes takes a few kilobytes. Histograms with the same
+    relative_error are merged by adding their bucket counts, which makes them suitable
+    for combining the measurements of several threads, workers or processes.
+    """
+
+    def __init__(self, relative_error: float = 0.01):
+        """
+        Initializes the LatencyHistogram class.
+        Args:
+            relative_error (float): The largest relative error of the reported percentiles.
+        """
+        if not 0 < relative_error < 1:
+            raise ValueError("relative_error must be in (0, 1)")
+        self.relative_error = relative_error
+        self._gamma = (1 + relative_error) / (1 - relative_error)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets: Dict[int, int] = {}
+        # Values that are zero or negative, e.g. requests served from a cache
+        self._zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def record(self, value: float, count: int = 1) -> None:
+        """
+        Adds a value, count times.
+        """
+        if value > 0:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self._buckets[index] = self._buckets.get(index, 0) + count
+        else:
+            self._zeros += count
+        self.count += count
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        """
+        Adds the values of another histogram to this one.
+        Returns:
+            LatencyHistogram: This histogram.
+        """
+        if other.relative_error != self.relative_error:
+            raise ValueError("Only histograms with the same relative_error can be merged")
+        for index, count in other._buckets.items():
+            self._buckets[index] = self._buckets.get(index, 0) + count
+        self._zeros += other._zeros
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+        return self
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percentile: float) -> float:
+        """
+        Returns the value below which the given percentage of the values fall, or 0.0 if
+        the histogram is empty.
+        """
+        if not 0 <= percentile <= 100:
+            raise ValueError("percentile must be in [0, 100]")
+        if not self.count:
+            return 0.0
+        if percentile == 0:
+            return self.min
+        if percentile == 100:
+            return self.max
+        rank = percentile / 100 * (self.count - 1)
+        seen = self._zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if rank < seen:
+                value = 2 * self._gamma ** index / (self._gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def percentiles(self, percentiles: Iterable[float] = (50, 95, 99)) -> Dict[float, float]:
+        return {percentile: self.percentile(percentile) for percentile in percentiles}
+
+    def to_json(self) -> Dict:
+        """
+        Returns the histogram as a JSON-serializable dict, which from_json restores.
+        """
+        return {
+            "relative_error": self.relative_error,
+            "buckets": [[index, count] for index, count in sorted(self._buckets.items())],
+            "zeros": self._zeros,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict) -> 'LatencyHistogram':
+        histogram = cls(data["relative_error"])
+        histogram._buckets = {int(index): int(count) for index, count in data["buckets"]}
+        histogram._zeros = data["zeros"]
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
+
+    def __len__(self) -> int:
+        return self.count
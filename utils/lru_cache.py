@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    A bounded, thread-safe mapping that evicts the least recently used entry when full.
+    Entries optionally expire ttl seconds after they were stored.
+    """
+
+    def __init__(self, maxsize: int = 100000, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initializes the LRUCache class.
+        Args:
+            maxsize (int): The maximum number of entries.
+            ttl (float): The number of seconds an entry stays valid, or None to keep
+                entries until they are evicted.
+            clock (Callable): Returns the current time in seconds.
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        # Maps each key to its value and, with a ttl, its expiry time
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """
+        Returns the value for key and marks it as recently used, or default if absent or expired.
+        """
+        with self._lock:
+            value = self._get(key)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Stores the value for key, evicting the least recently used entry if needed.
+        """
+        expires = None if self.ttl is None else self._clock() + self.ttl
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Removes all entries. The counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Returns the fraction of lookups that were hits.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the hit, miss, eviction and expiration counters, the hit rate and the size.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hit_rate,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self._entries),
+            }
+
+    def _get(self, key: Hashable) -> Any:
+        """
+        Returns the live value for key, or _MISSING, dropping the entry if it expired.
+        Must be called with the lock held.
+        """
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            return _MISSING
+        value, expires = entry
+        if expires is not None and expires <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            return entry is not _MISSING and (entry[1] is None or entry[1] > self._clock())
+
+    def __len__(self) -> int:
+        return len(self._entries)
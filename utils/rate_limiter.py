@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+from typing import Callable, Optional
+
+
+class RateLimiter:
+    """
+    A client-side limiter for requests per minute and tokens per minute, shared by the
+    threads that call a rate limited service.
+
+    Each limit is a token bucket that holds up to one minute of budget and refills
+    continuously. acquire() reserves its share of both buckets right away, letting them go
+    into debt, and then sleeps until the debt is paid off; callers are therefore served in
+    order and a request larger than the bucket is delayed instead of blocked forever.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        """
+        Initializes the RateLimiter class.
+        Args:
+            requests_per_minute (float): The request budget per minute, or None for no limit.
+            tokens_per_minute (float): The token budget per minute, or None for no limit.
+            clock (Callable): Returns the current time in seconds.
+            sleep (Callable): Sleeps for the given number of seconds.
+        """
+        for limit in (requests_per_minute, tokens_per_minute):
+            if limit is not None and limit <= 0:
+                raise ValueError("rate limits must be positive")
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._updated = clock()
+        self._requests = requests_per_minute or 0.0
+        self._tokens = tokens_per_minute or 0.0
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Waits until a request of the given number of tokens fits in the limits.
+        Args:
+            tokens (int): The number of tokens of the request.
+        Returns:
+            float: The number of seconds waited.
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    async def aacquire(self, tokens: int = 0) -> float:
+        """
+        Waits, without blocking the event loop, until a request of the given number of
+        tokens fits in the limits.
+        Args:
+            tokens (int): The number of tokens of the request.
+        Returns:
+            float: The number of seconds waited.
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def reserve(self, tokens: int = 0) -> float:
+        """
+        Reserves the budget of a request of the given number of tokens.
+        Args:
+            tokens (int): The number of tokens of the request.
+        Returns:
+            float: The number of seconds to wait before sending the request.
+        """
+        with self._lock:
+            now = self._clock()
+            elapsed = now - self._updated
+            self._updated = now
+            wait = 0.0
+            if self.requests_per_minute:
+                self._requests = min(self.requests_per_minute,
+                                     self._requests + elapsed * self.requests_per_minute / 60) - 1
+                wait = max(wait, -self._requests * 60 / self.requests_per_minute)
+            if self.tokens_per_minute:
+                self._tokens = min(self.tokens_per_minute,
+                                   self._tokens + elapsed * self.tokens_per_minute / 60) - tokens
+                wait = max(wait, -self._tokens * 60 / self.tokens_per_minute)
+        return wait